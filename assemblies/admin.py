@@ -1,19 +1,31 @@
 from assemblies.models import Assembly, AssemblyPart
+from componentor.paginators import EstimatedCountPaginator
 from django.contrib import admin
 
 
 class AssemblyPartInline(admin.TabularInline):
     model = AssemblyPart
     autocomplete_fields = ('part',)
-    extra = 10
+    extra = 1
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('part')
 
 
 @admin.register(Assembly)
 class AssemblyAdmin(admin.ModelAdmin):
     list_display = ('designation', 'name', 'created', 'updated')
+    search_fields = ('designation', 'name')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = [AssemblyPartInline]
 
 
 @admin.register(AssemblyPart)
 class AssemblyPartAdmin(admin.ModelAdmin):
     list_display = ('assembly', 'part', 'part_count')
+    list_select_related = ('assembly', 'part')
+    search_fields = ('assembly__designation', 'part__designation')
+    autocomplete_fields = ('assembly', 'part')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AssembliesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assemblies'
+
+    def ready(self):
+        import assemblies.signals  # noqa: F401
@@ -1,6 +1,7 @@
 import re
 
 from assemblies.models import Assembly, AssemblyPart
+from componentor.widgets import AutocompleteSelect
 from django import forms
 
 
@@ -48,7 +49,7 @@ class AssemblyCreateAndUpdateForm(forms.ModelForm):
 
     class Meta:
         model = Assembly
-        fields = ('designation', 'name')
+        fields = ('designation', 'name', 'drawing')
 
 
 class PartForm(forms.ModelForm):
@@ -57,8 +58,8 @@ class PartForm(forms.ModelForm):
         model = AssemblyPart
         fields = '__all__'
         widgets = {
-            'part': forms.Select(
-                attrs={'class': 'form-select'}
+            'part': AutocompleteSelect(
+                'parts:part_autocomplete', attrs={'class': 'form-select'}
             ),
             'part_count': forms.NumberInput(
                 attrs={'class': 'form-control'}
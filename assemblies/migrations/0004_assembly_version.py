@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assemblies', '0003_assembly_drawing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assembly',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Version'),
+        ),
+    ]
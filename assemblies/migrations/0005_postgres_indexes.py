@@ -0,0 +1,35 @@
+from componentor.postgres import RunPostgresSQL, trigram_index
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently, outside of a transaction.
+    atomic = False
+
+    dependencies = [
+        ('assemblies', '0004_assembly_version'),
+    ]
+
+    operations = [
+        trigram_index('assemblies_assembly', 'designation'),
+        trigram_index('assemblies_assembly', 'name'),
+        # Compositions of an assembly and the assemblies using a part are
+        # read from the index alone.
+        RunPostgresSQL(
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+                'assemblies_assemblypart_assembly_covering '
+                'ON assemblies_assemblypart (assembly_id, part_id) '
+                'INCLUDE (part_count)',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS '
+                        'assemblies_assemblypart_assembly_covering',
+        ),
+        RunPostgresSQL(
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+                'assemblies_assemblypart_part_covering '
+                'ON assemblies_assemblypart (part_id) '
+                'INCLUDE (assembly_id, part_count)',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS '
+                        'assemblies_assemblypart_part_covering',
+        ),
+    ]
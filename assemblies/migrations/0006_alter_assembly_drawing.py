@@ -0,0 +1,19 @@
+# Generated by Django 4.2.1 on 2026-10-19 06:16
+
+import componentor.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assemblies', '0005_postgres_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assembly',
+            name='drawing',
+            field=componentor.fields.DrawingField(blank=True, upload_to='drawings/%Y/%m/', verbose_name='Drawing'),
+        ),
+    ]
@@ -1,9 +1,51 @@
+from componentor.fields import DrawingField
+from componentor.models import VersionedModel
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, router, transaction
+from django.dispatch import Signal
 from parts.models import Part
 
+# Sent with ``assembly_ids``, ``count`` and ``using`` after lines were
+# deleted. Lines have no ``pre_delete`` or ``post_delete`` receivers, so that
+# deleting assemblies removes them with a single ``DELETE`` instead of loading
+# them, connect to this signal instead.
+lines_deleted = Signal()
 
-class Assembly(models.Model):
+
+def send_lines_deleted(assembly_ids, deleted, using):
+    count = deleted.get(AssemblyPart._meta.label, 0)
+    if count:
+        lines_deleted.send(
+            sender=AssemblyPart, assembly_ids=assembly_ids, count=count,
+            using=using,
+        )
+
+
+class LinesDeletedQuerySet(models.QuerySet):
+    """QuerySet sending ``lines_deleted`` for the lines it deletes.
+
+    ``assembly_field`` names the field holding the assembly of each row.
+    """
+
+    assembly_field = 'assembly'
+
+    def delete(self):
+        using = self._db or router.db_for_write(self.model, **self._hints)
+        with transaction.atomic(using=using):
+            assembly_ids = list(
+                self.using(using).order_by()
+                .values_list(self.assembly_field, flat=True).distinct()
+            )
+            total, deleted = super().delete()
+            send_lines_deleted(assembly_ids, deleted, using)
+        return total, deleted
+
+
+class AssemblyQuerySet(LinesDeletedQuerySet):
+    assembly_field = 'pk'
+
+
+class Assembly(VersionedModel):
     """Model representing an assembly."""
 
     designation = models.CharField('Designation', max_length=50, unique=True)
@@ -14,8 +56,18 @@ class Assembly(models.Model):
         verbose_name='Parts',
         through="AssemblyPart",
     )
+    drawing = DrawingField(
+        'Drawing',
+        upload_to='drawings/%Y/%m/',
+        blank=True,
+    )
     created = models.DateTimeField('Creation date', auto_now_add=True)
     updated = models.DateTimeField('Date of change', auto_now=True)
+    version = models.PositiveIntegerField(
+        'Version', default=1, editable=False
+    )
+
+    objects = AssemblyQuerySet.as_manager()
 
     class Meta:
         ordering = ('designation',)
@@ -25,6 +77,20 @@ class Assembly(models.Model):
     def __str__(self):
         return f'{self.designation} - {self.name}'
 
+    def delete(self, using=None, keep_parents=False):
+        """Delete the assembly and all its lines in one transaction.
+
+        The collector removes the lines with a single ``DELETE`` instead of
+        loading them, which takes long on assemblies with thousands of
+        lines.
+        """
+        using = using or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            pk = self.pk
+            total, deleted = super().delete(using, keep_parents)
+            send_lines_deleted([pk], deleted, using)
+        return total, deleted
+
 
 class AssemblyPart(models.Model):
     """Model representing intermediary table linking parts to assemblies."""
@@ -44,6 +110,8 @@ class AssemblyPart(models.Model):
         default=1,
         validators=[MinValueValidator(1)])
 
+    objects = LinesDeletedQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Part in assembly'
         verbose_name_plural = 'Parts in assembly'
@@ -53,3 +121,11 @@ class AssemblyPart(models.Model):
                 name='unique_part_in_assembly'
             )
         ]
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            assembly_id = self.assembly_id
+            total, deleted = super().delete(using, keep_parents)
+            send_lines_deleted([assembly_id], deleted, using)
+        return total, deleted
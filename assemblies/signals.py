@@ -0,0 +1,74 @@
+from assemblies.models import Assembly, AssemblyPart, lines_deleted
+from componentor.fragments import bump_versions, delete_fragment
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from materials.models import Material
+from parts.models import Part, parts_bulk_updated
+
+COMPOSITION = 'assembly_composition'
+
+
+@receiver(post_save, sender=Assembly)
+def bump_assembly_composition(sender, instance, using, **kwargs):
+    bump_versions(COMPOSITION, [instance.pk], using)
+
+
+@receiver(post_delete, sender=Assembly)
+def delete_assembly_fragments(sender, instance, using, **kwargs):
+    bump_versions(COMPOSITION, [instance.pk], using)
+    delete_fragment('assembly_row', instance.pk, instance.updated)
+
+
+@receiver(post_save, sender=AssemblyPart)
+def bump_line_composition(sender, instance, using, **kwargs):
+    bump_versions(COMPOSITION, [instance.assembly_id], using)
+
+
+@receiver(post_save, sender=AssemblyPart)
+def bump_assembly_version(sender, instance, using, **kwargs):
+    # A changed line is a changed assembly, an open form of it is stale.
+    Assembly.objects.using(using).filter(pk=instance.assembly_id)\
+        .update(version=F('version') + 1)
+
+
+@receiver(lines_deleted, sender=AssemblyPart)
+def bump_deleted_lines_composition(sender, assembly_ids, using, **kwargs):
+    bump_versions(COMPOSITION, assembly_ids, using)
+
+
+@receiver(lines_deleted, sender=AssemblyPart)
+def bump_deleted_lines_assembly_version(sender, assembly_ids, using,
+                                        **kwargs):
+    Assembly.objects.using(using).filter(pk__in=assembly_ids)\
+        .update(version=F('version') + 1)
+
+
+@receiver(post_save, sender=Part)
+def bump_part_compositions(sender, instance, created, using, **kwargs):
+    if created:
+        return
+    assemblies = AssemblyPart.objects.using(using).filter(part=instance)\
+        .values_list('assembly', flat=True)\
+        .distinct()
+    bump_versions(COMPOSITION, assemblies, using)
+
+
+@receiver(parts_bulk_updated, sender=Part)
+def bump_bulk_updated_compositions(sender, pks, using, **kwargs):
+    assemblies = AssemblyPart.objects.using(using).filter(part__in=pks)\
+        .values_list('assembly', flat=True)\
+        .distinct()
+    bump_versions(COMPOSITION, assemblies, using)
+
+
+@receiver(post_save, sender=Material)
+def bump_material_compositions(sender, instance, created, using,
+                               **kwargs):
+    if created:
+        return
+    assemblies = AssemblyPart.objects.using(using)\
+        .filter(part__material=instance)\
+        .values_list('assembly', flat=True)\
+        .distinct()
+    bump_versions(COMPOSITION, assemblies, using)
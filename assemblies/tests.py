@@ -1,13 +1,21 @@
 from http import HTTPStatus
+from unittest import mock
 
+import parts.factories
 from assemblies import factories
-from assemblies.models import Assembly
+from assemblies.models import Assembly, AssemblyPart, lines_deleted
+from componentor.testing import QueryBudgetTestMixin
+from django.contrib.auth.models import User
+from django.core.cache import caches
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from parts.models import Part, parts_bulk_updated
 
 
-class AssemblyListViewTest(TestCase):
+class AssemblyListViewTest(QueryBudgetTestMixin, TestCase):
     """Test case for the AssemblyListView."""
 
     def setUp(self) -> None:
@@ -59,36 +67,70 @@ class AssemblyListViewTest(TestCase):
         self.assertNotIn(self.assembly1, assembly_list)
         self.assertNotIn(self.assembly3, assembly_list)
 
+    def test_stream_all_assemblies(self) -> None:
+        response = self.client.get(
+            reverse('assemblies:assembly_list'), {'stream': 1}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.streaming)
+
+        content = b''.join(response.streaming_content).decode()
+        for assembly in Assembly.objects.all():
+            self.assertIn(assembly.designation, content)
+
+    def test_partial_request_renders_rows_only(self) -> None:
+        response = self.client.get(
+            reverse('assemblies:assembly_list'),
+            {'search_query': '30.'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateUsed(
+            response, 'assemblies/assembly_list_rows.html'
+        )
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertContains(response, self.assembly3.designation)
+        self.assertNotContains(response, self.assembly1.designation)
 
-class AssemblyDetailViewTest(TestCase):
+    def test_pages_within_query_budget(self) -> None:
+        factories.AssemblyFactory.create_batch(60)
+        url = reverse('assemblies:assembly_list')
+        self.assertWithinQueryBudget(url)
+        self.assertWithinQueryBudget(f'{url}?page=2')
+        self.assertWithinQueryBudget(f'{url}?search_query=assembly')
+
+
+class AssemblyDetailViewTest(QueryBudgetTestMixin, TestCase):
     """Test case for the AssemblyDetailView."""
 
     def setUp(self) -> None:
         self.client = Client()
+        # Versions are bumped on commit, which a test case never reaches.
+        caches['fragments'].clear()
         self.assembly = factories.AssemblyFactory(
             designation='10.00', name='assembly_1'
         )
 
     def test_view_url_exists_at_desired_location(self) -> None:
-        response = self.client.get('/assemblies/1/')
+        response = self.client.get(f'/assemblies/{self.assembly.pk}/')
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_url_accessible_by_name(self) -> None:
         response = self.client.get(
-            reverse('assemblies:assembly_detail', args=[1])
+            reverse('assemblies:assembly_detail', args=[self.assembly.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_uses_correct_template(self) -> None:
         response = self.client.get(
-            reverse('assemblies:assembly_detail', args=[1])
+            reverse('assemblies:assembly_detail', args=[self.assembly.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTemplateUsed(response, 'assemblies/assembly_detail.html')
 
     def test_view_has_all_data(self) -> None:
         response = self.client.get(
-            reverse('assemblies:assembly_detail', args=[1])
+            reverse('assemblies:assembly_detail', args=[self.assembly.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertContains(response, self.assembly.designation)
@@ -102,15 +144,162 @@ class AssemblyDetailViewTest(TestCase):
 
     def test_view_has_links_to_update_and_delete(self) -> None:
         response = self.client.get(
-            reverse('assemblies:assembly_detail', args=[1])
+            reverse('assemblies:assembly_detail', args=[self.assembly.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertContains(
-            response, reverse('assemblies:assembly_update', args=[1])
+            response, reverse(
+                'assemblies:assembly_update', args=[self.assembly.pk]
+            )
         )
         self.assertContains(
-            response, reverse('assemblies:assembly_delete', args=[1])
+            response, reverse(
+                'assemblies:assembly_delete', args=[self.assembly.pk]
+            )
+        )
+
+    def test_not_modified_when_assembly_did_not_change(self) -> None:
+        url = reverse('assemblies:assembly_detail', args=[self.assembly.pk])
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertFalse(response.templates)
+
+    def test_modified_after_composition_change(self) -> None:
+        url = reverse('assemblies:assembly_detail', args=[self.assembly.pk])
+        part = parts.factories.PartFactory()
+        line = AssemblyPart.objects.create(assembly=self.assembly, part=part)
+        etag = self.client.get(url)['ETag']
+
+        line.part_count = 5
+        line.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            part.material.name = 'Renamed'
+            part.material.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Renamed')
+
+    def test_modified_after_lines_swap_parts(self) -> None:
+        url = reverse('assemblies:assembly_detail', args=[self.assembly.pk])
+        first, second = parts.factories.PartFactory.create_batch(2)
+        line1 = AssemblyPart.objects.create(
+            assembly=self.assembly, part=first, part_count=1
+        )
+        line2 = AssemblyPart.objects.create(
+            assembly=self.assembly, part=second, part_count=2
         )
+        etag = self.client.get(url)['ETag']
+
+        # Same lines, parts and quantities, only paired differently.
+        line1.part_count, line2.part_count = 2, 1
+        line1.save()
+        line2.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_composition_is_served_from_fragment_cache(self) -> None:
+        url = reverse('assemblies:assembly_detail', args=[self.assembly.pk])
+        part = parts.factories.PartFactory(name='Cached')
+        AssemblyPart.objects.create(assembly=self.assembly, part=part)
+        self.client.get(url)
+
+        # A queryset update sends no signals, the cached rows stay in place.
+        Part.objects.filter(pk=part.pk).update(name='Bypassed')
+        response = self.client.get(url)
+        self.assertContains(response, 'Cached')
+        self.assertNotContains(response, 'Bypassed')
+
+        part.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            part.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'Bypassed')
+
+    def get_after_change(self, change):
+        """Cache the composition, commit ``change`` and get the page again."""
+        url = reverse('assemblies:assembly_detail', args=[self.assembly.pk])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        return self.client.get(url)
+
+    def add_line(self, **kwargs) -> AssemblyPart:
+        part = parts.factories.PartFactory(**kwargs)
+        return AssemblyPart.objects.create(assembly=self.assembly, part=part)
+
+    def test_material_rename_refreshes_composition(self) -> None:
+        material = self.add_line().part.material
+
+        def rename():
+            material.name = 'Renamed'
+            material.save()
+        self.assertContains(self.get_after_change(rename), 'Renamed')
+
+    def test_part_edit_refreshes_composition(self) -> None:
+        part = self.add_line().part
+
+        def edit():
+            part.name = 'Edited'
+            part.save()
+        self.assertContains(self.get_after_change(edit), 'Edited')
+
+    def test_line_delete_refreshes_composition(self) -> None:
+        line = self.add_line(name='Removed')
+        self.assertNotContains(self.get_after_change(line.delete), 'Removed')
+
+    def test_line_queryset_delete_refreshes_composition(self) -> None:
+        line = self.add_line(name='Removed')
+        lines = AssemblyPart.objects.filter(pk=line.pk)
+        self.assertNotContains(self.get_after_change(lines.delete), 'Removed')
+        self.assembly.refresh_from_db()
+        self.assertEqual(self.assembly.version, 3)
+
+    def test_bulk_update_refreshes_composition(self) -> None:
+        part = self.add_line().part
+
+        def bulk_update():
+            Part.objects.filter(pk=part.pk).update(name='Bulk')
+            parts_bulk_updated.send(
+                sender=Part, pks=[part.pk], using='default'
+            )
+        self.assertContains(self.get_after_change(bulk_update), 'Bulk')
+
+    def test_composition_is_refreshed_after_commit(self) -> None:
+        url = reverse('assemblies:assembly_detail', args=[self.assembly.pk])
+        part = self.add_line(name='Committed').part
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            part.name = 'Pending'
+            part.save()
+            # Rendered before the commit, cached under the old version.
+            Part.objects.filter(pk=part.pk).update(name='Committed')
+            self.assertContains(self.client.get(url), 'Committed')
+            Part.objects.filter(pk=part.pk).update(name='Pending')
+        self.assertContains(self.client.get(url), 'Committed')
+
+        for callback in callbacks:
+            callback()
+        self.assertContains(self.client.get(url), 'Pending')
+
+    def test_composition_within_query_budget(self) -> None:
+        caches['fragments'].clear()
+        for part in parts.factories.PartFactory.create_batch(40):
+            AssemblyPart.objects.create(assembly=self.assembly, part=part)
+        url = reverse('assemblies:assembly_detail', args=[self.assembly.pk])
+        response = self.assertWithinQueryBudget(url)
+        self.assertEqual(len(response.context['parts']), 40)
+        self.assertWithinQueryBudget(f'{url}?search_query=material')
+
+        # The session and the user of a logged in request fit in too.
+        self.client.force_login(User.objects.create_user('budget'))
+        self.assertWithinQueryBudget(f'{url}?search_query=m')
 
 
 class AssemblyCreateViewTest(TestCase):
@@ -146,7 +335,7 @@ class AssemblyCreateViewTest(TestCase):
         )
         self.assertRedirects(response, reverse('assemblies:assembly_list'))
 
-        assembly = Assembly.objects.get(pk=1)
+        assembly = Assembly.objects.get()
         self.assertEqual(assembly.designation, self.valid_data['designation'])
         self.assertEqual(assembly.name, self.valid_data['name'])
 
@@ -164,38 +353,41 @@ class AssemblyUpdateViewTest(TestCase):
         self.valid_data = {
             'designation': '12345',
             'name': 'Assembly',
+            'version': self.assembly.version,
             'parts-TOTAL_FORMS': 0,
             'parts-INITIAL_FORMS': 0
         }
 
     def test_view_url_exists_at_desired_location(self) -> None:
-        response = self.client.get('/assemblies/1/update/')
+        response = self.client.get(f'/assemblies/{self.assembly.pk}/update/')
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_url_accessible_by_name(self) -> None:
         response = self.client.get(
-            reverse('assemblies:assembly_update', args=[1])
+            reverse('assemblies:assembly_update', args=[self.assembly.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_uses_correct_template(self) -> None:
         response = self.client.get(
-            reverse('assemblies:assembly_update', args=[1])
+            reverse('assemblies:assembly_update', args=[self.assembly.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTemplateUsed(response, 'assemblies/assembly_form.html')
 
     def test_update_assembly_with_valid_data(self) -> None:
         response = self.client.post(
-            reverse('assemblies:assembly_update', args=[1]),
+            reverse('assemblies:assembly_update', args=[self.assembly.pk]),
             self.valid_data,
             follow=True
         )
         self.assertRedirects(
-            response, reverse('assemblies:assembly_detail', args=[1])
+            response, reverse(
+                'assemblies:assembly_detail', args=[self.assembly.pk]
+            )
         )
 
-        assembly = Assembly.objects.get(pk=1)
+        assembly = Assembly.objects.get(pk=self.assembly.pk)
         self.assertEqual(assembly.designation, self.valid_data['designation'])
         self.assertEqual(assembly.name, self.valid_data['name'])
 
@@ -203,6 +395,85 @@ class AssemblyUpdateViewTest(TestCase):
         self.assertEqual(message.message, 'The assembly successfully updated')
         self.assertEqual(message.tags, 'success')
 
+    def test_form_carries_version(self) -> None:
+        response = self.client.get(
+            reverse('assemblies:assembly_update', args=[self.assembly.pk])
+        )
+        self.assertContains(
+            response, '<input type="hidden" name="version" value="1"',
+        )
+
+    def test_part_select_renders_selected_part_only(self) -> None:
+        part = parts.factories.PartFactory()
+        other = parts.factories.PartFactory()
+        AssemblyPart.objects.create(assembly=self.assembly, part=part)
+        response = self.client.get(
+            reverse('assemblies:assembly_update', args=[self.assembly.pk])
+        )
+        self.assertContains(
+            response,
+            f'data-autocomplete-url="{reverse("parts:part_autocomplete")}"',
+        )
+        self.assertContains(
+            response, f'<option value="{part.pk}" selected>{part}</option>',
+            html=True,
+        )
+        self.assertNotContains(response, str(other))
+
+    def test_stale_update_shows_conflict(self) -> None:
+        part = parts.factories.PartFactory()
+        AssemblyPart.objects.create(assembly=self.assembly, part=part)
+        self.assembly.refresh_from_db()
+        self.assembly.name = 'Theirs'
+        self.assembly.save()
+
+        response = self.client.post(
+            reverse('assemblies:assembly_update', args=[self.assembly.pk]),
+            self.valid_data,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertIn(('Name', 'Assembly', 'Theirs'),
+                      response.context['conflicts'])
+        self.assertIn(('Parts', '', f'{part.designation} x 1'),
+                      response.context['conflicts'])
+        self.assembly.refresh_from_db()
+        self.assertEqual(self.assembly.name, 'Theirs')
+        self.assertEqual(self.assembly.version, 3)
+
+    def test_line_changed_in_admin_shows_conflict(self) -> None:
+        line = AssemblyPart.objects.create(
+            assembly=self.assembly, part=parts.factories.PartFactory()
+        )
+        self.assembly.refresh_from_db()
+        data = {**self.valid_data, 'version': self.assembly.version}
+
+        admin = Client()
+        admin.force_login(User.objects.create_superuser('admin'))
+        response = admin.post(
+            reverse('admin:assemblies_assemblypart_change', args=[line.pk]),
+            {'assembly': self.assembly.pk, 'part': line.part.pk,
+             'part_count': 7},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+        response = self.client.post(
+            reverse('assemblies:assembly_update', args=[self.assembly.pk]),
+            data,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        line.refresh_from_db()
+        self.assertEqual(line.part_count, 7)
+
+    def test_invalid_lines_do_not_claim_version(self) -> None:
+        data = {**self.valid_data, 'parts-TOTAL_FORMS': 1,
+                'parts-0-part': 999}
+        response = self.client.post(
+            reverse('assemblies:assembly_update', args=[self.assembly.pk]), data
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assembly.refresh_from_db()
+        self.assertEqual(self.assembly.version, 1)
+
 
 class AssemblyDeleteViewTest(TestCase):
     """Test case for AssemblyDeleteView."""
@@ -213,18 +484,24 @@ class AssemblyDeleteViewTest(TestCase):
         self.assembly = factories.AssemblyFactory()
 
     def test_view_url_exists_at_desired_location(self) -> None:
-        response = self.client.get('/assemblies/1/delete/')
+        response = self.client.get(
+            f'/assemblies/{self.assembly_set[0].pk}/delete/'
+        )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_url_accessible_by_name(self) -> None:
         response = self.client.get(
-            reverse('assemblies:assembly_delete', args=[1])
+            reverse(
+                'assemblies:assembly_delete', args=[self.assembly_set[0].pk]
+            )
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_uses_correct_template(self) -> None:
         response = self.client.get(
-            reverse('assemblies:assembly_delete', args=[1])
+            reverse(
+                'assemblies:assembly_delete', args=[self.assembly_set[0].pk]
+            )
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTemplateUsed(response, 'assemblies/assembly_delete.html')
@@ -233,7 +510,9 @@ class AssemblyDeleteViewTest(TestCase):
         length_of_assembly_list_before = len(Assembly.objects.all())
 
         response = self.client.post(
-            reverse('assemblies:assembly_delete', args=[1]),
+            reverse(
+                'assemblies:assembly_delete', args=[self.assembly_set[0].pk]
+            ),
             follow=True
         )
         self.assertRedirects(response, reverse('assemblies:assembly_list'))
@@ -243,8 +522,101 @@ class AssemblyDeleteViewTest(TestCase):
             length_of_assembly_list_after == length_of_assembly_list_before - 1
         )
         with self.assertRaises(ObjectDoesNotExist):
-            Assembly.objects.get(pk=1)
+            Assembly.objects.get(pk=self.assembly_set[0].pk)
 
         message = list(response.context.get('messages'))[0]
         self.assertEqual(message.message, 'The assembly successfully deleted')
         self.assertEqual(message.tags, 'success')
+
+    def test_lines_are_deleted_in_one_query(self) -> None:
+        for part in parts.factories.PartFactory.create_batch(5):
+            AssemblyPart.objects.create(assembly=self.assembly, part=part)
+        pk = self.assembly.pk
+        handler = mock.Mock()
+        lines_deleted.connect(handler, sender=AssemblyPart)
+        self.addCleanup(lines_deleted.disconnect, handler,
+                        sender=AssemblyPart)
+
+        with mock.patch.object(AssemblyPart, '__init__') as init:
+            total, deleted = self.assembly.delete()
+        init.assert_not_called()
+        self.assertEqual(total, 6)
+        self.assertEqual(deleted['assemblies.AssemblyPart'], 5)
+        self.assertFalse(AssemblyPart.objects.exists())
+        handler.assert_called_once_with(
+            signal=lines_deleted, sender=AssemblyPart,
+            assembly_ids=[pk], count=5, using='default',
+        )
+
+    def test_queryset_delete_sends_lines_deleted(self) -> None:
+        for part in parts.factories.PartFactory.create_batch(2):
+            AssemblyPart.objects.create(assembly=self.assembly, part=part)
+        pk = self.assembly.pk
+        handler = mock.Mock()
+        lines_deleted.connect(handler, sender=AssemblyPart)
+        self.addCleanup(lines_deleted.disconnect, handler,
+                        sender=AssemblyPart)
+
+        with mock.patch.object(AssemblyPart, '__init__') as init:
+            total, deleted = Assembly.objects.filter(pk=pk).delete()
+        init.assert_not_called()
+        self.assertEqual(total, 3)
+        self.assertFalse(AssemblyPart.objects.exists())
+        handler.assert_called_once_with(
+            signal=lines_deleted, sender=AssemblyPart,
+            assembly_ids=[pk], count=2, using='default',
+        )
+
+    def test_admin_delete_action_sends_lines_deleted(self) -> None:
+        AssemblyPart.objects.create(
+            assembly=self.assembly, part=parts.factories.PartFactory()
+        )
+        handler = mock.Mock()
+        lines_deleted.connect(handler, sender=AssemblyPart)
+        self.addCleanup(lines_deleted.disconnect, handler,
+                        sender=AssemblyPart)
+        self.client.force_login(User.objects.create_superuser('admin'))
+
+        response = self.client.post(
+            reverse('admin:assemblies_assembly_changelist'),
+            {'action': 'delete_selected', 'post': 'yes',
+             '_selected_action': [self.assembly.pk]},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertFalse(Assembly.objects.filter(pk=self.assembly.pk).exists())
+        handler.assert_called_once_with(
+            signal=lines_deleted, sender=AssemblyPart,
+            assembly_ids=[self.assembly.pk], count=1, using='default',
+        )
+
+
+class AssemblyPartAdminTest(TestCase):
+    """Test case for the changelist of parts in assemblies."""
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(User.objects.create_superuser('admin'))
+        self.url = reverse('admin:assemblies_assemblypart_changelist')
+        self.add_lines(3)
+
+    def add_lines(self, count) -> None:
+        for part in parts.factories.PartFactory.create_batch(count):
+            AssemblyPart.objects.create(
+                assembly=factories.AssemblyFactory(), part=part
+            )
+
+    def test_queries_do_not_grow_with_rows(self) -> None:
+        with CaptureQueriesContext(connection) as before:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        self.add_lines(5)
+        with self.assertNumQueries(len(before)):
+            self.client.get(self.url)
+
+    def test_search_by_designation(self) -> None:
+        line = AssemblyPart.objects.select_related('part').first()
+        response = self.client.get(
+            self.url, {'q': line.part.designation[:6]}
+        )
+        self.assertContains(response, str(line.part))
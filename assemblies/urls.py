@@ -1,15 +1,24 @@
 from assemblies import views
+from componentor.views import select_view
 from django.urls import path
 
 app_name = 'assemblies'
 
 urlpatterns = [
-    path('', views.AssemblyListView.as_view(), name='assembly_list'),
+    path(
+        '',
+        select_view(views.AssemblyListView, views.AsyncAssemblyListView),
+        name='assembly_list'
+    ),
     path(
         'create/', views.AssemblyCreateView.as_view(), name='assembly_create'
     ),
     path(
-        '<int:pk>/', views.AssemblyDetailView.as_view(), name='assembly_detail'
+        '<int:pk>/',
+        select_view(
+            views.AssemblyDetailView, views.AsyncAssemblyDetailView
+        ),
+        name='assembly_detail'
     ),
     path(
         '<int:pk>/update/',
@@ -1,8 +1,11 @@
+import componentor.mixins
 import materials.models
 from assemblies import forms
 from assemblies.models import Assembly
+from componentor.rows import project
 from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
+from django.db.models import Max, Q
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.views import generic
@@ -44,7 +47,9 @@ class AssemblyInline:
             part.save()
 
 
-class AssemblyCreateView(AssemblyInline, generic.CreateView):
+class AssemblyCreateView(componentor.mixins.QueuedWriteMixin,
+                         AssemblyInline,
+                         generic.CreateView):
     """Generic class-based view for creating assembly."""
 
     def get_context_data(self, **kwargs):
@@ -71,7 +76,10 @@ class AssemblyCreateView(AssemblyInline, generic.CreateView):
             }
 
 
-class AssemblyUpdateView(AssemblyInline, generic.UpdateView):
+class AssemblyUpdateView(componentor.mixins.QueuedWriteMixin,
+                         componentor.mixins.OptimisticLockMixin,
+                         AssemblyInline,
+                         generic.UpdateView):
     """Generic class-based view for updating assembly."""
 
     success_message = 'The assembly successfully updated'
@@ -103,20 +111,55 @@ class AssemblyUpdateView(AssemblyInline, generic.UpdateView):
             )
         }
 
+    def get_conflicts(self, form, current):
+        conflicts = super().get_conflicts(form, current)
+        formset = self.get_named_formsets()['parts']
+        if not formset.is_valid():
+            return conflicts
+        submitted = self.describe_lines(
+            (line['part'], line['part_count'])
+            for line in formset.cleaned_data
+            if line and not line.get('DELETE')
+        )
+        saved = self.describe_lines(
+            (line.part, line.part_count)
+            for line in current.assemblypart_set.select_related('part')
+        )
+        if submitted != saved:
+            conflicts.append(('Parts', submitted, saved))
+        return conflicts
+
+    @staticmethod
+    def describe_lines(lines):
+        return ', '.join(sorted(
+            f'{part.designation} x {count}' for part, count in lines
+        ))
 
-class AssemblyListView(generic.ListView):
+
+class AssemblyListView(componentor.mixins.ConditionalListMixin,
+                       componentor.mixins.StreamingListMixin,
+                       componentor.mixins.PartialListMixin,
+                       generic.ListView):
     """Generic class-based view for a list of assemblies."""
 
     model = Assembly
     template_name = 'assemblies/assembly_list.html'
+    rows_template_name = 'assemblies/assembly_list_rows.html'
+    paginate_by = 50
     context_object_name = 'assemblies'
+    query_budget = 5
+    row_fields = (
+        'id', 'designation', 'name', 'drawing', 'created', 'updated',
+    )
 
     def get_queryset(self):
         search_query = self.request.GET.get('search_query')
-        qs = Assembly.objects.all()
+        qs = project(Assembly.objects.all(), self.row_fields)
         if search_query:
-            return qs.filter(designation__icontains=search_query) \
-                or qs.filter(name__icontains=search_query)
+            return qs.filter(
+                Q(designation__icontains=search_query)
+                | Q(name__icontains=search_query)
+            )
         return qs
 
     def get_context_data(self, **kwargs):
@@ -125,11 +168,30 @@ class AssemblyListView(generic.ListView):
         return context
 
 
-class AssemblyDetailView(generic.DetailView):
+class AssemblyDetailView(componentor.mixins.ConditionalGetMixin,
+                         generic.DetailView):
     """Generic class-based view for detail displaying an assembly."""
 
     model = Assembly
     template_name = 'assemblies/assembly_detail.html'
+    query_budget = 5
+
+    def get_validators(self):
+        """Return the assembly version and the latest change of its parts.
+
+        Adding, changing or removing a line bumps the assembly version, see
+        assemblies/signals.py. Parts and their materials change on their
+        own, so their latest change date is included.
+        """
+        return Assembly.objects.filter(pk=self.kwargs['pk'])\
+            .annotate(
+                parts_updated=Max('assemblypart__part__updated'),
+                materials_updated=Max('assemblypart__part__material__updated'),
+            )\
+            .values_list(
+                'updated', 'version', 'parts_updated', 'materials_updated',
+            )\
+            .first()
 
     def get_parts_in_assembly(self):
         search_query = self.request.GET.get('search_query', '')
@@ -140,7 +202,8 @@ class AssemblyDetailView(generic.DetailView):
             .values_list('part', flat=True)\
             .filter(part__in=all_material_parts)
         parts_in_assembly = self.object.assemblypart_set\
-            .filter(part__in=material_parts_id_in_assembly)
+            .filter(part__in=material_parts_id_in_assembly)\
+            .select_related('part__material')
         return parts_in_assembly
 
     def get_context_data(self, **kwargs):
@@ -150,7 +213,22 @@ class AssemblyDetailView(generic.DetailView):
         return context
 
 
-class AssemblyDeleteView(SuccessMessageMixin, generic.DeleteView):
+class AsyncAssemblyListView(componentor.mixins.AsyncConditionalListMixin,
+                            componentor.mixins.AsyncStreamingListMixin,
+                            componentor.mixins.AsyncListMixin,
+                            AssemblyListView):
+    """Async view for a list of assemblies, served with ``ASYNC_VIEWS``."""
+
+
+class AsyncAssemblyDetailView(componentor.mixins.AsyncConditionalGetMixin,
+                              componentor.mixins.AsyncDetailMixin,
+                              AssemblyDetailView):
+    """Async view for detail displaying an assembly, see ``ASYNC_VIEWS``."""
+
+
+class AssemblyDeleteView(componentor.mixins.QueuedWriteMixin,
+                         SuccessMessageMixin,
+                         generic.DeleteView):
     """Generic class-based view for deleting assembly."""
 
     model = Assembly
@@ -0,0 +1,104 @@
+import json
+
+from componentor import profiling
+from componentor.models import RequestProfile
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import filesizeformat
+from django.urls import re_path, reverse
+from django.utils.html import format_html, format_html_join
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Read only pages of the profiles, with downloads of the stacks."""
+
+    list_display = (
+        'created', 'method', 'path', 'view', 'status', 'mode', 'duration',
+        'queries', 'samples',
+    )
+    list_filter = ('mode', 'view')
+    search_fields = ('path',)
+    fieldsets = (
+        (None, {'fields': (
+            'created', 'user', 'method', 'path', 'view', 'status', 'mode',
+            'duration', 'queries',
+        )}),
+        ('Time', {'fields': ('samples', 'downloads', 'hot_functions',
+                             'stats')}),
+        ('Memory', {'fields': ('memory_peak', 'allocation_table')}),
+    )
+    readonly_fields = ('downloads', 'hot_functions', 'allocation_table')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            re_path(
+                r'^(?P<pk>\d+)/(?P<export>collapsed\.txt|speedscope\.json)/$',
+                self.admin_site.admin_view(self.export_view),
+                name='componentor_requestprofile_export',
+            ),
+            *super().get_urls(),
+        ]
+
+    def export_view(self, request, pk, export):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if not self.has_view_permission(request, profile):
+            raise PermissionDenied
+        if export == 'collapsed.txt':
+            response = HttpResponse(profile.stacks, content_type='text/plain')
+        else:
+            response = HttpResponse(
+                json.dumps(profiling.to_speedscope(str(profile),
+                                                   profile.stacks)),
+                content_type='application/json',
+            )
+        response['Content-Disposition'] = \
+            f'attachment; filename="profile-{pk}-{export}"'
+        return response
+
+    @admin.display(description='Stacks')
+    def downloads(self, obj):
+        if not obj.stacks:
+            return '-'
+        return format_html_join(' ', '<a href="{}">{}</a>', (
+            (reverse('admin:componentor_requestprofile_export',
+                     args=[obj.pk, export]), label)
+            for export, label in (
+                ('collapsed.txt', 'Collapsed, for flamegraph.pl'),
+                ('speedscope.json', 'speedscope'),
+            )
+        ))
+
+    @admin.display(description='Hot functions')
+    def hot_functions(self, obj):
+        rows = profiling.hot_functions(obj.stacks)
+        if not rows:
+            return '-'
+        return format_html(
+            '<table><tr><th>Function</th><th>Self</th><th>Total</th></tr>'
+            '{}</table>',
+            format_html_join('', '<tr><td>{}</td><td>{}</td><td>{}</td></tr>',
+                             rows),
+        )
+
+    @admin.display(description='Top allocations')
+    def allocation_table(self, obj):
+        if not obj.allocations:
+            return '-'
+        return format_html(
+            '<table><tr><th>Line</th><th>Size</th><th>Blocks</th></tr>'
+            '{}</table>',
+            format_html_join(
+                '', '<tr><td>{}:{}</td><td>{}</td><td>{}</td></tr>',
+                ((site['file'], site['line'], filesizeformat(site['size']),
+                  site['count']) for site in obj.allocations),
+            ),
+        )
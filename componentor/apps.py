@@ -0,0 +1,15 @@
+from componentor.metrics import install_query_timer
+from componentor.slowqueries import install_slow_query_log
+from componentor.sqlite import configure_connection
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class ComponentorConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'componentor'
+
+    def ready(self):
+        connection_created.connect(configure_connection)
+        connection_created.connect(install_query_timer)
+        connection_created.connect(install_slow_query_log)
@@ -9,8 +9,11 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from componentor.warmup import timed
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'componentor.settings')
 
-application = get_asgi_application()
+# Loading the apps and models, reported with the warm-up.
+with timed('import'):
+    application = get_asgi_application()
@@ -0,0 +1,47 @@
+"""Query budgets of views, so N+1 queries don't go unnoticed.
+
+A view declares how many queries a request to it may run::
+
+    query_budget = 5
+
+counting those of the middleware too, so the session and the user of a
+logged in request fit in. ``QueryBudgetMiddleware`` checks every request
+against the budget of its view. With ``QUERY_BUDGET_MODE=raise``, the
+default in debug and in tests, a request over budget fails with
+``QueryBudgetExceeded``; with ``log``, the default otherwise, it is logged;
+``off`` drops the middleware.
+
+Tests check pages against their budget at realistic data sizes, see
+componentor/testing.py.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def view_budget(view):
+    """Return the query budget declared by the class of ``view``, if any."""
+    return getattr(getattr(view, 'view_class', None), 'query_budget', None)
+
+
+def get_budget(request):
+    match = getattr(request, 'resolver_match', None)
+    return view_budget(match.func) if match else None
+
+
+def check_budget(request, queries, mode):
+    """Raise or log if ``request`` ran more than the budget of its view."""
+    budget = get_budget(request)
+    if budget is None or queries <= budget:
+        return
+    message = (f'{request.method} {request.path} ran {queries} queries, '
+               f'{request.resolver_match.view_name} has a budget of '
+               f'{budget}.')
+    if mode == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,256 @@
+"""Cache-aside lookups of rarely changing objects.
+
+A model opts in by declaring a second manager::
+
+    cached = CachedManager('name')
+
+``Model.cached.get(pk=...)`` and ``Model.cached.get(name=...)``, or ``aget()``
+in async code, first look in a small LRU local to the process, then in the
+``default`` cache, and only then query the database. Saving or deleting an
+object drops it from both caches at once and writes the saved object back
+after the transaction commits.
+
+Saving an object also gives it a new generation in the ``default`` cache.
+A local copy is only served while its generation is still current, so
+every process sees a change as soon as it is committed, at the price of
+reading the small generation key from the shared cache on each lookup.
+That cache must be shared by all processes (see ``CACHES`` in the
+settings); a ``LocMemCache`` is only correct with a single process. Views
+validating a cached object must take the validators from the object they
+serve, not from the database.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from componentor.metrics import count_cache_lookup
+from componentor.routers import get_partition
+from django.core.cache import cache
+from django.db import models, router, transaction
+from django.db.models.signals import post_delete, post_save
+
+
+class LocalCache:
+    """Thread safe LRU of at most ``maxsize`` entries that expire."""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            expires, value = self._data.get(key, (0, None))
+            if expires < time.monotonic():
+                self._data.pop(key, None)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+class CachedManager(models.Manager):
+    """Manager serving single objects by pk or ``lookup_field`` from cache.
+
+    Only ``get()`` with exactly one of those lookups is cached, everything
+    else behaves as on a plain manager.
+    """
+
+    def __init__(self, lookup_field, timeout=300, local_timeout=30,
+                 maxsize=1024):
+        super().__init__()
+        self.lookup_field = lookup_field
+        self.timeout = timeout
+        # Django copies managers for each model, the copies share this.
+        self.local = LocalCache(maxsize, local_timeout)
+
+    @property
+    def hits(self):
+        return self.local.hits
+
+    @property
+    def misses(self):
+        return self.local.misses
+
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        if cls._meta.abstract:
+            return
+        uid = f'{cls._meta.label}.{name}'
+        post_save.connect(self._on_save, sender=cls, weak=False,
+                          dispatch_uid=uid)
+        post_delete.connect(self._on_delete, sender=cls, weak=False,
+                            dispatch_uid=uid)
+
+    def cache_key(self, field, value):
+        digest = hashlib.md5(str(value).encode()).hexdigest()
+        # The local cache has no key function, see routers.make_key().
+        partition = get_partition() or ''
+        return (f'objects:{self.model._meta.label_lower}:{partition}:'
+                f'{field}:{digest}')
+
+    def get(self, *args, **kwargs):
+        if args or len(kwargs) != 1:
+            return super().get(*args, **kwargs)
+        (field, value), = kwargs.items()
+        if field in ('pk', self.model._meta.pk.name):
+            return self.get_by_pk(value)
+        if field == self.lookup_field:
+            return self.get_by_lookup(value)
+        return super().get(*args, **kwargs)
+
+    async def aget(self, *args, **kwargs):
+        return await sync_to_async(self.get)(*args, **kwargs)
+
+    def get_by_pk(self, pk):
+        pk = self.model._meta.pk.to_python(pk)
+        obj = self._get_object(pk)
+        if obj is not None:
+            self.count(hit=True)
+            return copy.copy(obj)
+        self.count(hit=False)
+        obj = self._fetch(pk=pk)
+        self.store(obj)
+        return copy.copy(obj)
+
+    def get_by_lookup(self, value):
+        pk = self._get_cached(self.cache_key(self.lookup_field, value))
+        if pk is not None:
+            obj = self._get_object(pk)
+            # The object may have been renamed since the key was stored.
+            if obj is not None and getattr(obj, self.lookup_field) == value:
+                self.count(hit=True)
+                return copy.copy(obj)
+        self.count(hit=False)
+        obj = self._fetch(**{self.lookup_field: value})
+        self.store(obj)
+        return copy.copy(obj)
+
+    def count(self, hit):
+        if hit:
+            self.local.hits += 1
+        else:
+            self.local.misses += 1
+        count_cache_lookup(f'objects:{self.model._meta.label_lower}', hit)
+
+    def _fetch(self, **lookup):
+        # A replica may lag behind, what it returns would stay cached.
+        using = router.db_for_write(self.model)
+        return self.get_queryset().using(using).get(**lookup)
+
+    def _get_cached(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = cache.get(key)
+            if value is None:
+                return None
+            self.local.set(key, value)
+        return value
+
+    def _get_object(self, pk):
+        key = self.cache_key('pk', pk)
+        generation = self.generations([pk])[pk]
+        cached = self.local.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        obj = cache.get(key)
+        if obj is not None:
+            self.local.set(key, (generation, obj))
+        return obj
+
+    def generation_key(self, pk):
+        return f'{self.cache_key("pk", pk)}:generation'
+
+    def generations(self, pks):
+        """Return the current generation of each of ``pks``.
+
+        A missing generation, never set or culled, is replaced by a new
+        one, so local copies taken before can't be mistaken for current.
+        """
+        keys = {self.generation_key(pk): pk for pk in pks}
+        found = cache.get_many(keys)
+        for key in keys.keys() - found.keys():
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+        return {pk: found[key] for key, pk in keys.items()}
+
+    def store(self, *objs):
+        """Write ``objs`` through to the local and the shared cache."""
+        generations = self.generations([obj.pk for obj in objs])
+        entries = {}
+        local = {}
+        for obj in objs:
+            key = self.cache_key('pk', obj.pk)
+            entries[key] = obj
+            local[key] = (generations[obj.pk], obj)
+            key = self.cache_key(
+                self.lookup_field, getattr(obj, self.lookup_field)
+            )
+            entries[key] = local[key] = obj.pk
+        cache.set_many(entries, self.timeout)
+        for key, value in local.items():
+            self.local.set(key, value)
+
+    def prime(self):
+        """Load the latest objects into the caches, as many as fit locally.
+
+        Returns the number of objects loaded.
+        """
+        using = router.db_for_write(self.model)
+        # Each object takes two entries, by pk and by lookup.
+        objs = list(self.get_queryset().using(using)
+                    .order_by('-pk')[:self.local.maxsize // 2])
+        self.store(*objs)
+        return len(objs)
+
+    def invalidate(self, pks):
+        """Drop the objects with ``pks`` from the local and shared cache.
+
+        The new generations make the other processes drop their local
+        copies too. Keys by ``lookup_field`` are checked against the object
+        they point to, so they can stay.
+        """
+        keys = [self.cache_key('pk', pk) for pk in pks]
+        cache.delete_many(keys)
+        cache.set_many(
+            {self.generation_key(pk): uuid.uuid4().hex for pk in pks}, None
+        )
+        for key in keys:
+            self.local.delete(key)
+
+    def _on_save(self, sender, instance, using, **kwargs):
+        self.invalidate([instance.pk])
+        obj = copy.copy(instance)
+        obj._state.fields_cache = {}
+
+        def store():
+            # Others may have cached the old object again until the commit.
+            self.invalidate([obj.pk])
+            self.store(obj)
+        transaction.on_commit(store, using=using)
+
+    def _on_delete(self, sender, instance, **kwargs):
+        self.invalidate([instance.pk])
@@ -0,0 +1,10 @@
+from componentor.routers import get_partition
+from django.conf import settings
+
+
+def partitions(request):
+    """Add the projects and the current one for the project switcher."""
+    return {
+        'partitions': settings.DATABASE_PARTITIONS,
+        'partition': get_partition(),
+    }
@@ -0,0 +1,61 @@
+"""Model and form fields for drawings of parts and assemblies.
+
+Drawings are served from the application's own origin, so only images
+and PDFs are accepted: the extension has to be one of
+``DRAWING_EXTENSIONS`` and the content has to be an image Pillow can read
+or start like a PDF.
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.core.validators import FileExtensionValidator
+from django.db import models
+
+DRAWING_EXTENSIONS = (
+    'png', 'jpg', 'jpeg', 'gif', 'webp', 'tif', 'tiff', 'pdf',
+)
+IMAGE_FORMATS = ('PNG', 'JPEG', 'GIF', 'WEBP', 'TIFF')
+PDF_MAGIC = b'%PDF-'
+
+
+def is_drawing(file):
+    """Return whether an uploaded file is an image or a PDF."""
+    from PIL import Image
+
+    file.seek(0)
+    if file.name.lower().endswith('.pdf'):
+        return file.read(len(PDF_MAGIC)) == PDF_MAGIC
+    try:
+        with Image.open(file) as image:
+            image.verify()
+            return image.format in IMAGE_FORMATS
+    except Exception:
+        # Pillow raises many kinds of errors on broken files.
+        return False
+    finally:
+        file.seek(0)
+
+
+class DrawingFormField(forms.FileField):
+    default_error_messages = {
+        'invalid_drawing': 'Upload an image or a PDF. The file you uploaded '
+                           'was either not one or a corrupted one.',
+    }
+
+    def to_python(self, data):
+        file = super().to_python(data)
+        if file is not None and not is_drawing(file):
+            raise ValidationError(
+                self.error_messages['invalid_drawing'],
+                code='invalid_drawing',
+            )
+        return file
+
+
+class DrawingField(models.FileField):
+    """``FileField`` accepting images and PDFs only."""
+
+    default_validators = [FileExtensionValidator(DRAWING_EXTENSIONS)]
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{'form_class': DrawingFormField, **kwargs})
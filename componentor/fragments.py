@@ -0,0 +1,75 @@
+"""Versions of cached template fragments.
+
+Fragments are cached with the ``{% cache %}`` tag in the ``fragments`` cache.
+A fragment that shows data from many rows varies on a version, which signal
+handlers drop whenever one of those rows changes, so the stale fragment is
+never read again. Versions are dropped once the change is committed, a
+request reading the rows before that caches them under the old version.
+The cache must be shared by all processes, see ``CACHES`` in the settings.
+
+The backends below count the lookups of fragments in the metrics.
+"""
+
+import uuid
+
+from componentor.metrics import count_cache_lookup
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+
+CACHE_ALIAS = 'fragments'
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def version_key(name, key):
+    return f'fragments:version:{name}:{key}'
+
+
+def get_version(name, key):
+    """Return the current version of fragment ``name`` for ``key``."""
+    cache = get_cache()
+    cache.add(version_key(name, key), uuid.uuid4().hex, None)
+    return cache.get(version_key(name, key))
+
+
+def bump_versions(name, keys, using=None):
+    """Invalidate fragment ``name`` for every key in ``keys``.
+
+    Takes effect when the transaction on ``using`` commits.
+    """
+    version_keys = [version_key(name, key) for key in keys]
+    transaction.on_commit(
+        lambda: get_cache().delete_many(version_keys), using=using
+    )
+
+
+def delete_fragment(name, *vary_on):
+    """Delete a fragment cached with ``{% cache ... name *vary_on %}``."""
+    get_cache().delete(make_template_fragment_key(name, vary_on))
+
+
+MISSING = object()
+
+
+class CountedCacheMixin:
+    """Count hits and misses of ``{% cache %}`` lookups, not of versions."""
+
+    def get(self, key, default=None, version=None):
+        if not key.startswith('template.cache.'):
+            return super().get(key, default, version)
+        value = super().get(key, MISSING, version)
+        count_cache_lookup(CACHE_ALIAS, value is not MISSING)
+        return default if value is MISSING else value
+
+
+class CountedLocMemCache(CountedCacheMixin, LocMemCache):
+    pass
+
+
+class CountedFileBasedCache(CountedCacheMixin, FileBasedCache):
+    pass
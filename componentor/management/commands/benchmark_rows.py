@@ -0,0 +1,82 @@
+import gc
+import time
+import tracemalloc
+
+from assemblies.views import AssemblyListView
+from componentor.rows import project
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from materials.models import Material
+from materials.views import MaterialListView
+from parts.models import Part
+from parts.views import PartListView
+
+VIEWS = (MaterialListView, PartListView, AssemblyListView)
+
+
+class Command(BaseCommand):
+    help = ('Compare memory and time of loading list pages as model '
+            'instances and as projected rows.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Add this many materials and parts for the run, they are '
+                 'rolled back afterwards.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Runs per measurement, the best one is reported.',
+        )
+
+    def seed(self, count):
+        materials = Material.objects.bulk_create(
+            Material(name=f'Benchmark material {i}', density=i)
+            for i in range(count)
+        )
+        Part.objects.bulk_create(
+            Part(designation=f'BENCH.{i:08}', name=f'Benchmark part {i}',
+                 material=materials[i])
+            for i in range(count)
+        )
+
+    def measure(self, queryset, repeat):
+        best_time = best_peak = None
+        for _ in range(repeat):
+            gc.collect()
+            tracemalloc.start()
+            started = time.perf_counter()
+            rows = list(queryset.all())
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del rows
+            best_time = min(elapsed, best_time or elapsed)
+            best_peak = min(peak, best_peak or peak)
+        return best_time, best_peak
+
+    def report(self, view, repeat):
+        model = view.model
+        queryset = model.objects.all()
+        count = queryset.count()
+        full_time, full_peak = self.measure(queryset, repeat)
+        rows_time, rows_peak = self.measure(
+            project(queryset, view.row_fields), repeat
+        )
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural} ({count} rows)\n'
+            f'  instances: {full_time * 1000:8.1f} ms '
+            f'{full_peak / 1024:10.1f} KiB\n'
+            f'  rows:      {rows_time * 1000:8.1f} ms '
+            f'{rows_peak / 1024:10.1f} KiB\n'
+            f'  saved:     {1 - rows_time / max(full_time, 1e-9):8.0%} '
+            f'{1 - rows_peak / max(full_peak, 1):13.0%}'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed']:
+                self.seed(options['seed'])
+            for view in VIEWS:
+                self.report(view, options['repeat'])
+            transaction.set_rollback(True)
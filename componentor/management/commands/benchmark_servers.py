@@ -0,0 +1,151 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from parts.models import Part
+
+# Both servers run with gunicorn.conf.py, the ASGI one with the async views
+# and the WSGI one with the sync views.
+SERVERS = {
+    'asgi': {'ASYNC_VIEWS': '1'},
+    'wsgi': {'ASYNC_VIEWS': '0'},
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def fetch(url):
+    """Return the time taken by a GET of ``url``, ``None`` on error."""
+    start = time.perf_counter()
+    try:
+        with urlopen(url, timeout=30) as response:
+            response.read()
+    except (HTTPError, URLError, OSError):
+        return None
+    return time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = ('Compare latency and throughput of pages served by the ASGI '
+            'server with the async views and by the WSGI server with the '
+            'sync views. The servers run on the configured database, with '
+            'the static files collected.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Paths to request, by default the list, search, detail '
+                 'and autocomplete pages.',
+        )
+        parser.add_argument(
+            '--servers', nargs='+', choices=SERVERS, default=list(SERVERS),
+        )
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Worker processes of each server.',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Threads of each WSGI worker.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=32,
+            help='Requests in flight at a time.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Requests per path and server.',
+        )
+
+    def get_paths(self):
+        paths = [
+            reverse('materials:material_list'),
+            reverse('parts:part_list'),
+            reverse('assemblies:assembly_list'),
+            reverse('parts:part_list') + '?' + urlencode(
+                {'search_query': '0'}
+            ),
+            reverse('parts:part_autocomplete') + '?' + urlencode(
+                {'term': '0'}
+            ),
+        ]
+        part = Part.objects.order_by('pk').values_list('pk', flat=True)\
+            .first()
+        if part is not None:
+            paths.append(reverse('parts:part_detail', args=[part]))
+        return paths
+
+    @contextmanager
+    def serve(self, name, options):
+        port = free_port()
+        process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                '--config', str(settings.BASE_DIR / 'gunicorn.conf.py'),
+                '--bind', f'127.0.0.1:{port}',
+            ],
+            cwd=settings.BASE_DIR,
+            env={
+                **os.environ,
+                **SERVERS[name],
+                'WEB_CONCURRENCY': str(options['workers']),
+                'WEB_THREADS': str(options['threads']),
+            },
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            yield f'http://127.0.0.1:{port}'
+        finally:
+            process.terminate()
+            process.wait()
+
+    def wait_ready(self, url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while fetch(url) is None:
+            if time.monotonic() > deadline:
+                raise CommandError(f'No answer from {url}.')
+            time.sleep(0.2)
+
+    def measure(self, url, options):
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            start = time.perf_counter()
+            times = list(executor.map(fetch, [url] * options['requests']))
+            elapsed = time.perf_counter() - start
+        latencies = sorted(t for t in times if t is not None)
+        if len(latencies) < 2:
+            return f'{len(times) - len(latencies)} errors'
+        percentiles = statistics.quantiles(latencies, n=100)
+        return (
+            f'{len(latencies) / elapsed:8.1f} req/s  '
+            + '  '.join(f'p{p} {percentiles[p - 1] * 1000:7.1f} ms'
+                        for p in (50, 95, 99))
+            + f'  {len(times) - len(latencies)} errors'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or self.get_paths()
+        for name in options['servers']:
+            with self.serve(name, options) as base:
+                self.wait_ready(base + reverse('ready'))
+                for path in paths:
+                    # Warm up the workers before measuring.
+                    self.measure(base + path, {**options, 'requests': 50})
+                    self.stdout.write(
+                        f'{name}  {path:40} '
+                        f'{self.measure(base + path, options)}'
+                    )
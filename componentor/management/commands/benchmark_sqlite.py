@@ -0,0 +1,145 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from componentor.sqlite import apply_pragmas
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = '''
+    CREATE TABLE item (
+        id INTEGER PRIMARY KEY,
+        designation TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL
+    )
+'''
+
+
+class Command(BaseCommand):
+    help = ('Compare SQLite throughput with the default settings and with '
+            'the SQLITE_PRAGMAS profile on a scratch database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=20000,
+            help='Rows in the table before the measurements.',
+        )
+        parser.add_argument(
+            '--writes', type=int, default=2000,
+            help='Single-row write transactions to time.',
+        )
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Reader threads running next to one writer.',
+        )
+        parser.add_argument(
+            '--seconds', type=float, default=3.0,
+            help='Duration of the concurrent read/write run.',
+        )
+
+    def connect(self, path, pragmas):
+        connection = sqlite3.connect(
+            path, timeout=20, isolation_level=None, check_same_thread=False
+        )
+        apply_pragmas(connection, pragmas)
+        return connection
+
+    def prepare(self, path, pragmas, rows):
+        connection = self.connect(path, pragmas)
+        connection.execute(SCHEMA)
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO item (designation, name) VALUES (?, ?)',
+            ((f'{i:08}', f'Item {i}') for i in range(rows)),
+        )
+        connection.execute('COMMIT')
+        connection.close()
+
+    def time_writes(self, path, pragmas, writes):
+        connection = self.connect(path, pragmas)
+        started = time.perf_counter()
+        for i in range(writes):
+            connection.execute(
+                'INSERT INTO item (designation, name) VALUES (?, ?)',
+                (f'W{i:08}', f'Written {i}'),
+            )
+        elapsed = time.perf_counter() - started
+        connection.close()
+        return writes / elapsed
+
+    def read(self, connection, rows):
+        connection.execute(
+            'SELECT name FROM item WHERE id = ?', (random.randint(1, rows),)
+        ).fetchone()
+        return 'reads'
+
+    def write(self, connection, rows):
+        connection.execute(
+            'UPDATE item SET name = ? WHERE id = ?',
+            (f'Updated {time.time()}', random.randint(1, rows)),
+        )
+        return 'writes'
+
+    def work(self, operation, path, pragmas, rows, stop, tallies):
+        connection = self.connect(path, pragmas)
+        tally = Counter()
+        while not stop.is_set():
+            try:
+                tally[operation(connection, rows)] += 1
+            except sqlite3.OperationalError:
+                tally['errors'] += 1
+        connection.close()
+        tallies.append(tally)
+
+    def run_mixed(self, path, pragmas, rows, readers, seconds):
+        stop, tallies = threading.Event(), []
+        operations = [self.read] * readers + [self.write]
+        threads = [
+            threading.Thread(
+                target=self.work,
+                args=(operation, path, pragmas, rows, stop, tallies),
+            )
+            for operation in operations
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        total = sum(tallies, Counter())
+        return {key: total[key] / seconds
+                for key in ('reads', 'writes', 'errors')}
+
+    def measure(self, pragmas, options):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'benchmark.sqlite3')
+            self.prepare(path, pragmas, options['rows'])
+            writes = self.time_writes(path, pragmas, options['writes'])
+            mixed = self.run_mixed(
+                path, pragmas, options['rows'], options['readers'],
+                options['seconds'],
+            )
+        return writes, mixed
+
+    def handle(self, *args, **options):
+        profiles = (('default', {}), ('profile', settings.SQLITE_PRAGMAS))
+        results = {}
+        for name, pragmas in profiles:
+            results[name] = self.measure(pragmas, options)
+            writes, mixed = results[name]
+            self.stdout.write(
+                f'{name:8} {writes:10.0f} commits/s | '
+                f'concurrent: {mixed["reads"]:10.0f} reads/s '
+                f'{mixed["writes"]:8.0f} writes/s '
+                f'{mixed["errors"]:6.1f} errors/s'
+            )
+        (base, base_mixed), (tuned, tuned_mixed) = results.values()
+        reads = tuned_mixed['reads'] / max(base_mixed['reads'], 1)
+        self.stdout.write(self.style.SUCCESS(
+            f'Commits x{tuned / base:.1f}, concurrent reads x{reads:.1f}'
+        ))
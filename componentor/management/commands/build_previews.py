@@ -0,0 +1,58 @@
+import os
+import time
+
+from assemblies.models import Assembly
+from componentor.previews import pipeline
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from parts.models import Part
+
+
+class Command(BaseCommand):
+    help = 'Render previews for all drawings of parts and assemblies.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int,
+            help='Number of worker processes, defaults to the CPU count.',
+        )
+        parser.add_argument(
+            '--chunksize', type=int, default=16,
+            help='Drawings queued per worker at a time.',
+        )
+
+    def get_drawings(self):
+        for model in (Part, Assembly):
+            drawings = model.objects.exclude(drawing='')\
+                .values_list('drawing', flat=True)\
+                .iterator()
+            for name in drawings:
+                yield name, model.drawing.field.storage.path(name)
+
+    def handle(self, *args, **options):
+        pipeline.max_workers = options['workers'] or os.cpu_count()
+        if isinstance(caches['default'], LocMemCache):
+            self.stderr.write(
+                'The default cache is local to this process, the web '
+                'workers will hash every drawing again.'
+            )
+        started = time.perf_counter()
+        rendered = failed = 0
+        try:
+            results = pipeline.backfill(
+                self.get_drawings(), chunksize=options['chunksize']
+            )
+            for name, digest in results:
+                if digest is None:
+                    failed += 1
+                    self.stderr.write(f'Failed: {name}')
+                else:
+                    rendered += 1
+        finally:
+            pipeline.shutdown()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{rendered} previews ready, {failed} failed '
+            f'in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,194 @@
+import hashlib
+import re
+from collections import defaultdict
+
+from componentor.slowqueries import read_log
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+TABLES = ('parts_part', 'assemblies_assemblypart', 'materials_material')
+
+# Full scans in the plans of SQLite (``SCAN parts_part``, ``SCAN U0``, with
+# or without an index read from end to end) and PostgreSQL.
+SCANS = {
+    'sqlite': re.compile(r'^SCAN (?:TABLE )?(\w+)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+TABLE_ALIAS = re.compile(r'(?:FROM|JOIN) "(\w+)"(?: (?:AS )?(\w+))?')
+COLUMN = re.compile(r'(?:"(\w+)"|\b(\w+))\."(\w+)"')
+SEARCH = re.compile(r'(?:::text)?\)? (?:I?LIKE)\b')
+COMPARISON = re.compile(r'\s*(?:=|<|>|!=|IN\b|BETWEEN\b|IS\b)')
+MAX_INDEX_NAME = 30
+
+
+def scanned_tables(entry):
+    """Return the tables the plan of ``entry`` reads in full."""
+    scan = SCANS.get(entry['vendor'])
+    if scan is None or not entry.get('plan'):
+        return set()
+    aliases = {
+        alias or table: table
+        for table, alias in TABLE_ALIAS.findall(entry['sql'])
+    }
+    return {
+        aliases.get(match[1], match[1])
+        for match in map(scan.search, entry['plan']) if match
+    }
+
+
+def columns_of(sql, table):
+    """Return the searched, filtered and ordered columns of ``table``."""
+    qualifiers = {table} | {
+        alias for name, alias in TABLE_ALIAS.findall(sql)
+        if name == table and alias
+    }
+    where, _, order = sql.partition(' FROM ')[2].rpartition(' ORDER BY ')
+    if not where:
+        where, order = order, ''
+    searched, filtered = [], []
+    for match in COLUMN.finditer(where):
+        if (match[1] or match[2]) not in qualifiers:
+            continue
+        rest = where[match.end():]
+        if SEARCH.match(rest):
+            searched.append(match[3])
+        elif COMPARISON.match(rest) \
+                or where[:match.start()].rstrip().endswith('='):
+            filtered.append(match[3])
+    ordered = [match[3] for match in COLUMN.finditer(order)
+               if (match[1] or match[2]) in qualifiers]
+    return (tuple(dict.fromkeys(searched)), tuple(dict.fromkeys(filtered)),
+            tuple(dict.fromkeys(ordered)))
+
+
+def plural(count):
+    return f'{count} slow {"query" if count == 1 else "queries"}'
+
+
+def index_name(model, fields):
+    name = '_'.join([model._meta.model_name, *fields, 'idx'])
+    if len(name) <= MAX_INDEX_NAME:
+        return name
+    digest = hashlib.md5(name.encode()).hexdigest()[:4]
+    return f'{name[:MAX_INDEX_NAME - 9]}_{digest}_idx'
+
+
+class Command(BaseCommand):
+    help = ('Read the slow query log, find the queries that scan whole '
+            'tables and propose indexes for them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default=settings.SLOW_QUERY_LOG,
+            help='Slow query log, by default SLOW_QUERY_LOG. Its rotated '
+                 'files are read too.',
+        )
+        parser.add_argument(
+            '--tables', nargs='+', default=list(TABLES),
+            help='Tables to look for full scans of.',
+        )
+
+    def collect(self, entries, tables):
+        """Group the slow queries scanning ``tables`` by what they read."""
+        groups = defaultdict(list)
+        for entry in entries:
+            for table in scanned_tables(entry) & set(tables):
+                columns = columns_of(entry['sql'], table)
+                groups[entry['database'], table, columns].append(entry)
+        return groups
+
+    def existing_indexes(self, alias, table):
+        connection = connections[
+            alias if alias in connections else DEFAULT_DB_ALIAS
+        ]
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, table
+            )
+        return set(constraints), [
+            constraint['columns'] for constraint in constraints.values()
+            if constraint['index'] or constraint['unique']
+        ]
+
+    def propose(self, alias, table, columns):
+        """Return the proposals for the scans of ``table`` by ``columns``."""
+        searched, filtered, ordered = columns
+        model = next(model for model in apps.get_models()
+                     if model._meta.db_table == table)
+        names, indexes = self.existing_indexes(alias, table)
+        proposals = [self.propose_search(alias, table, column, names)
+                     for column in searched]
+        # An index for the order alone doesn't help a search, which reads
+        # every row anyway.
+        key = list(dict.fromkeys(filtered + ordered)) \
+            if filtered or not searched else []
+        if not key:
+            if not searched:
+                proposals.append('Reads the whole table with nothing to '
+                                 'index, e.g. a count of all rows.')
+            return proposals
+        # With the filter indexed, a scan means the planner found it
+        # cheaper than the index, on a small table or stale statistics.
+        lead = list(filtered) or key
+        if any(index[:len(lead)] == lead for index in indexes):
+            proposals.append(f'({", ".join(lead)}) is indexed already, the '
+                             f'planner preferred a scan. The table is '
+                             f'probably small, or run ANALYZE.')
+            return proposals
+        fields = [field.name for column in key
+                  for field in model._meta.concrete_fields
+                  if field.column == column]
+        name = index_name(model, fields)
+        proposals.append(
+            f'{model.__name__}.Meta.indexes: models.Index(fields='
+            f'{fields!r}, name={name!r})\n'
+            f'    CREATE INDEX {name} ON {table} ({", ".join(key)});'
+        )
+        return proposals
+
+    def propose_search(self, alias, table, column, names):
+        helper = f'trigram_index({table!r}, {column!r})'
+        if connections[alias].vendor != 'postgresql':
+            return (f'icontains on {column} reads every row on SQLite, no '
+                    f'index helps. On PostgreSQL: {helper}.')
+        if f'{table}_{column}_trgm' in names:
+            return (f'{helper} exists, the planner skips it for search '
+                    f'terms shorter than three characters.')
+        return f'Migration: {helper}, see componentor/postgres.py.'
+
+    def report(self, key, entries):
+        alias, table, columns = key
+        total = sum(entry['duration_ms'] for entry in entries)
+        views = sorted({entry['view'] or '-' for entry in entries})
+        searched, filtered, ordered = columns
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{table}: {plural(len(entries))}, {total:.0f} ms in total, '
+            f'max {max(entry["duration_ms"] for entry in entries):.0f} ms'
+        ))
+        self.stdout.write(
+            f'  searches {", ".join(searched) or "-"}; filters '
+            f'{", ".join(filtered) or "-"}; orders by '
+            f'{", ".join(ordered) or "-"}\n'
+            f'  views: {", ".join(views)}\n'
+            f'  e.g. {entries[0]["sql"]}'
+        )
+        for proposal in self.propose(alias, table, columns):
+            self.stdout.write(self.style.SUCCESS(f'  -> {proposal}'))
+
+    def handle(self, *args, **options):
+        entries = list(read_log(options['log']))
+        if not entries:
+            raise CommandError(f'No slow queries in {options["log"]}.')
+        groups = self.collect(entries, options['tables'])
+        self.stdout.write(
+            f'{plural(len(entries))}, '
+            f'{sum(map(len, groups.values()))} of them scan '
+            f'{", ".join(options["tables"])}.'
+        )
+        for key, group in sorted(
+            groups.items(),
+            key=lambda item: -sum(e['duration_ms'] for e in item[1]),
+        ):
+            self.report(key, group)
@@ -0,0 +1,40 @@
+from assemblies.models import Assembly
+from componentor.routers import partition_alias
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from materials.models import Material
+from parts.models import Part
+
+MODELS = (Material, Part, Assembly)
+
+
+class Command(BaseCommand):
+    help = 'List the project partitions with the objects they hold.'
+
+    def describe(self, alias):
+        connection = connections[alias]
+        try:
+            tables = connection.introspection.table_names()
+        except DatabaseError as error:
+            return f'unavailable: {error}'
+        if not all(model._meta.db_table in tables for model in MODELS):
+            return 'not migrated, run split_partition'
+        return ', '.join(
+            f'{model._base_manager.using(alias).count()} '
+            f'{model._meta.verbose_name_plural.lower()}'
+            for model in MODELS
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_PARTITIONS:
+            self.stdout.write('No partitions, set DATABASE_PARTITIONS.')
+        rows = [('(shared)', DEFAULT_DB_ALIAS)] + [
+            (name, partition_alias(name))
+            for name in settings.DATABASE_PARTITIONS
+        ]
+        for name, alias in rows:
+            location = connections[alias].settings_dict['NAME']
+            self.stdout.write(
+                f'{name:20} {location}\n{"":20} {self.describe(alias)}'
+            )
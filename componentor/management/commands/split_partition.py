@@ -0,0 +1,114 @@
+from pathlib import Path
+
+from assemblies.models import Assembly, AssemblyPart
+from componentor.routers import partition_alias
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from materials.models import Material
+from parts.models import Part
+
+MODELS = (Material, Part, Assembly, AssemblyPart)
+
+
+class Command(BaseCommand):
+    help = ('Copy the materials, parts and assemblies of a project from the '
+            'default database into its partition.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'partition', help='Partition name, one of DATABASE_PARTITIONS.',
+        )
+        parser.add_argument(
+            '--prefix', required=True,
+            help="Designation prefix of the project's assemblies and parts. "
+                 'Parts used by its assemblies and the materials of all '
+                 'its parts go with them.',
+        )
+        parser.add_argument(
+            '--move', action='store_true',
+            help='Delete the copied objects from the default database '
+                 'unless something left there still uses them.',
+        )
+
+    def select(self, prefix):
+        """Return a queryset of the project's objects per model."""
+        objects = {model: model._base_manager.using(DEFAULT_DB_ALIAS)
+                   for model in MODELS}
+        assemblies = objects[Assembly]\
+            .filter(designation__startswith=prefix)
+        parts = objects[Part]\
+            .filter(Q(designation__startswith=prefix)
+                    | Q(assemblypart__assembly__in=assemblies))
+        return {
+            Material: objects[Material].filter(parts__in=parts),
+            Part: parts,
+            Assembly: assemblies,
+            AssemblyPart: objects[AssemblyPart]
+            .filter(assembly__in=assemblies),
+        }
+
+    def prepare(self, alias):
+        database = connections[alias].settings_dict
+        if connections[alias].vendor == 'sqlite':
+            Path(database['NAME']).parent.mkdir(parents=True, exist_ok=True)
+        call_command('migrate', database=alias, verbosity=0)
+
+    def copy(self, model, pks, alias):
+        """Insert the rows of ``pks`` into ``alias`` as they are."""
+        connection = connections[alias]
+        fields = model._meta.local_concrete_fields
+        objs = list(model._base_manager.using(DEFAULT_DB_ALIAS)
+                    .filter(pk__in=pks).order_by('pk'))
+        size = connection.ops.bulk_batch_size(fields, objs) or len(objs)
+        for start in range(0, len(objs), size):
+            # A raw insert keeps the timestamps instead of renewing them.
+            model._base_manager._insert(
+                objs[start:start + size], fields, using=alias, raw=True
+            )
+
+    def reset_sequences(self, alias):
+        connection = connections[alias]
+        statements = connection.ops.sequence_reset_sql(no_style(), MODELS)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def delete(self, selection):
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            Assembly.objects.using(DEFAULT_DB_ALIAS)\
+                .filter(pk__in=selection[Assembly]).delete()
+            Part.objects.using(DEFAULT_DB_ALIAS)\
+                .filter(pk__in=selection[Part], assemblypart__isnull=True)\
+                .delete()
+            Material.objects.using(DEFAULT_DB_ALIAS)\
+                .filter(pk__in=selection[Material], parts__isnull=True)\
+                .delete()
+
+    def handle(self, *args, **options):
+        if options['partition'] not in settings.DATABASE_PARTITIONS:
+            raise CommandError(
+                f"No partition {options['partition']}, "
+                f'add it to DATABASE_PARTITIONS first.'
+            )
+        alias = partition_alias(options['partition'])
+        selection = {
+            model: list(queryset.values_list('pk', flat=True).distinct())
+            for model, queryset in self.select(options['prefix']).items()
+        }
+        self.prepare(alias)
+        with transaction.atomic(using=alias):
+            for model, pks in selection.items():
+                self.copy(model, pks, alias)
+            self.reset_sequences(alias)
+        if options['move']:
+            self.delete(selection)
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Moved" if options["move"] else "Copied"} '
+            + ', '.join(f'{len(pks)} {model._meta.verbose_name_plural.lower()}'
+                        for model, pks in selection.items())
+            + f' to {alias}'
+        ))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Refresh the query planner statistics of the SQLite database '
+            'and checkpoint its write-ahead log.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default='default',
+            help='Database alias to maintain.',
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Analyze every table instead of only those that need it.',
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Also rebuild the database file to reclaim free pages.',
+        )
+
+    def run(self, cursor, sql):
+        started = time.perf_counter()
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{sql}: {elapsed * 1000:.0f} ms')
+        return rows
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                f"Database '{options['database']}' is not SQLite."
+            )
+        with connection.cursor() as cursor:
+            if options['full']:
+                self.run(cursor, 'ANALYZE')
+            self.run(cursor, 'PRAGMA optimize')
+            if options['vacuum']:
+                self.run(cursor, 'VACUUM')
+            cursor.execute('PRAGMA journal_mode')
+            if cursor.fetchone()[0] != 'wal':
+                return
+            busy, log, checkpointed = self.run(
+                cursor, 'PRAGMA wal_checkpoint(TRUNCATE)'
+            )[0]
+        self.stdout.write(self.style.SUCCESS(
+            f'Checkpointed {checkpointed} of {log} WAL pages'
+            + (', the database was busy' if busy else '')
+        ))
@@ -0,0 +1,53 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Copy the SQLite database to its read replicas. PostgreSQL '
+            'standbys follow the primary by streaming replication instead.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'databases', nargs='*',
+            help='Replica aliases to update, all of them by default.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep copying every this many seconds.',
+        )
+
+    def sync(self, source, alias):
+        started = time.perf_counter()
+        target = sqlite3.connect(connections.settings[alias]['NAME'])
+        try:
+            source.connection.backup(target)
+        finally:
+            target.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{alias}: {elapsed * 1000:.0f} ms')
+
+    def get_aliases(self, databases):
+        aliases = databases or settings.REPLICA_DATABASES
+        if not aliases:
+            raise CommandError('No replicas, set DATABASE_REPLICAS.')
+        unknown = set(aliases) - set(settings.REPLICA_DATABASES)
+        if unknown:
+            raise CommandError(f'Not replicas: {", ".join(sorted(unknown))}')
+        return aliases
+
+    def handle(self, *args, **options):
+        aliases = self.get_aliases(options['databases'])
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Only SQLite replicas are copied.')
+        source.ensure_connection()
+        while True:
+            for alias in aliases:
+                self.sync(source, alias)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
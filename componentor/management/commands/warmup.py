@@ -0,0 +1,13 @@
+from componentor import warmup
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Warm up this process as a server worker does before it takes '
+            'requests, and print the time of each step, cold and warm.')
+
+    def handle(self, *args, **options):
+        for state in ('cold', 'warm'):
+            warmup.timings.clear()
+            warmup.warm_up()
+            self.stdout.write(f'{state}: {warmup.format_timings()}')
@@ -0,0 +1,156 @@
+"""Runtime metrics in the Prometheus text format, served at ``/metrics``.
+
+``MetricsMiddleware`` records per URL name the latency, the number and time
+of the database queries, and the size of every response, along with the
+requests in flight. ``CachedManager`` and the fragment cache count their
+hits and misses.
+
+Under gunicorn, every worker writes its values to files in
+``PROMETHEUS_MULTIPROC_DIR`` and ``/metrics`` adds up those of all
+workers, see gunicorn.conf.py. Without it the values are the ones of the
+process answering.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+    Histogram, generate_latest, multiprocess,
+)
+
+UNRESOLVED = '<unresolved>'
+
+REQUESTS = Counter(
+    'componentor_requests', 'Requests by URL name, method and status.',
+    ['view', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'componentor_request_duration_seconds', 'Request latency by URL name.',
+    ['view'],
+    buckets=(.005, .01, .025, .05, .075, .1, .25, .5, .75, 1, 2.5, 5, 10),
+)
+QUERIES = Histogram(
+    'componentor_request_queries', 'Database queries per request.',
+    ['view'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+QUERY_TIME = Histogram(
+    'componentor_request_query_seconds',
+    'Time per request spent in database queries.',
+    ['view'], buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1),
+)
+RESPONSE_SIZE = Histogram(
+    'componentor_response_size_bytes',
+    'Size of the responses that aren\'t streamed.',
+    ['view'], buckets=tuple(4 ** n * 256 for n in range(8)),
+)
+IN_FLIGHT = Gauge(
+    'componentor_requests_in_flight', 'Requests being served.',
+    multiprocess_mode='livesum',
+)
+CACHE_LOOKUPS = Counter(
+    'componentor_cache_lookups', 'Cache lookups by cache and result.',
+    ['cache', 'result'],
+)
+
+
+class RequestStats:
+    """Database usage of the current request."""
+
+    __slots__ = ('request', 'queries', 'query_time', 'duration')
+
+    def __init__(self, request):
+        self.request = request
+        self.queries = 0
+        self.query_time = 0.0
+        self.duration = 0.0
+
+
+# The context is copied into the threads of sync_to_async(), which add to
+# the same stats.
+_stats = ContextVar('request_stats', default=None)
+
+
+def current_stats():
+    """Return the stats of the request being served, ``None`` outside."""
+    return _stats.get()
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the stats of the request."""
+    stats = _stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - started
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """Time the queries of each new database connection."""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+@contextmanager
+def track_request(request):
+    """Collect the stats of ``request``, served in the block."""
+    stats = RequestStats(request)
+    token = _stats.set(stats)
+    IN_FLIGHT.inc()
+    started = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.duration = time.perf_counter() - started
+        IN_FLIGHT.dec()
+        _stats.reset(token)
+
+
+@contextmanager
+def untracked():
+    """Leave the queries of the block out of the stats of the request."""
+    token = _stats.set(None)
+    try:
+        yield
+    finally:
+        _stats.reset(token)
+
+
+def observe(request, response, stats):
+    """Record a served request by the name of the URL it resolved to.
+
+    The body of a streamed response is sent later, its queries, time and
+    size are left out.
+    """
+    view = view_name(request)
+    REQUESTS.labels(view, request.method, response.status_code).inc()
+    LATENCY.labels(view).observe(stats.duration)
+    QUERIES.labels(view).observe(stats.queries)
+    QUERY_TIME.labels(view).observe(stats.query_time)
+    if not response.streaming:
+        RESPONSE_SIZE.labels(view).observe(len(response.content))
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNRESOLVED
+
+
+def count_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def export():
+    """Return the metrics of all workers and their content type."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
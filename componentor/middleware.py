@@ -0,0 +1,258 @@
+import threading
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from componentor import metrics, profiling
+from componentor.budgets import check_budget
+from componentor.models import RequestProfile
+from componentor.routers import use_partition, use_primary
+from componentor.writequeue import write_queue
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404
+from django.http.request import HttpRequest
+from django.http.response import HttpResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+PIN_COOKIE = 'use_primary'
+PARTITION_PARAM = 'project'
+PARTITION_SESSION_KEY = 'partition'
+
+
+class AsyncCapableMiddleware:
+    """Base of middleware that runs natively in sync and async stacks.
+
+    Subclasses implement ``__call__`` and ``__acall__``, Django calls the
+    one matching the handler, so ASGI requests don't switch threads here.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        raise NotImplementedError
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        raise NotImplementedError
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Record latency, queries and response size of each request.
+
+    Comes before the other middleware so their time counts too, static
+    files are served before it and are left out.
+    """
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with metrics.track_request(request) as stats:
+            response = self.get_response(request)
+        metrics.observe(request, response, stats)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        with metrics.track_request(request) as stats:
+            response = await self.get_response(request)
+        metrics.observe(request, response, stats)
+        return response
+
+
+class QueryBudgetMiddleware(AsyncCapableMiddleware):
+    """Check each request against the query budget of its view.
+
+    Counts the queries seen by ``MetricsMiddleware``, which must come
+    before. Queries of a streamed body run later and are not counted.
+    """
+
+    def __init__(self, get_response) -> None:
+        if settings.QUERY_BUDGET_MODE == 'off':
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.check(request, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        return self.check(request, await self.get_response(request))
+
+    def check(self, request, response):
+        stats = metrics.current_stats()
+        if stats is not None and not response.streaming:
+            check_budget(request, stats.queries, settings.QUERY_BUDGET_MODE)
+        return response
+
+
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    """Keep reads on the primary for requests that need the latest writes.
+
+    A request that writes reads from the primary too, and its response sets
+    a cookie that pins the user's next requests to the primary for
+    ``REPLICA_PIN_SECONDS``, long enough for the replicas to catch up.
+    """
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        writes = request.method not in SAFE_METHODS
+        with use_primary(writes or PIN_COOKIE in request.COOKIES):
+            response = self.get_response(request)
+        return self.pin(response, writes)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        writes = request.method not in SAFE_METHODS
+        with use_primary(writes or PIN_COOKIE in request.COOKIES):
+            response = await self.get_response(request)
+        return self.pin(response, writes)
+
+    def pin(self, response, writes):
+        if writes and settings.REPLICA_DATABASES:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class PartitionMiddleware(AsyncCapableMiddleware):
+    """Serve each request from the partition of the user's project.
+
+    ``?project=<name>`` switches to a project and keeps it in the session,
+    an empty name switches back to the default database.
+    """
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with use_partition(self.get_partition(request)):
+            return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        name = None
+        # The project is kept in the session, which may load from the
+        # database.
+        if settings.DATABASE_PARTITIONS:
+            name = await sync_to_async(self.get_partition)(request)
+        with use_partition(name):
+            return await self.get_response(request)
+
+    def get_partition(self, request):
+        if not settings.DATABASE_PARTITIONS:
+            return None
+        if PARTITION_PARAM in request.GET:
+            name = request.GET[PARTITION_PARAM]
+            if name and name not in settings.DATABASE_PARTITIONS:
+                raise Http404(f'No project {name}.')
+            request.session[PARTITION_SESSION_KEY] = name
+        name = request.session.get(PARTITION_SESSION_KEY)
+        # The project may have been dropped from the settings since.
+        return name if name in settings.DATABASE_PARTITIONS else None
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that passes ASGI requests on without a thread switch.
+
+    Static files are read in a thread and sent whole, an ASGI server would
+    read WhiteNoise's sync file iterator into memory anyway.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(
+                request.path_info
+            )
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+        return await sync_to_async(self.serve_buffered)(static_file, request)
+
+    def serve_buffered(self, static_file, request):
+        response = self.serve(static_file, request)
+        buffered = HttpResponse(
+            b''.join(response), status=response.status_code
+        )
+        response.close()
+        for header, value in response.items():
+            buffered[header] = value
+        return buffered
+
+
+class ProfilerMiddleware(AsyncCapableMiddleware):
+    """Profile requests of staff users that ask for it.
+
+    See componentor/profiling.py. Comes after ``AuthenticationMiddleware``,
+    the user is only loaded for requests with the flag.
+    """
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = profiling.get_mode(request)
+        if not mode or not request.user.is_staff:
+            return self.get_response(request)
+        with profiling.profile(mode, {threading.get_ident()}) as result:
+            response = self.get_response(request)
+        if result is not None:
+            self.save(request, response, result)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        mode = profiling.get_mode(request)
+        if not mode or not await sync_to_async(self.is_staff)(request):
+            return await self.get_response(request)
+        # The request runs in the event loop and in threads of its own, all
+        # busy threads are sampled.
+        with profiling.profile(mode) as result:
+            response = await self.get_response(request)
+        if result is not None:
+            await sync_to_async(self.save)(request, response, result)
+        return response
+
+    def is_staff(self, request):
+        return request.user.is_staff
+
+    def save(self, request, response, result):
+        stats = metrics.current_stats()
+        profile = RequestProfile(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path(),
+            view=metrics.view_name(request),
+            status=response.status_code,
+            mode=result.mode,
+            duration=result.duration * 1000,
+            queries=stats.queries if stats else 0,
+            samples=result.samples,
+            stacks=result.stacks,
+            stats=result.stats,
+            allocations=result.allocations,
+            memory_peak=result.memory_peak,
+        )
+        # Profiles stay in the default database whatever the project, and
+        # out of the queries of the request.
+        with use_partition(None), metrics.untracked():
+            write_queue.run(profile.save)
+        response['X-Profile-Id'] = str(profile.pk)
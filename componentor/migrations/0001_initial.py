@@ -0,0 +1,42 @@
+# Generated by Django 4.2.1 on 2026-10-19 05:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Creation date')),
+                ('method', models.CharField(max_length=10, verbose_name='Method')),
+                ('path', models.TextField(verbose_name='Path')),
+                ('view', models.CharField(blank=True, max_length=200, verbose_name='View')),
+                ('status', models.PositiveSmallIntegerField(verbose_name='Status')),
+                ('mode', models.CharField(choices=[('sample', 'Sampling'), ('trace', 'Deterministic')], max_length=10, verbose_name='Mode')),
+                ('duration', models.FloatField(verbose_name='Duration, ms')),
+                ('queries', models.PositiveIntegerField(default=0, verbose_name='Queries')),
+                ('samples', models.PositiveIntegerField(default=0, verbose_name='Samples')),
+                ('stacks', models.TextField(blank=True, verbose_name='Collapsed stacks')),
+                ('stats', models.TextField(blank=True, verbose_name='Call statistics')),
+                ('allocations', models.JSONField(default=list, verbose_name='Top allocations')),
+                ('memory_peak', models.PositiveBigIntegerField(verbose_name='Peak memory, bytes')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Request profile',
+                'verbose_name_plural': 'Request profiles',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -1,17 +1,67 @@
+import contextvars
+import hashlib
+from calendar import timegm
+from datetime import datetime
+from http import HTTPStatus
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from componentor.models import VersionConflict
+from componentor.routers import get_partition
+from componentor.writequeue import write_queue
+from django import forms
+from django.conf import settings
 from django.contrib import messages
-from django.db.models import ProtectedError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import models, router, transaction
+from django.db.models import Count, Max, ProtectedError
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import redirect
+from django.template.loader import get_template, render_to_string
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag
+from django.utils.safestring import mark_safe
 
 
 class DeletionProtectionMixin:
-    """Limit deletion of an object that has a reference to it."""
+    """Limit deletion of an object that has a reference to it.
+
+    Protected references are counted before deleting, so a blocked delete is
+    refused without the collector loading every referencing object, and the
+    confirmation page can tell up front what blocks it.
+    """
 
     success_url = reverse_lazy('home')
     success_message = 'Message about successful deletion'
     error_message = 'Deletion error message'
 
+    @cached_property
+    def protected_references(self):
+        """Return ``(verbose_name_plural, count)`` of protecting relations."""
+        references = []
+        for relation in self.object._meta.related_objects:
+            if relation.on_delete not in (models.PROTECT, models.RESTRICT):
+                continue
+            count = relation.related_model._base_manager\
+                .filter(**{relation.field.name: self.object})\
+                .count()
+            if count:
+                references.append(
+                    (relation.related_model._meta.verbose_name_plural, count)
+                )
+        return references
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['protected_references'] = self.protected_references
+        return context
+
     def form_valid(self, form):
+        if self.protected_references:
+            messages.error(self.request, self.error_message)
+            return redirect(self.success_url)
         try:
             self.object.delete()
             messages.success(self.request, self.success_message)
@@ -19,3 +69,341 @@ class DeletionProtectionMixin:
         except ProtectedError:
             messages.error(self.request, self.error_message)
             return redirect(self.success_url)
+
+
+class OptimisticLockMixin:
+    """Refuse to save an object that changed since its form was shown.
+
+    The form carries the ``version`` of the object it was rendered from,
+    and the object is saved as that version, see ``VersionedModel``. No
+    lock is held while the form is open. When someone else saved in
+    between, nothing is written and the form is shown again with their
+    values next to the submitted ones.
+    """
+
+    conflict_message = ('Someone else changed this object while you were '
+                        'editing it. Check their changes below and submit '
+                        'again to overwrite them.')
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        form.fields['version'] = forms.IntegerField(
+            widget=forms.HiddenInput, initial=self.object.version
+        )
+        return form
+
+    def form_valid(self, form):
+        using = router.db_for_write(type(self.object), instance=self.object)
+        self.object.version = form.cleaned_data['version']
+        try:
+            with transaction.atomic(using=using):
+                response = super().form_valid(form)
+                # Anything but a redirect shows the form again, nothing is
+                # saved.
+                if response.status_code != HTTPStatus.FOUND:
+                    transaction.set_rollback(True, using=using)
+        except VersionConflict:
+            return self.form_conflict(form)
+        return response
+
+    def form_conflict(self, form):
+        current = type(self.object)._base_manager.get(pk=self.object.pk)
+        form.add_error(None, self.conflict_message)
+        form.data = form.data.copy()
+        form.data['version'] = current.version
+        context = self.get_context_data(
+            form=form, conflicts=self.get_conflicts(form, current)
+        )
+        return self.render_to_response(context, status=HTTPStatus.CONFLICT)
+
+    def get_conflicts(self, form, current):
+        """Return ``(label, submitted, saved)`` of fields that differ."""
+        conflicts = []
+        for name, field in form.fields.items():
+            if name == 'version' or isinstance(field, forms.FileField):
+                continue
+            submitted = form.cleaned_data.get(name)
+            saved = getattr(current, name)
+            if submitted != saved:
+                conflicts.append((field.label, submitted, saved))
+        return conflicts
+
+
+class QueuedWriteMixin:
+    """Save a valid form through the write queue."""
+
+    def form_valid(self, form):
+        return write_queue.run(super().form_valid, form)
+
+
+class StreamingListMixin:
+    """Stream a whole list page when requested with ``?stream=1``.
+
+    The page is rendered once without rows and split at ``stream_rows``.
+    The rows are rendered in chunks of ``stream_chunk_size`` from
+    ``queryset.iterator()``, so memory stays flat for any number of rows.
+    """
+
+    rows_template_name = None
+    stream_chunk_size = 500
+    stream_marker = '<!--stream-rows-->'
+
+    def get(self, request, *args, **kwargs):
+        if not request.GET.get('stream'):
+            return super().get(request, *args, **kwargs)
+        head, tail = self.render_frame()
+        return StreamingHttpResponse(
+            self.stream_page(head, tail),
+            content_type='text/html; charset=utf-8',
+        )
+
+    def render_frame(self):
+        """Render the page without rows, return the parts around them."""
+        queryset = self.get_queryset()
+        # The rows are read after the middleware has returned, the database
+        # and the partition of the request are kept for them.
+        self.object_list = queryset.using(queryset.db)
+        self.stream_context = contextvars.copy_context()
+        context = self.get_context_data(object_list=[])
+        context['stream_rows'] = mark_safe(self.stream_marker)
+        page = render_to_string(
+            self.get_template_names(), context, request=self.request
+        )
+        return page.split(self.stream_marker, 1)
+
+    def render_rows(self, rows):
+        name = self.get_context_object_name(self.object_list)
+        template = get_template(self.rows_template_name)
+        return self.stream_context.run(template.render, {name: rows})
+
+    def stream_page(self, head, tail):
+        yield head
+        rows = self.object_list.iterator(chunk_size=self.stream_chunk_size)
+        while chunk := list(islice(rows, self.stream_chunk_size)):
+            yield self.render_rows(chunk)
+        yield tail
+
+
+class AsyncStreamingListMixin:
+    """``StreamingListMixin`` for async views.
+
+    Under ASGI the rows are read with ``queryset.aiterator()`` and the page
+    is streamed by an async generator. A WSGI server can only consume a
+    sync iterator, it gets the one of ``StreamingListMixin``.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        if not request.GET.get('stream'):
+            return await super().get(request, *args, **kwargs)
+        head, tail = await sync_to_async(self.render_frame)()
+        if isinstance(request, ASGIRequest):
+            content = self.astream_page(head, tail)
+        else:
+            content = self.stream_page(head, tail)
+        return StreamingHttpResponse(
+            content, content_type='text/html; charset=utf-8',
+        )
+
+    async def astream_page(self, head, tail):
+        yield head
+        chunk = []
+        rows = self.object_list.aiterator(chunk_size=self.stream_chunk_size)
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) == self.stream_chunk_size:
+                yield await sync_to_async(self.render_rows)(chunk)
+                chunk = []
+        if chunk:
+            yield await sync_to_async(self.render_rows)(chunk)
+        yield tail
+
+
+class PartialListMixin:
+    """Serve only the table rows of a list page to AJAX requests.
+
+    Live search and "load more" paging fetch the rows with the
+    ``X-Requested-With: XMLHttpRequest`` header and swap them into the page,
+    so the layout is not rendered again on every keystroke.
+    """
+
+    rows_template_name = None
+
+    def is_partial(self):
+        return self.request.headers.get('X-Requested-With') \
+            == 'XMLHttpRequest'
+
+    def get_template_names(self):
+        if self.is_partial():
+            return [self.rows_template_name]
+        return super().get_template_names()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.copy()
+        query.pop(self.page_kwarg, None)
+        context['page_query'] = query.urlencode()
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        patch_vary_headers(response, ('X-Requested-With',))
+        return response
+
+
+class ConditionalGetMixin:
+    """Answer ``304 Not Modified`` without rendering when nothing changed.
+
+    ``get_validators()`` returns a tuple of cheap values, such as ``updated``
+    fields, counts or aggregates, that change whenever the page does, or
+    ``None`` when the page can't be validated. The ETag hashes them with the
+    requested URL. With ``send_last_modified`` the latest datetime among them
+    is sent as ``Last-Modified``, which is only valid when the page can't
+    change without one of them moving forward.
+    """
+
+    send_last_modified = False
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def get_etag(self, validators):
+        key = repr((
+            settings.RELEASE,
+            get_partition(),
+            self.request.get_full_path(),
+            self.request.headers.get('X-Requested-With', ''),
+            validators,
+        ))
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def get_last_modified(self, validators):
+        if not self.send_last_modified:
+            return None
+        dates = [v for v in validators if isinstance(v, datetime)]
+        return timegm(max(dates).utctimetuple()) if dates else None
+
+    def check_validators(self, validators):
+        """Return the ETag, Last-Modified and ``304`` response if unchanged."""
+        etag = self.get_etag(validators)
+        last_modified = self.get_last_modified(validators)
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified
+        )
+        return etag, last_modified, response
+
+    def set_validator_headers(self, response, etag, last_modified):
+        if etag and not response.has_header('ETag'):
+            response.headers['ETag'] = etag
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified)
+
+    def get(self, request, *args, **kwargs):
+        # Pending messages are shown once, the page must be rendered.
+        if len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        validators = self.get_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+
+        etag, last_modified, response = \
+            self.check_validators(validators)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        self.set_validator_headers(response, etag, last_modified)
+        return response
+
+
+class AsyncConditionalGetMixin:
+    """``ConditionalGetMixin`` for async views.
+
+    ``aget_validators()`` runs ``get_validators()`` in a thread unless a
+    view reads its validators with the async ORM itself.
+    """
+
+    async def aget_validators(self):
+        return await sync_to_async(self.get_validators)()
+
+    async def get(self, request, *args, **kwargs):
+        # Loading the messages may read the session from the database.
+        pending = await sync_to_async(len)(messages.get_messages(request))
+        validators = None if pending else await self.aget_validators()
+        if validators is None:
+            return await super().get(request, *args, **kwargs)
+
+        etag, last_modified, response = \
+            self.check_validators(validators)
+        if response is None:
+            response = await super().get(request, *args, **kwargs)
+        self.set_validator_headers(response, etag, last_modified)
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """Validate a list page by the latest change and size of its queryset."""
+
+    def get_validators(self):
+        stats = self.get_queryset().aggregate(
+            updated=Max('updated'), count=Count('pk')
+        )
+        return stats['updated'], stats['count']
+
+
+class AsyncConditionalListMixin(AsyncConditionalGetMixin):
+    """Async ``ConditionalListMixin``."""
+
+    async def aget_validators(self):
+        stats = await self.get_queryset().aaggregate(
+            updated=Max('updated'), count=Count('pk')
+        )
+        return stats['updated'], stats['count']
+
+
+class AsyncListMixin:
+    """Serve a list page from an async view with the async ORM.
+
+    The count and the rows of the page are read with ``acount()`` and
+    ``async for`` before the context is built, so rendering the page runs
+    no query.
+    """
+
+    object_count = None
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        if self.get_paginate_by(self.object_list):
+            self.object_count = await self.object_list.acount()
+        context = self.get_context_data()
+        page = context['page_obj']
+        queryset = self.object_list if page is None else page.object_list
+        rows = [row async for row in queryset]
+        if page is not None:
+            page.object_list = rows
+        for key, value in context.items():
+            if value is queryset:
+                context[key] = rows
+        return self.render_to_response(context)
+
+    def get_paginator(self, queryset, *args, **kwargs):
+        paginator = super().get_paginator(queryset, *args, **kwargs)
+        if queryset is self.object_list and self.object_count is not None:
+            paginator.count = self.object_count
+        return paginator
+
+
+class AsyncDetailMixin:
+    """Serve a detail page from an async view with the async ORM."""
+
+    async def aget_object(self):
+        queryset = self.get_queryset()
+        try:
+            return await queryset.aget(pk=self.kwargs[self.pk_url_kwarg])
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                f'No {queryset.model._meta.verbose_name} found matching '
+                f'the query'
+            )
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import F
+
+
+class VersionConflict(Exception):
+    """The object was saved by someone else since it was loaded."""
+
+
+class VersionedModel(models.Model):
+    """Model whose ``version`` moves forward on every save.
+
+    Saving an existing object updates its row only while the row still has
+    the ``version`` of the object, and increments it in the same
+    ``UPDATE``. Otherwise nothing is written and ``VersionConflict`` is
+    raised, so a save from any place, the admin included, can't silently
+    overwrite a change it hasn't seen. Subclasses declare the ``version``
+    field.
+    """
+
+    class Meta:
+        abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        field = self._meta.get_field('version')
+        values = [value for value in values if value[0] is not field]
+        values.append((field, None, F('version') + 1))
+        updated = super()._do_update(
+            base_qs.filter(version=self.version), using, pk_val, values,
+            update_fields, forced_update,
+        )
+        if updated:
+            self.version += 1
+        elif base_qs.filter(pk=pk_val).exists():
+            raise VersionConflict(
+                f'{self._meta.label} {pk_val} changed since version '
+                f'{self.version}'
+            )
+        return updated
+
+
+class RequestProfile(models.Model):
+    """Profile of a single request, see componentor/profiling.py."""
+
+    MODES = (
+        ('sample', 'Sampling'),
+        ('trace', 'Deterministic'),
+    )
+
+    created = models.DateTimeField('Creation date', auto_now_add=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='User',
+    )
+    method = models.CharField('Method', max_length=10)
+    path = models.TextField('Path')
+    view = models.CharField('View', max_length=200, blank=True)
+    status = models.PositiveSmallIntegerField('Status')
+    mode = models.CharField('Mode', max_length=10, choices=MODES)
+    duration = models.FloatField('Duration, ms')
+    queries = models.PositiveIntegerField('Queries', default=0)
+    samples = models.PositiveIntegerField('Samples', default=0)
+    stacks = models.TextField('Collapsed stacks', blank=True)
+    stats = models.TextField('Call statistics', blank=True)
+    allocations = models.JSONField('Top allocations', default=list)
+    memory_peak = models.PositiveBigIntegerField('Peak memory, bytes')
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Request profile'
+        verbose_name_plural = 'Request profiles'
+
+    def __str__(self):
+        return f'{self.method} {self.path}'
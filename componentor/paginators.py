@@ -0,0 +1,52 @@
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def estimate_count(model, using='default'):
+    """Return the row count of ``model``'s table from planner statistics.
+
+    Returns ``None`` when the database has no statistics for the table,
+    they are gathered by ``ANALYZE``.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+    elif connection.vendor == 'sqlite':
+        # The first number of the stat column is the row count, the row of
+        # the table itself is only there when it has no index.
+        sql = ('SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 '
+               'WHERE tbl = %s ORDER BY idx IS NULL DESC LIMIT 1')
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that doesn't count the rows of a large unfiltered table.
+
+    When the queryset is not filtered and the statistics of the table show
+    more than ``threshold`` rows, the estimate is used as the count.
+    """
+
+    threshold = 100000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where:
+            return super().count
+        estimate = estimate_count(self.object_list.model,
+                                  self.object_list.db)
+        if estimate is None or estimate < self.threshold:
+            return super().count
+        return estimate
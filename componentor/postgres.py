@@ -0,0 +1,70 @@
+"""Migration operations that only apply to PostgreSQL.
+
+Indexes that only PostgreSQL can use, such as trigram indexes for
+``icontains`` searches or covering indexes, are created with raw SQL that
+other databases skip.
+"""
+
+from django.db import migrations
+
+
+class RunPostgresSQL(migrations.RunSQL):
+    """``RunSQL`` that runs on PostgreSQL only.
+
+    With ``extension`` the SQL is also skipped when the server doesn't
+    provide that extension, e.g. ``pg_trgm`` on a build without contrib
+    modules. The extension is created before running the SQL.
+    """
+
+    def __init__(self, *args, extension=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.extension = extension
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        if self.extension:
+            kwargs['extension'] = self.extension
+        return name, args, kwargs
+
+    def applies_to(self, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return False
+        if not self.extension:
+            return True
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT 1 FROM pg_available_extensions WHERE name = %s',
+                [self.extension],
+            )
+            return cursor.fetchone() is not None
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if self.applies_to(schema_editor):
+            if self.extension:
+                schema_editor.execute(
+                    f'CREATE EXTENSION IF NOT EXISTS {self.extension}'
+                )
+            super().database_forwards(app_label, schema_editor,
+                                      from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if self.applies_to(schema_editor):
+            super().database_backwards(app_label, schema_editor,
+                                       from_state, to_state)
+
+
+def trigram_index(table, column):
+    """Return a ``RunPostgresSQL`` for a trigram index for ``icontains``.
+
+    Django compares ``UPPER(column::text)`` for ``icontains``, the index is
+    built on the same expression.
+    """
+    name = f'{table}_{column}_trgm'
+    return RunPostgresSQL(
+        sql=f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)',
+        reverse_sql=f'DROP INDEX CONCURRENTLY IF EXISTS {name}',
+        extension='pg_trgm',
+    )
@@ -0,0 +1,233 @@
+"""Thumbnail previews for drawings attached to parts and assemblies.
+
+Previews are rendered outside of the request cycle by a pool of worker
+processes. Each preview is stored under the SHA-256 of the drawing content,
+so identical drawings are rendered only once. Until a preview is ready,
+pages show a placeholder image.
+
+Every web worker has a pool of its own, ``PREVIEW_WORKERS`` processes
+(one by default), the ``build_previews`` command renders an existing
+archive on all cores. The digests are kept in the ``default`` cache, which
+all processes share.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = 'images/preview_placeholder.svg'
+PREVIEWS_DIR = 'previews'
+PDF_SUFFIXES = ('.pdf',)
+CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(path):
+    """Return the SHA-256 hex digest of a file content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_image(source, destination, size):
+    """Render a raster image thumbnail with Pillow."""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.thumbnail(size)
+        if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            image = image.convert('RGBA')
+        image.save(destination, 'PNG', optimize=True)
+
+
+def render_pdf(source, destination, size):
+    """Render the first page of a PDF with poppler's ``pdftoppm``."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        prefix = os.path.join(tmp_dir, 'page')
+        subprocess.run(
+            [
+                'pdftoppm', '-png', '-singlefile', '-f', '1', '-l', '1',
+                '-scale-to', str(max(size)), source, prefix,
+            ],
+            check=True,
+            capture_output=True,
+        )
+        render_image(f'{prefix}.png', destination, size)
+
+
+def build_preview(source, previews_dir, size):
+    """Render a preview of ``source`` unless one exists for its content.
+
+    Runs inside a worker process, so it only depends on its arguments.
+    Returns the content hash the preview is stored under.
+    """
+    digest = content_hash(source)
+    destination = Path(previews_dir) / f'{digest}.png'
+    if destination.exists():
+        return digest
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        suffix='.png', dir=destination.parent
+    )
+    os.close(fd)
+    try:
+        if Path(source).suffix.lower() in PDF_SUFFIXES:
+            render_pdf(source, tmp_path, size)
+        else:
+            render_image(source, tmp_path, size)
+        os.replace(tmp_path, destination)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return digest
+
+
+class PreviewPipeline:
+    """Render drawing previews in a process pool and cache them by hash.
+
+    A drawing that failed to render is tried again after ``retry_after``
+    seconds, at most ``max_failed`` failures are remembered.
+    """
+
+    retry_after = 10 * 60
+    max_failed = 1000
+
+    def __init__(self, max_workers=None, size=None):
+        self.max_workers = max_workers
+        self.size = size
+        self._executor = None
+        self._pending = {}
+        # Name of each drawing that failed, with the time it failed.
+        self._failed = {}
+        self._lock = threading.Lock()
+
+    @property
+    def previews_dir(self):
+        return Path(settings.MEDIA_ROOT) / PREVIEWS_DIR
+
+    def get_workers(self):
+        return self.max_workers or settings.PREVIEW_WORKERS
+
+    def get_size(self):
+        return tuple(self.size or settings.PREVIEW_SIZE)
+
+    def get_executor(self):
+        if self._executor is None:
+            # Workers only render files, a fresh interpreter is safer than
+            # forking a process that holds threads and database connections.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.get_workers(),
+                mp_context=multiprocessing.get_context('forkserver'),
+            )
+        return self._executor
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    @staticmethod
+    def cache_key(name):
+        return f'previews:{hashlib.md5(name.encode()).hexdigest()}'
+
+    def preview_name(self, digest):
+        return f'{PREVIEWS_DIR}/{digest}.png'
+
+    def get_url(self, name):
+        """Return the preview URL of a stored drawing, or ``None``.
+
+        A missing preview is scheduled for rendering, the request never
+        waits for it.
+        """
+        digest = cache.get(self.cache_key(name))
+        if digest and (self.previews_dir / f'{digest}.png').exists():
+            return settings.MEDIA_URL + self.preview_name(digest)
+        self.submit(name, default_storage.path(name))
+        return None
+
+    def submit(self, name, path):
+        """Schedule a preview for the stored file ``name``."""
+        with self._lock:
+            if name in self._pending or self._failed_recently(name):
+                return self._pending.get(name)
+            future = self.get_executor().submit(
+                build_preview, path, self.previews_dir, self.get_size()
+            )
+            self._pending[name] = future
+        future.add_done_callback(
+            lambda done: self._on_done(name, done)
+        )
+        return future
+
+    def _failed_recently(self, name):
+        failed = self._failed.get(name)
+        if failed is None:
+            return False
+        if time.monotonic() - failed < self.retry_after:
+            return True
+        del self._failed[name]
+        return False
+
+    def _on_done(self, name, future):
+        with self._lock:
+            self._pending.pop(name, None)
+            if future.exception() is not None:
+                self._failed[name] = time.monotonic()
+                if len(self._failed) > self.max_failed:
+                    del self._failed[next(iter(self._failed))]
+                logger.warning(
+                    'Preview of %s failed: %s', name, future.exception()
+                )
+                return
+        cache.set(self.cache_key(name), future.result(), None)
+
+    def backfill(self, items, chunksize=16):
+        """Render previews for ``(name, path)`` pairs across all workers.
+
+        Yields ``(name, digest)`` pairs, ``digest`` is ``None`` when the
+        drawing could not be rendered.
+        """
+        executor = self.get_executor()
+        previews_dir, size = self.previews_dir, self.get_size()
+        batch_size = chunksize * self.get_workers()
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield from self._render_batch(executor, batch,
+                                              previews_dir, size)
+                batch = []
+        yield from self._render_batch(executor, batch, previews_dir, size)
+
+    def _render_batch(self, executor, batch, previews_dir, size):
+        futures = [
+            (name, executor.submit(build_preview, path, previews_dir, size))
+            for name, path in batch
+        ]
+        for name, future in futures:
+            try:
+                digest = future.result()
+            except Exception as error:
+                logger.warning('Preview of %s failed: %s', name, error)
+                digest = None
+            else:
+                cache.set(self.cache_key(name), digest, None)
+            yield name, digest
+
+
+pipeline = PreviewPipeline()
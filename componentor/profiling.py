@@ -0,0 +1,255 @@
+"""Profiles of single requests, taken on demand by staff.
+
+A request of a staff user with ``?profile=1`` or an ``X-Profile: 1`` header
+runs under a sampling profiler, which records the stack every millisecond,
+and ``tracemalloc``. ``profile=trace`` runs it under ``cProfile`` instead,
+which records every call but only in the thread of the request. The result
+is saved as a ``RequestProfile``: the stacks in the collapsed format of
+flamegraph.pl, also exported for speedscope, and the lines that allocated
+the most memory still held at the end. The admin lists the profiles and
+their hottest functions, the response names the profile in ``X-Profile-Id``.
+
+One request is profiled at a time per process, the memory tracer makes it
+several times slower. Other requests only check for the flag. The body of a
+streamed response is not profiled.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+MODES = {'1': 'sample', 'sample': 'sample', 'trace': 'trace'}
+INTERVAL = 0.001
+TOP_ALLOCATIONS = 20
+TOP_FUNCTIONS = 40
+
+# Threads waiting in these modules have nothing to do with the request.
+IDLE_MODULES = {'threading.py', 'selectors.py', 'queue.py'}
+
+_lock = threading.Lock()
+
+
+def get_mode(request):
+    """Return the profiling mode asked for by ``request``, if any."""
+    flag = request.GET.get('profile') or request.headers.get('X-Profile')
+    return MODES.get(flag)
+
+
+@lru_cache(maxsize=1024)
+def short_path(filename):
+    """Return ``filename`` relative to the project or the site-packages."""
+    path = Path(filename)
+    roots = {settings.BASE_DIR, *map(Path, filter(None, sys.path))}
+    # The deepest root first, site-packages may lie inside the project.
+    for root in sorted(roots, key=lambda root: -len(root.parts)):
+        if path.is_relative_to(root) and root != Path('/'):
+            return path.relative_to(root).as_posix()
+    return filename
+
+
+@lru_cache(maxsize=16384)
+def frame_label(code):
+    return f'{code.co_qualname} ({short_path(code.co_filename)}:' \
+           f'{code.co_firstlineno})'
+
+
+def collapse(frame):
+    """Return the stack of ``frame`` as ``outer;...;inner``."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class Sampler:
+    """Count the stacks of threads every ``interval`` seconds.
+
+    Samples the threads in ``thread_ids``, or all busy threads but its own.
+    """
+
+    def __init__(self, thread_ids=None, interval=INTERVAL):
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self.run, name='profiler', daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def is_sampled(self, ident, frame):
+        if self.thread_ids is not None:
+            return ident in self.thread_ids
+        return ident != threading.get_ident() \
+            and Path(frame.f_code.co_filename).name not in IDLE_MODULES
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if self.is_sampled(ident, frame):
+                    self.stacks[collapse(frame)] += 1
+            self.samples += 1
+
+
+def top_allocations(snapshot, limit=TOP_ALLOCATIONS):
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+    return [
+        {
+            'file': short_path(stat.traceback[0].filename),
+            'line': stat.traceback[0].lineno,
+            'size': stat.size,
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+
+def format_stats(profiler, limit=TOP_FUNCTIONS):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative')\
+        .print_stats(limit)
+    return out.getvalue()
+
+
+class Result:
+    """What a profiled block left, see ``profile()``."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.duration = 0.0
+        self.samples = 0
+        self.stacks = ''
+        self.stats = ''
+        self.allocations = []
+        self.memory_peak = 0
+
+
+@contextmanager
+def tracing_memory(result):
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        result.memory_peak = tracemalloc.get_traced_memory()[1]
+        result.allocations = top_allocations(tracemalloc.take_snapshot())
+        if not tracing:
+            tracemalloc.stop()
+
+
+@contextmanager
+def sampling(result, thread_ids):
+    sampler = Sampler(thread_ids)
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        result.samples = sampler.samples
+        result.stacks = '\n'.join(
+            f'{stack} {count}' for stack, count in sampler.stacks.items()
+        )
+
+
+@contextmanager
+def tracing_calls(result):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        result.stats = format_stats(profiler)
+
+
+@contextmanager
+def profile(mode, thread_ids=None):
+    """Profile the block in ``mode``, yield a ``Result`` filled after it.
+
+    Yields ``None`` without profiling while another block is profiled.
+    """
+    if not _lock.acquire(blocking=False):
+        yield None
+        return
+    result = Result(mode)
+    profiler = sampling(result, thread_ids) if mode == 'sample' \
+        else tracing_calls(result)
+    started = time.perf_counter()
+    try:
+        with tracing_memory(result), profiler:
+            yield result
+    finally:
+        result.duration = time.perf_counter() - started
+        _lock.release()
+
+
+def parse_stacks(stacks):
+    """Return the ``(frames, count)`` of the lines of collapsed stacks."""
+    for line in stacks.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if stack:
+            yield stack.split(';'), int(count)
+
+
+def hot_functions(stacks, limit=20):
+    """Return ``(function, self, total)`` of the most running functions.
+
+    ``self`` counts the samples the function was running in, ``total``
+    those it was on the stack in.
+    """
+    own, total = Counter(), Counter()
+    for frames, count in parse_stacks(stacks):
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return [(frame, count, total[frame])
+            for frame, count in own.most_common(limit)]
+
+
+def to_speedscope(name, stacks, interval=INTERVAL):
+    """Return the collapsed ``stacks`` as a speedscope file."""
+    frames = {}
+    samples, weights = [], []
+    for labels, count in parse_stacks(stacks):
+        samples.append([frames.setdefault(label, len(frames))
+                        for label in labels])
+        weights.append(count * interval)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'componentor',
+        'shared': {'frames': [{'name': label} for label in frames]},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
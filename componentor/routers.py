@@ -0,0 +1,133 @@
+"""Database routing: project partitions and read replicas.
+
+With ``DATABASE_PARTITIONS``, the materials, parts and assemblies of each
+project live in a database of their own. ``PartitionMiddleware`` picks the
+project of a request, ``use_partition()`` the one of a job. Everything
+else, and the data outside of projects, stays in the ``default`` database.
+
+Outside of partitions, writes always go to the ``default`` database, the
+primary. Reads go to one of the ``REPLICA_DATABASES`` picked at random,
+except when they have to see the latest writes:
+
+* inside a transaction on the primary, e.g. in a write job;
+* for objects loaded from the primary, whose relations follow them;
+* while pinned with ``use_primary()``. ``ReplicaRoutingMiddleware`` pins
+  requests that write, and the requests of a user for
+  ``REPLICA_PIN_SECONDS`` after they wrote, so they read their own writes
+  while the replicas catch up.
+
+Without replicas everything stays on the primary.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PARTITIONED_APPS = ('materials', 'parts', 'assemblies')
+
+_partition = ContextVar('partition', default=None)
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+def partition_alias(name):
+    return f'partition_{name}'
+
+
+def get_partition():
+    """Return the name of the current partition, ``None`` outside of one."""
+    return _partition.get()
+
+
+def get_partition_database():
+    name = _partition.get()
+    return partition_alias(name) if name else None
+
+
+@contextmanager
+def use_partition(name):
+    """Route the partitioned apps to partition ``name`` in the block."""
+    token = _partition.set(name or None)
+    try:
+        yield
+    finally:
+        _partition.reset(token)
+
+
+def make_key(key, key_prefix, version):
+    """Cache key function keeping the entries of partitions apart."""
+    partition = _partition.get()
+    if partition:
+        key_prefix = f'{key_prefix}:{partition_alias(partition)}'
+    return f'{key_prefix}:{version}:{key}'
+
+
+@contextmanager
+def use_primary(pinned=True):
+    """Send the reads of the block to the primary if ``pinned``."""
+    token = _pinned.set(pinned or _pinned.get())
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def is_pinned():
+    return _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class PartitionRouter:
+    """Route the partitioned apps to the database of the current project."""
+
+    def is_partition(self, db):
+        return db in map(partition_alias, settings.DATABASE_PARTITIONS)
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in PARTITIONED_APPS:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return get_partition_database()
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {obj1._state.db, obj2._state.db}
+        if any(map(self.is_partition, databases)):
+            return len(databases) == 1
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if self.is_partition(db):
+            return app_label in PARTITIONED_APPS
+        return None
+
+
+class ReplicaRouter:
+    """Route reads to the read replicas and writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if not settings.REPLICA_DATABASES or is_pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.REPLICA_DATABASES)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, they get its schema with it.
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
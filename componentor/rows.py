@@ -0,0 +1,62 @@
+"""Compact row objects for list pages.
+
+A list page prints a handful of columns of every object. ``project()``
+narrows a queryset to those columns and yields a named tuple per row
+instead of a model instance, which skips model initialisation and needs a
+fraction of the memory.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from django.db.models.query import ValuesListIterable
+
+
+class RowIterable(ValuesListIterable):
+    """Yield rows of the queryset as instances of ``row_class``."""
+
+    row_class = None
+
+    def __iter__(self):
+        new, row_class = tuple.__new__, self.row_class
+        for values in super().__iter__():
+            yield new(row_class, values)
+
+
+@lru_cache(maxsize=None)
+def row_class(model, fields):
+    """Return the named tuple class of ``fields`` rows of ``model``.
+
+    Rows compare equal to model instances with the same primary key, so
+    they can stand in for them.
+    """
+    pk_index = fields.index(model._meta.pk.attname)
+
+    class Row(namedtuple(f'{model.__name__}Row', fields)):
+        __slots__ = ()
+
+        @property
+        def pk(self):
+            return self[pk_index]
+
+        def __eq__(self, other):
+            if isinstance(other, (Row, model)):
+                return self.pk == other.pk
+            return NotImplemented
+
+        def __hash__(self):
+            return hash(self.pk)
+
+    Row.iterable_class = type(
+        f'{model.__name__}RowIterable', (RowIterable,), {'row_class': Row}
+    )
+    return Row
+
+
+def project(queryset, fields):
+    """Narrow ``queryset`` to ``fields`` and yield them as row objects."""
+    fields = tuple(fields)
+    queryset = queryset.values_list(*fields)
+    queryset._iterable_class = row_class(queryset.model, fields)\
+        .iterable_class
+    return queryset
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -14,6 +15,11 @@ SECRET_KEY = os.getenv('SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv('DEBUG', False)
 
+TESTING = sys.argv[1:2] == ['test']
+
+# Release identifier, part of the ETags so a deployment invalidates them.
+RELEASE = os.getenv('RELEASE', '')
+
 ALLOWED_HOSTS = [
     '0.0.0.0',
     '127.0.0.1',
@@ -31,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
 
+    'componentor',
     'materials',
     'parts',
     'assemblies',
@@ -38,10 +45,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'componentor.middleware.StaticFilesMiddleware',
+    'componentor.middleware.MetricsMiddleware',
+    'componentor.middleware.QueryBudgetMiddleware',
+    'componentor.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'componentor.middleware.PartitionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'componentor.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -59,6 +72,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'componentor.context_processors.partitions',
             ],
         },
     },
@@ -66,6 +80,18 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'componentor.wsgi.application'
 
+# The list and detail pages are served by sync views on a WSGI server.
+# ASYNC_VIEWS=1 serves async views instead, meant for an ASGI server
+# (componentor.asgi). With Django 4.2 they are slower, as the async ORM runs
+# each query in a thread, and only pay off with slow clients or long
+# streams. Each of those threads opens a connection of its own, so with
+# ASYNC_VIEWS connections are closed after each request instead of being
+# kept for CONN_MAX_AGE seconds.
+
+ASYNC_VIEWS = (os.getenv('ASYNC_VIEWS') or '0') != '0'
+
+CONN_MAX_AGE = 0 if ASYNC_VIEWS else int(os.getenv('CONN_MAX_AGE') or 600)
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -74,9 +100,85 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Seconds a connection waits for the write lock before failing.
+        'OPTIONS': {'timeout': 20},
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# DATABASE_ENGINE=postgresql switches to PostgreSQL. Connections are kept
+# open by each worker, set POSTGRES_POOLER when they go through PgBouncer in
+# transaction mode, which can't keep server-side cursors.
+
+if os.getenv('DATABASE_ENGINE') == 'postgresql':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB') or 'componentor',
+        'USER': os.getenv('POSTGRES_USER') or 'componentor',
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('POSTGRES_HOST') or 'localhost',
+        'PORT': os.getenv('POSTGRES_PORT') or '5432',
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': bool(os.getenv('POSTGRES_POOLER')),
+    }
+
+# Read replicas, comma separated: SQLite files kept up to date with
+# `python manage.py sync_replicas`, or hosts of PostgreSQL standbys.
+# See componentor/routers.py.
+
+REPLICA_DATABASES = []
+
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS') or 10)
+
+for index, location in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICAS', '').split(','))
+):
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if replica['ENGINE'] == 'django.db.backends.sqlite3':
+        replica['NAME'] = BASE_DIR / location.strip()
+    else:
+        replica['HOST'] = location.strip()
+    DATABASES[f'replica_{index}'] = replica
+    REPLICA_DATABASES.append(f'replica_{index}')
+
+# Project partitions, comma separated names. The materials, parts and
+# assemblies of each project live in a database of their own: a file in
+# partitions/ on SQLite, <POSTGRES_DB>_<name> on PostgreSQL. See
+# componentor/routers.py.
+
+DATABASE_PARTITIONS = [
+    name.strip()
+    for name in os.getenv('DATABASE_PARTITIONS', '').split(',')
+    if name.strip()
+]
+
+for name in DATABASE_PARTITIONS:
+    partition = dict(DATABASES['default'])
+    if partition['ENGINE'] == 'django.db.backends.sqlite3':
+        partition['NAME'] = BASE_DIR / 'partitions' / f'{name}.sqlite3'
+    else:
+        partition['NAME'] = f"{partition['NAME']}_{name}"
+    DATABASES[f'partition_{name}'] = partition
+
+DATABASE_ROUTERS = [
+    'componentor.routers.PartitionRouter',
+    'componentor.routers.ReplicaRouter',
+]
+
+# Applied to every SQLite connection, see componentor/sqlite.py.
+# `python manage.py sqlite_maintenance` runs daily in the maintenance
+# service of docker-compose.yml.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -115,7 +217,142 @@ USE_TZ = False
 STATIC_URL = 'static/'
 STATIC_DIR = os.path.join(BASE_DIR, 'static')
 STATICFILES_DIRS = [STATIC_DIR]
-# STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Outside of development collectstatic fingerprints every file, writes its
+# gzip/brotli versions and WebP variants of the images. WhiteNoise serves
+# them with far-future caching.
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+            if DEBUG or TESTING
+            else 'componentor.storage.StaticFilesStorage'
+        ),
+    },
+}
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Materials and parts are cached in the default cache, see
+# componentor/caching.py. It is kept on disk so all workers see the same
+# objects; CACHE=locmem keeps it in the memory of each process, which only
+# suits a single process.
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'default',
+    },
+}
+
+# Rendered table rows and assembly compositions are kept in the fragments
+# cache, on disk as well so all workers share them and their versions, see
+# componentor/fragments.py. FRAGMENT_CACHE=locmem suits a single process.
+
+FRAGMENT_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'componentor.fragments.CountedLocMemCache',
+        'LOCATION': 'fragments',
+    },
+    'file': {
+        'BACKEND': 'componentor.fragments.CountedFileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'fragments',
+    },
+}
+
+# Lookups of fragments are counted in the metrics, see /metrics.
+# Keys include the current project partition, see componentor/routers.py.
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[os.getenv('CACHE') or (
+            'locmem' if TESTING else 'file'
+        )],
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+        'KEY_FUNCTION': 'componentor.routers.make_key',
+    },
+    'fragments': {
+        **FRAGMENT_CACHE_BACKENDS[os.getenv('FRAGMENT_CACHE') or (
+            'locmem' if TESTING else 'file'
+        )],
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+        'KEY_FUNCTION': 'componentor.routers.make_key',
+    },
+}
+
+# Writes from the forms go through a single writer thread that commits many
+# of them at once, see componentor/writequeue.py. gunicorn then runs a single
+# worker process, see gunicorn.conf.py.
+
+WRITE_QUEUE = bool(os.getenv('WRITE_QUEUE'))
+WRITE_QUEUE_MAX_BATCH = 64
+WRITE_QUEUE_MAX_DELAY = 0.005
+
+# Uploaded files (drawings of parts and assemblies)
+
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Drawing previews are rendered by a pool of PREVIEW_WORKERS processes in
+# each web worker, see componentor/previews.py.
+
+PREVIEW_WORKERS = int(os.getenv('PREVIEW_WORKERS') or 1)
+PREVIEW_SIZE = (320, 320)
+
+# Requests running more queries than their view's query_budget fail in
+# debug and in tests, and are logged otherwise, see componentor/budgets.py.
+
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE') or (
+    'raise' if DEBUG or TESTING else 'log'
+)
+
+# Queries slower than SLOW_QUERY_MS milliseconds are logged with their plan
+# to SLOW_QUERY_LOG, see componentor/slowqueries.py; 0 turns the log off.
+# manage.py index_advisor proposes indexes from it.
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS') or (0 if TESTING else 200))
+SLOW_QUERY_LOG = Path(
+    os.getenv('SLOW_QUERY_LOG') or BASE_DIR / 'logs' / 'slow_queries.log'
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'componentor.slowqueries.SlowQueryFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'componentor.slowqueries': {
+            'handlers': ['slow_queries'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Prometheus scrapes /metrics, with METRICS_TOKEN as a bearer token if set.
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
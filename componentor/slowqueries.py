@@ -0,0 +1,129 @@
+"""Log of slow queries with their query plan.
+
+Every query that takes longer than ``SLOW_QUERY_MS`` is written to
+``SLOW_QUERY_LOG`` as a line of JSON with its SQL, parameters, duration,
+the URL name and path of the request that ran it, and the plan of the
+database, from ``EXPLAIN QUERY PLAN`` on SQLite and ``EXPLAIN`` on
+PostgreSQL. The log rotates at 10 MB and keeps 5 old files.
+
+``manage.py index_advisor`` reads the log and proposes indexes.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from componentor import metrics
+from django.conf import settings
+from django.db import NotSupportedError
+
+logger = logging.getLogger(__name__)
+
+# Parameters kept per query, bulk inserts can have thousands.
+MAX_PARAMS = 100
+
+
+class SlowQueryFileHandler(RotatingFileHandler):
+    """Rotating file handler creating the directory of the log if needed."""
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+def fetch_plan(cursor, statement, params, savepoint):
+    if not savepoint:
+        cursor.execute(statement, params)
+        return [str(row[-1]) for row in cursor.fetchall()]
+    # A failed EXPLAIN must not break the transaction of the request.
+    cursor.execute('SAVEPOINT slow_query_explain')
+    try:
+        return fetch_plan(cursor, statement, params, savepoint=False)
+    except Exception:
+        cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+        raise
+    finally:
+        cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+
+
+def explain(connection, sql, params):
+    """Return the lines of the plan of ``sql``, ``None`` if unavailable.
+
+    Runs on a raw cursor of its own: the cursor of the query still holds
+    its rows, and these statements stay out of the query counts.
+    """
+    try:
+        prefix = connection.ops.explain_query_prefix()
+    except NotSupportedError:
+        return None
+    cursor = connection.create_cursor()
+    try:
+        return fetch_plan(cursor, f'{prefix} {sql}', params,
+                          savepoint=connection.in_atomic_block)
+    except Exception:
+        # The plan is only a hint, the query itself went through.
+        logger.debug('No plan for %s', sql, exc_info=True)
+        return None
+    finally:
+        cursor.close()
+
+
+def log_query(connection, sql, params, duration):
+    stats = metrics.current_stats()
+    request = stats.request if stats else None
+    plan = None
+    if sql.lstrip()[:6].upper() == 'SELECT':
+        plan = explain(connection, sql, params)
+    logger.info(json.dumps({
+        'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'duration_ms': round(duration * 1000, 1),
+        'database': connection.alias,
+        'vendor': connection.vendor,
+        'view': metrics.view_name(request) if request else None,
+        'path': request.path if request else None,
+        'sql': sql,
+        'params': list(params or ())[:MAX_PARAMS],
+        'plan': plan,
+    }, default=str))
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """Execute wrapper logging the query if it is slow."""
+    threshold = settings.SLOW_QUERY_MS
+    if not threshold:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - started
+    if duration * 1000 >= threshold and not many:
+        log_query(context['connection'], sql, params, duration)
+    return result
+
+
+def install_slow_query_log(sender, connection, **kwargs):
+    """Watch the queries of each new database connection."""
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
+
+
+def read_log(path):
+    """Yield the entries of the log at ``path``, oldest file first."""
+    path = Path(path)
+    files = sorted(
+        (file for file in path.parent.glob(f'{path.name}.*')
+         if file.suffix[1:].isdigit()),
+        key=lambda file: -int(file.suffix[1:]),
+    )
+    for file in [*files, path]:
+        if not file.exists():
+            continue
+        with file.open() as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a full disk or a crash.
+                    continue
@@ -0,0 +1,22 @@
+"""SQLite connection profile.
+
+Every new SQLite connection gets the ``SQLITE_PRAGMAS`` from the settings:
+WAL journaling lets readers run next to a writer, ``synchronous=NORMAL`` is
+durable with WAL while syncing only at checkpoints, and a larger page cache,
+memory-mapped I/O and in-memory temporary tables save system calls.
+"""
+
+from django.conf import settings
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Apply ``SQLITE_PRAGMAS`` to each new connection."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,59 @@
+import fnmatch
+import io
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+def variant_name(name, width):
+    """Return the static name of the WebP variant of an image."""
+    path = PurePosixPath(name)
+    return str(path.with_name(f'{path.stem}-{width}w.webp'))
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Fingerprinted static files with WebP variants of the images.
+
+    ``collectstatic`` renders every image matching ``responsive_images`` to
+    WebP at each of ``responsive_widths`` that is narrower than the original,
+    then hashes all files and writes their gzip and brotli versions.
+    """
+
+    responsive_images = ('images/home_*.jpg',)
+    responsive_widths = (480, 960, 1440, 1920)
+    webp_quality = 80
+
+    def post_process(self, paths, *args, **kwargs):
+        if not kwargs.get('dry_run'):
+            paths = {**paths, **self.build_responsive_images(paths)}
+        yield from super().post_process(paths, *args, **kwargs)
+
+    def build_responsive_images(self, paths):
+        variants = {}
+        for name, (storage, path) in paths.items():
+            if not any(fnmatch.fnmatch(name, pattern)
+                       for pattern in self.responsive_images):
+                continue
+            with storage.open(path) as source:
+                for width, content in self.render_variants(source):
+                    variant = variant_name(name, width)
+                    self.delete(variant)
+                    self._save(variant, ContentFile(content))
+                    variants[variant] = (self, variant)
+        return variants
+
+    def render_variants(self, source):
+        from PIL import Image
+
+        with Image.open(source) as image:
+            image = image.convert('RGB')
+            for width in self.responsive_widths:
+                if width > image.width:
+                    break
+                height = round(image.height * width / image.width)
+                buffer = io.BytesIO()
+                image.resize((width, height), Image.LANCZOS).save(
+                    buffer, 'WEBP', quality=self.webp_quality, method=6
+                )
+                yield width, buffer.getvalue()
@@ -0,0 +1,10 @@
+from componentor import fragments
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def fragment_version(name, key):
+    """Return the version a cached fragment has to vary on."""
+    return fragments.get_version(name, key)
@@ -0,0 +1,16 @@
+from django import template
+from django.urls import reverse
+
+register = template.Library()
+
+
+@register.filter
+def preview_url(drawing):
+    """Return the URL that redirects to the preview of a drawing.
+
+    The page links a stable URL, so it does not change when the preview
+    becomes ready and stays valid for conditional requests. ``drawing`` is
+    a stored file or just its name, as on projected list rows.
+    """
+    name = getattr(drawing, 'name', drawing)
+    return reverse('preview', args=[name])
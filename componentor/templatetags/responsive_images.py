@@ -0,0 +1,47 @@
+from componentor.storage import variant_name
+from django import template
+from django.contrib.staticfiles.storage import (
+    ManifestFilesMixin, staticfiles_storage,
+)
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+def get_srcset(name):
+    """Return ``(url, width)`` pairs of the collected WebP variants."""
+    if not isinstance(staticfiles_storage, ManifestFilesMixin):
+        return []
+    srcset = []
+    for width in getattr(staticfiles_storage, 'responsive_widths', ()):
+        try:
+            srcset.append((static(variant_name(name, width)), width))
+        except ValueError:
+            break
+    return srcset
+
+
+@register.simple_tag
+def responsive_image(name, alt='', sizes='100vw', **attrs):
+    """Render a static image with its WebP variants as a ``<picture>``.
+
+    Variants exist only after ``collectstatic``, until then the tag renders
+    the original image alone.
+    """
+    img = format_html(
+        '<img src="{}" alt="{}"{}>',
+        static(name),
+        alt,
+        format_html_join('', ' {}="{}"', attrs.items()),
+    )
+    srcset = get_srcset(name)
+    if not srcset:
+        return img
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}'
+        '</picture>',
+        ', '.join(f'{url} {width}w' for url, width in srcset),
+        sizes,
+        img,
+    )
@@ -0,0 +1,56 @@
+"""Test helpers checking query budgets, see componentor/budgets.py.
+
+Both list the queries run when they fail.
+"""
+
+from contextlib import ContextDecorator
+from urllib.parse import urlsplit
+
+from componentor.budgets import view_budget
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+
+class max_queries(ContextDecorator):
+    """Fail if the block runs more than ``budget`` queries in all databases.
+
+    Works as a context manager and as a decorator of test methods.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+
+    def __enter__(self):
+        self.contexts = [CaptureQueriesContext(connections[alias])
+                         for alias in connections]
+        for context in self.contexts:
+            context.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for context in self.contexts:
+            context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        queries = [query['sql'] for context in self.contexts
+                   for query in context.captured_queries]
+        if len(queries) > self.budget:
+            raise AssertionError(
+                f'{len(queries)} queries over a budget of {self.budget}:\n'
+                + '\n'.join(f'{n}. {sql}' for n, sql in enumerate(queries, 1))
+            )
+
+
+class QueryBudgetTestMixin:
+    """Assertions on the query budgets of views, for test cases."""
+
+    def assertWithinQueryBudget(self, path, **extra):
+        """GET ``path`` and fail if it runs more queries than its view may.
+
+        Returns the response.
+        """
+        budget = view_budget(resolve(urlsplit(path).path).func)
+        self.assertIsNotNone(budget, f'{path} declares no query budget.')
+        with max_queries(budget):
+            return self.client.get(path, **extra)
@@ -0,0 +1,1165 @@
+import io
+import json
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from http import HTTPStatus
+from pathlib import Path
+from unittest import mock, skipUnless
+
+import materials.factories
+from assemblies.forms import AssemblyCreateAndUpdateForm
+from assemblies.models import Assembly
+from componentor import (
+    metrics, paginators, previews, profiling, routers, rows, slowqueries,
+    storage, warmup, writequeue,
+)
+from componentor.budgets import QueryBudgetExceeded
+from componentor.caching import LocalCache
+from componentor.middleware import (
+    PIN_COOKIE, PartitionMiddleware, ReplicaRoutingMiddleware,
+    StaticFilesMiddleware,
+)
+from componentor.models import RequestProfile
+from componentor.testing import max_queries
+from componentor.views import ReadinessView
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection, connections
+from django.http import Http404, HttpRequest, HttpResponse
+from django.template import Context, Template
+from django.templatetags.static import static
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from materials.models import Material
+from parts import factories
+from parts.forms import PartCreateAndUpdateForm
+from parts.models import Part
+from parts.views import PartListView
+from PIL import Image
+from prometheus_client import REGISTRY
+
+
+def make_image(path, color='red', size=(640, 480)):
+    Image.new('RGB', size, color).save(path, 'PNG')
+    return path
+
+
+class ReadinessViewTest(TestCase):
+    """Test case for the readiness endpoint."""
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.addCleanup(setattr, ReadinessView, 'migrated', False)
+
+    def test_ready(self) -> None:
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.json()['ready'])
+        self.assertEqual(response.json()['checks']['migrations'], 'ok')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_not_ready_with_unapplied_migrations(self) -> None:
+        with mock.patch(
+            'django.db.migrations.executor.MigrationExecutor.migration_plan',
+            return_value=[('migration', False)],
+        ):
+            response = self.client.get(reverse('ready'))
+        self.assertEqual(
+            response.status_code, HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(
+            response.json()['checks']['migrations'],
+            'RuntimeError: 1 unapplied migrations',
+        )
+
+    def test_not_ready_without_database(self) -> None:
+        with mock.patch.object(
+            ReadinessView, 'check_database',
+            side_effect=OperationalError('unable to open database file'),
+        ):
+            response = self.client.get(reverse('ready'))
+        self.assertEqual(
+            response.status_code, HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        self.assertFalse(response.json()['ready'])
+        self.assertIn(
+            'unable to open', response.json()['checks']['database:default']
+        )
+
+
+class MetricsTest(TestCase):
+    """Test case for the request metrics and their endpoint."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        Material.cached.local.clear()
+        factories.PartFactory.create_batch(3)
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_recorded_by_url_name(self) -> None:
+        view = {'view': 'parts:part_list'}
+        requests = self.sample(
+            'componentor_requests_total', method='GET', status='200', **view
+        )
+        queries = self.sample('componentor_request_queries_sum', **view)
+        Client().get(reverse('parts:part_list'))
+        self.assertEqual(
+            self.sample('componentor_requests_total', method='GET',
+                        status='200', **view),
+            requests + 1,
+        )
+        self.assertGreater(
+            self.sample('componentor_request_queries_sum', **view), queries
+        )
+        self.assertGreater(
+            self.sample('componentor_response_size_bytes_sum', **view), 0
+        )
+        self.assertEqual(
+            self.sample('componentor_requests_in_flight'), 0
+        )
+
+    async def test_async_views_count_their_queries(self) -> None:
+        view = {'view': 'parts:part_autocomplete'}
+        queries = self.sample('componentor_request_queries_sum', **view)
+        await self.async_client.get(reverse('parts:part_autocomplete'))
+        self.assertGreater(
+            self.sample('componentor_request_queries_sum', **view), queries
+        )
+
+    def test_cache_lookups_are_counted(self) -> None:
+        material = Material.objects.first()
+        labels = {'cache': 'objects:materials.material'}
+        hits = self.sample(
+            'componentor_cache_lookups_total', result='hit', **labels
+        )
+        misses = self.sample(
+            'componentor_cache_lookups_total', result='miss', **labels
+        )
+        Material.cached.get(pk=material.pk)
+        Material.cached.get(pk=material.pk)
+        self.assertEqual(
+            self.sample('componentor_cache_lookups_total', result='hit',
+                        **labels),
+            hits + 1,
+        )
+        self.assertEqual(
+            self.sample('componentor_cache_lookups_total', result='miss',
+                        **labels),
+            misses + 1,
+        )
+
+    def test_fragment_lookups_are_counted(self) -> None:
+        hits = self.sample(
+            'componentor_cache_lookups_total', cache='fragments',
+            result='hit',
+        )
+        template = Template(
+            '{% load cache %}'
+            '{% cache 60 metrics_test using="fragments" %}x{% endcache %}'
+        )
+        template.render(Context())
+        template.render(Context())
+        self.assertEqual(
+            self.sample('componentor_cache_lookups_total', cache='fragments',
+                        result='hit'),
+            hits + 1,
+        )
+
+    def test_endpoint_exposes_metrics(self) -> None:
+        Client().get(reverse('parts:part_list'))
+        response = Client().get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            b'componentor_request_duration_seconds_bucket{'
+            b'le="0.005",view="parts:part_list"}',
+            response.content,
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_requires_token(self) -> None:
+        response = Client().get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        response = Client().get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_queries_outside_requests_are_not_counted(self) -> None:
+        with metrics.track_request(HttpRequest()) as stats:
+            Material.objects.count()
+        Material.objects.count()
+        self.assertEqual(stats.queries, 1)
+
+
+class QueryBudgetTest(TestCase):
+    """Test case for the query budgets of views."""
+
+    def setUp(self) -> None:
+        factories.PartFactory.create_batch(3)
+        self.url = reverse('parts:part_list')
+
+    def test_request_over_budget_fails(self) -> None:
+        with mock.patch.object(PartListView, 'query_budget', 1):
+            with self.assertRaisesMessage(
+                QueryBudgetExceeded, 'parts:part_list has a budget of 1'
+            ):
+                Client().get(self.url)
+
+    @override_settings(QUERY_BUDGET_MODE='log')
+    def test_request_over_budget_is_logged(self) -> None:
+        with mock.patch.object(PartListView, 'query_budget', 1), \
+                self.assertLogs('componentor.budgets', 'WARNING') as logs:
+            response = Client().get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(f'GET {self.url} ran', logs.output[0])
+
+    def test_views_without_budget_are_not_checked(self) -> None:
+        with mock.patch.object(PartListView, 'query_budget', None):
+            self.assertEqual(Client().get(self.url).status_code,
+                             HTTPStatus.OK)
+
+    def test_max_queries_lists_queries(self) -> None:
+        with self.assertRaisesMessage(AssertionError, '2 queries over a '
+                                      'budget of 1:\n1. SELECT'):
+            with max_queries(1):
+                list(Part.objects.all())
+                list(Material.objects.all())
+
+
+@override_settings(SLOW_QUERY_MS=0.001)
+class SlowQueryLogTest(TestCase):
+    """Test case for the slow query log and the index advisor."""
+
+    def setUp(self) -> None:
+        factories.PartFactory.create_batch(3)
+        self.log = Path(tempfile.mkdtemp()) / 'slow_queries.log'
+        self.addCleanup(shutil.rmtree, self.log.parent)
+
+    def capture(self, func):
+        """Run ``func`` and write the slow queries it ran to the log."""
+        with self.assertLogs('componentor.slowqueries', 'INFO') as logs:
+            func()
+        self.log.write_text(''.join(
+            f'{record.getMessage()}\n' for record in logs.records
+        ))
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_slow_queries_are_logged_with_view_and_plan(self) -> None:
+        entries = self.capture(lambda: Client().get(
+            reverse('parts:part_list'), {'search_query': 'x'}
+        ))
+        entry = next(entry for entry in entries
+                     if 'LIKE' in entry['sql'] and entry['plan'])
+        self.assertEqual(entry['view'], 'parts:part_list')
+        self.assertEqual(entry['path'], reverse('parts:part_list'))
+        self.assertIn('%x%', entry['params'])
+        self.assertIn('parts_part', ' '.join(entry['plan']))
+
+    @override_settings(SLOW_QUERY_MS=60 * 1000)
+    def test_fast_queries_are_not_logged(self) -> None:
+        with self.assertNoLogs('componentor.slowqueries'):
+            list(Part.objects.all())
+
+    def test_log_is_read_with_rotated_files(self) -> None:
+        self.capture(lambda: list(Part.objects.filter(name='x')))
+        self.log.rename(f'{self.log}.1')
+        self.capture(lambda: list(Material.objects.filter(density=1)))
+        self.log.with_suffix('.log.lock').write_text('not a log')
+        sqls = [entry['sql'] for entry in slowqueries.read_log(self.log)]
+        self.assertEqual(len(sqls), 2)
+        self.assertIn('parts_part', sqls[0])
+
+    def test_advisor_proposes_missing_index(self) -> None:
+        self.capture(lambda: list(
+            Part.objects.filter(name='x').order_by('created')
+        ))
+        out = io.StringIO()
+        call_command('index_advisor', log=self.log, stdout=out)
+        self.assertIn(
+            "Part.Meta.indexes: models.Index(fields=['name', 'created'], "
+            "name='part_name_created_idx')",
+            out.getvalue(),
+        )
+
+    def test_advisor_knows_existing_indexes(self) -> None:
+        self.capture(lambda: list(Part.objects.filter(material_id=0)))
+        out = io.StringIO()
+        call_command('index_advisor', log=self.log, stdout=out)
+        self.assertNotIn('models.Index', out.getvalue())
+
+    def test_advisor_without_log(self) -> None:
+        with self.assertRaisesMessage(CommandError, 'No slow queries'):
+            call_command('index_advisor', log=self.log)
+
+
+class ProfilerTest(TestCase):
+    """Test case for the profiles of requests."""
+
+    def setUp(self) -> None:
+        factories.PartFactory.create_batch(3)
+        self.url = reverse('parts:part_list')
+        self.staff = User.objects.create_user(
+            username='staff', is_staff=True, is_superuser=True
+        )
+        self.client.force_login(self.staff)
+
+    def test_sampled_request_is_saved(self) -> None:
+        response = self.client.get(self.url, {'profile': '1'})
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual(
+            (profile.mode, profile.view, profile.user, profile.status),
+            ('sample', 'parts:part_list', self.staff, HTTPStatus.OK),
+        )
+        self.assertGreater(profile.memory_peak, 0)
+        self.assertTrue(profile.allocations)
+        self.assertGreater(profile.queries, 0)
+
+    def test_traced_request_is_saved(self) -> None:
+        response = self.client.get(self.url, HTTP_X_PROFILE='trace')
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual(profile.mode, 'trace')
+        self.assertIn('django/core/handlers/base.py', profile.stats)
+
+    def test_requests_without_flag_are_not_profiled(self) -> None:
+        response = self.client.get(self.url)
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_requests_of_other_users_are_not_profiled(self) -> None:
+        response = Client().get(self.url, {'profile': '1'})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_one_request_is_profiled_at_a_time(self) -> None:
+        with profiling.profile('trace'):
+            response = self.client.get(self.url, {'profile': 'trace'})
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_sampler_finds_busy_function(self) -> None:
+        def busy():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+
+        with profiling.profile('sample', {threading.get_ident()}) as result:
+            busy()
+        self.assertGreater(result.samples, 0)
+        function, own, total = profiling.hot_functions(result.stacks)[0]
+        self.assertIn('busy', function)
+
+    def test_stacks_are_exported(self) -> None:
+        stacks = 'main (a.py:1);work (a.py:5) 3\nmain (a.py:1) 1'
+        self.assertEqual(profiling.hot_functions(stacks), [
+            ('work (a.py:5)', 3, 3), ('main (a.py:1)', 1, 4),
+        ])
+        speedscope = profiling.to_speedscope('GET /', stacks)
+        self.assertEqual(speedscope['shared']['frames'], [
+            {'name': 'main (a.py:1)'}, {'name': 'work (a.py:5)'},
+        ])
+        self.assertEqual(speedscope['profiles'][0]['samples'],
+                         [[0, 1], [0]])
+        self.assertEqual(speedscope['profiles'][0]['weights'],
+                         [0.003, 0.001])
+
+    def test_admin_shows_profile(self) -> None:
+        response = self.client.get(self.url, {'profile': '1'})
+        pk = response['X-Profile-Id']
+        response = self.client.get(
+            reverse('admin:componentor_requestprofile_change', args=[pk])
+        )
+        self.assertContains(response, 'Hot functions')
+        for export, content_type in (('collapsed.txt', 'text/plain'),
+                                     ('speedscope.json', 'application/json')):
+            response = self.client.get(reverse(
+                'admin:componentor_requestprofile_export', args=[pk, export]
+            ))
+            self.assertEqual(response['Content-Type'], content_type)
+            self.assertIn('attachment', response['Content-Disposition'])
+
+
+class StaticFilesMiddlewareTest(SimpleTestCase):
+    """Test case for serving static files to ASGI requests."""
+
+    def setUp(self) -> None:
+        self.factory = RequestFactory()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        Path(root, 'app.js').write_text('let a = 1;')
+        with override_settings(STATIC_ROOT=root):
+            self.middleware = StaticFilesMiddleware(self.get_response)
+
+    async def get_response(self, request):
+        return HttpResponse('page')
+
+    async def test_serves_static_file_whole(self) -> None:
+        response = await self.middleware(self.factory.get('/static/app.js'))
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content, b'let a = 1;')
+        self.assertEqual(response['Content-Length'], '10')
+
+    async def test_passes_other_requests_on(self) -> None:
+        response = await self.middleware(self.factory.get('/parts/'))
+        self.assertEqual(response.content, b'page')
+
+
+class PreviewPipelineTest(TestCase):
+    """Test case for the drawing preview pipeline."""
+
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.pipeline = previews.PreviewPipeline(max_workers=1)
+        self.addCleanup(self.pipeline.shutdown)
+        cache.clear()
+
+    def test_build_preview_renders_thumbnail(self) -> None:
+        source = make_image(Path(self.media_root) / 'drawing.png')
+        digest = previews.build_preview(
+            source, self.pipeline.previews_dir, (64, 64)
+        )
+        self.assertEqual(digest, previews.content_hash(source))
+        with Image.open(self.pipeline.previews_dir / f'{digest}.png') as im:
+            self.assertLessEqual(max(im.size), 64)
+
+    def test_identical_drawings_are_rendered_once(self) -> None:
+        first = make_image(Path(self.media_root) / 'first.png')
+        second = make_image(Path(self.media_root) / 'second.png')
+        results = dict(self.pipeline.backfill(
+            [('first.png', first), ('second.png', second)]
+        ))
+        self.assertEqual(results['first.png'], results['second.png'])
+        self.assertEqual(len(list(self.pipeline.previews_dir.iterdir())), 1)
+
+    def test_broken_drawing_is_reported(self) -> None:
+        source = Path(self.media_root) / 'broken.png'
+        source.write_bytes(b'not an image')
+        with self.assertLogs('componentor.previews', 'WARNING'):
+            results = dict(self.pipeline.backfill([('broken.png', source)]))
+        self.assertIsNone(results['broken.png'])
+
+    def test_placeholder_until_preview_is_ready(self) -> None:
+        part = factories.PartFactory(drawing=SimpleUploadedFile(
+            'drawing.png', b'', content_type='image/png'
+        ))
+        make_image(part.drawing.path)
+        url = reverse('preview', args=[part.drawing.name])
+
+        with mock.patch('componentor.views.pipeline', self.pipeline):
+            response = self.client.get(url)
+            self.assertRedirects(
+                response, static(previews.PLACEHOLDER),
+                fetch_redirect_response=False,
+            )
+            self.assertIn('no-cache', response['Cache-Control'])
+
+            self.pipeline.submit(part.drawing.name, part.drawing.path)\
+                .result()
+            self.pipeline.shutdown()
+            digest = previews.content_hash(part.drawing.path)
+
+            response = self.client.get(url)
+            self.assertRedirects(
+                response, f'/media/previews/{digest}.png',
+                fetch_redirect_response=False,
+            )
+            self.assertIn('max-age', response['Cache-Control'])
+
+    def test_failed_drawing_is_retried_later(self) -> None:
+        source = Path(self.media_root) / 'broken.png'
+        source.write_bytes(b'not an image')
+        with self.assertLogs('componentor.previews', 'WARNING'):
+            self.pipeline.submit('broken.png', source)
+            self.pipeline.shutdown()
+        self.assertIsNone(self.pipeline.submit('broken.png', source))
+
+        self.pipeline.retry_after = 0
+        with self.assertLogs('componentor.previews', 'WARNING'):
+            self.assertIsNotNone(self.pipeline.submit('broken.png', source))
+            self.pipeline.shutdown()
+
+    def test_failures_remembered_are_capped(self) -> None:
+        self.pipeline.max_failed = 1
+        for name in ('first.png', 'second.png'):
+            source = Path(self.media_root) / name
+            source.write_bytes(b'not an image')
+            with self.assertLogs('componentor.previews', 'WARNING'):
+                self.pipeline.submit(name, source)
+                self.pipeline.shutdown()
+        self.assertEqual(list(self.pipeline._failed), ['second.png'])
+
+    @override_settings(DEBUG=False)
+    def test_media_is_served_without_debug(self) -> None:
+        part = factories.PartFactory(drawing=SimpleUploadedFile(
+            'drawing.png', b'drawing', content_type='image/png'
+        ))
+        response = self.client.get(part.drawing.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), b'drawing')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename="{Path(part.drawing.name).name}"',
+        )
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+        self.pipeline.previews_dir.mkdir()
+        (self.pipeline.previews_dir / 'digest.png').write_bytes(b'preview')
+        response = self.client.get('/media/previews/digest.png')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get('/media/previews/missing.png')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_preview_of_unknown_drawing_is_not_found(self) -> None:
+        for name in ('drawings/missing.png', 'previews/drawing.png'):
+            response = self.client.get(reverse('preview', args=[name]))
+            self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class DrawingFieldTest(TestCase):
+    """Test case for the validation of uploaded drawings."""
+
+    def setUp(self) -> None:
+        self.data = {
+            'designation': '01.00', 'name': 'Part',
+            'material': materials.factories.MaterialFactory().pk,
+        }
+
+    def upload(self, name, content) -> SimpleUploadedFile:
+        return SimpleUploadedFile(name, content)
+
+    def png(self) -> bytes:
+        buffer = io.BytesIO()
+        Image.new('RGB', (8, 8)).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def test_images_and_pdfs_are_accepted(self) -> None:
+        for drawing in (self.upload('drawing.png', self.png()),
+                        self.upload('drawing.pdf', b'%PDF-1.7\n')):
+            form = PartCreateAndUpdateForm(self.data, {'drawing': drawing})
+            self.assertTrue(form.is_valid(), form.errors)
+
+    def test_other_files_are_rejected(self) -> None:
+        for drawing in (self.upload('evil.html', b'<script></script>'),
+                        self.upload('evil.png', b'<script></script>'),
+                        self.upload('evil.pdf', b'<script></script>'),
+                        self.upload('evil.svg', b'<svg></svg>')):
+            for form in (
+                PartCreateAndUpdateForm(self.data, {'drawing': drawing}),
+                AssemblyCreateAndUpdateForm(self.data, {'drawing': drawing}),
+            ):
+                self.assertFalse(form.is_valid())
+                self.assertIn('drawing', form.errors)
+
+
+class StaticAssetsTest(TestCase):
+    """Test case for the self-hosted static asset pipeline."""
+
+    # Keep in step with static/vendor/README.md.
+    vendored_versions = {
+        'vendor/bootstrap/bootstrap.min.css': 'Bootstrap  v5.3.8',
+        'vendor/bootstrap/bootstrap.min.js': 'Bootstrap v5.3.8',
+        'vendor/popper/popper.min.js': '@popperjs/core v2.11.8',
+        'vendor/bootstrap-icons/bootstrap-icons.min.css':
+            'Bootstrap Icons v1.13.1',
+        'vendor/jquery/jquery.min.js': 'jQuery v3.7.1',
+        'vendor/select2/select2.min.js': 'Select2 4.1.0-rc.0',
+    }
+
+    def test_vendored_versions(self) -> None:
+        for name, banner in self.vendored_versions.items():
+            with open(finders.find(name), encoding='utf-8') as file:
+                self.assertIn(banner, file.read(200), name)
+
+    def test_select2_loads_after_jquery(self) -> None:
+        response = Client().get(reverse('assemblies:assembly_create'))
+        content = response.content.decode()
+        self.assertIn('class="form-select', content)
+        scripts = re.findall(r'<script src="([^"]+)"', content)
+        self.assertLess(
+            scripts.index(static('vendor/jquery/jquery.min.js')),
+            scripts.index(static('vendor/select2/select2.min.js')),
+        )
+
+    def test_pages_do_not_fetch_external_assets(self) -> None:
+        response = Client().get(reverse('home'))
+        external = re.findall(
+            r'(?:src|href)="(https?://[^"]+)"', response.content.decode()
+        )
+        self.assertEqual(external, [])
+
+    def test_variant_name(self) -> None:
+        self.assertEqual(
+            storage.variant_name('images/home_1.jpg', 480),
+            'images/home_1-480w.webp',
+        )
+
+    def test_variants_are_not_upscaled(self) -> None:
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 500)).save(buffer, 'JPEG')
+        buffer.seek(0)
+        variants = dict(storage.StaticFilesStorage().render_variants(buffer))
+        self.assertEqual(list(variants), [480, 960])
+        with Image.open(io.BytesIO(variants[480])) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (480, 240))
+
+    def test_responsive_image_without_collected_variants(self) -> None:
+        rendered = Template(
+            '{% load responsive_images %}'
+            '{% responsive_image "images/home_1.jpg" alt="Home" %}'
+        ).render(Context())
+        self.assertEqual(
+            rendered, '<img src="/static/images/home_1.jpg" alt="Home">'
+        )
+
+
+class CachedManagerTest(TestCase):
+    """Test case for the cache-aside object manager."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        Material.cached.local.clear()
+        self.material = materials.factories.MaterialFactory(name='Steel')
+
+    def test_repeated_lookups_do_not_query(self) -> None:
+        Material.cached.get(pk=self.material.pk)
+        with self.assertNumQueries(0):
+            by_pk = Material.cached.get(pk=str(self.material.pk))
+            by_name = Material.cached.get(name='Steel')
+        self.assertEqual(by_pk, self.material)
+        self.assertEqual(by_name, self.material)
+        self.assertEqual(Material.cached.misses, 1)
+        self.assertEqual(Material.cached.hits, 2)
+
+    def test_shared_cache_is_used_after_local_expiry(self) -> None:
+        Material.cached.get(pk=self.material.pk)
+        Material.cached.local.clear()
+        with self.assertNumQueries(0):
+            Material.cached.get(pk=self.material.pk)
+
+    def test_save_writes_through(self) -> None:
+        Material.cached.get(name='Steel')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.name = 'Aluminium'
+            self.material.save()
+        with self.assertNumQueries(0):
+            material = Material.cached.get(pk=self.material.pk)
+        self.assertEqual(material.name, 'Aluminium')
+        with self.assertRaises(Material.DoesNotExist):
+            Material.cached.get(name='Steel')
+
+    def test_save_is_seen_by_other_processes(self) -> None:
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        # Each process has a cache client of its own on the same files.
+        first = FileBasedCache(location, {})
+        second = FileBasedCache(location, {})
+        with mock.patch('componentor.caching.cache', first):
+            Material.cached.get(pk=self.material.pk)
+        Material.cached.local.clear()
+        with mock.patch('componentor.caching.cache', second), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.material.name = 'Aluminium'
+            self.material.save()
+        # The local copy of the first process has expired.
+        Material.cached.local.clear()
+        with mock.patch('componentor.caching.cache', first), \
+                self.assertNumQueries(0):
+            material = Material.cached.get(pk=self.material.pk)
+        self.assertEqual(material.name, 'Aluminium')
+
+    def test_save_replaces_local_copies_of_other_processes(self) -> None:
+        Material.cached.get(pk=self.material.pk)
+        # Another process, with a local cache of its own, saves.
+        with mock.patch.object(Material.cached, 'local',
+                               LocalCache(8, 30)), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.material.name = 'Aluminium'
+            self.material.save()
+        with self.assertNumQueries(0):
+            material = Material.cached.get(pk=self.material.pk)
+        self.assertEqual(material.name, 'Aluminium')
+        self.assertEqual(Material.cached.get(name='Aluminium'), material)
+
+    def test_culled_generation_drops_local_copies(self) -> None:
+        Material.cached.get(pk=self.material.pk)
+        Material.objects.filter(pk=self.material.pk).update(name='Aluminium')
+        cache.delete_many([
+            Material.cached.cache_key('pk', self.material.pk),
+            Material.cached.generation_key(self.material.pk),
+        ])
+        material = Material.cached.get(pk=self.material.pk)
+        self.assertEqual(material.name, 'Aluminium')
+
+    def test_delete_invalidates(self) -> None:
+        pk = self.material.pk
+        Material.cached.get(pk=pk)
+        self.material.delete()
+        with self.assertRaises(Material.DoesNotExist):
+            Material.cached.get(pk=pk)
+
+    def test_other_lookups_are_not_cached(self) -> None:
+        Material.cached.get(name__iexact='steel')
+        self.assertEqual(Material.cached.misses, 0)
+
+
+class WarmupTest(TestCase):
+    """Test case for warming up a worker."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        Material.cached.local.clear()
+        Part.cached.local.clear()
+        self.part = factories.PartFactory()
+        self.addCleanup(warmup.timings.clear)
+
+    def test_warm_up_runs_all_steps(self) -> None:
+        warmup.warm_up()
+        self.assertEqual(
+            list(warmup.timings), ['templates', 'urls', 'caches', 'warm-up']
+        )
+        self.assertIn('parts/part_list.html', warmup.template_names())
+        self.assertGreaterEqual(warmup.counts['urls'], 20)
+        self.assertIn('templates', warmup.format_timings())
+
+    def test_caches_are_primed(self) -> None:
+        warmup.warm_up()
+        self.assertEqual(warmup.counts['caches'], 2)
+        with self.assertNumQueries(0):
+            Part.cached.get(pk=self.part.pk)
+            Material.cached.get(name=self.part.material.name)
+
+    def test_first_request_is_timed_once(self) -> None:
+        report = mock.Mock()
+        warmup.time_first_request(report)
+        Client().get(reverse('ready'))
+        Client().get(reverse('ready'))
+        report.assert_called_once_with()
+        self.assertIn('first request', warmup.timings)
+
+    def test_command_prints_cold_and_warm_timings(self) -> None:
+        out = io.StringIO()
+        call_command('warmup', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('cold: templates'))
+        self.assertTrue(lines[1].startswith('warm: templates'))
+
+
+class WarmupConnectionsTest(TransactionTestCase):
+    """Test case for the database connections of the warm-up."""
+
+    def setUp(self) -> None:
+        self.addCleanup(warmup.timings.clear)
+
+    def test_connections_are_closed_after_warm_up(self) -> None:
+        # Closing the in-memory test database would be a no-op.
+        with mock.patch.object(connection, 'close') as close:
+            warmup.warm_up()
+        close.assert_called_once_with()
+
+
+class ProjectedRowsTest(TestCase):
+    """Test case for the projected list rows."""
+
+    def setUp(self) -> None:
+        self.material = materials.factories.MaterialFactory()
+
+    def test_rows_hold_only_the_projected_fields(self) -> None:
+        row, = rows.project(Material.objects.all(), ('id', 'name'))
+        self.assertEqual(row._fields, ('id', 'name'))
+        self.assertEqual(row.name, self.material.name)
+        self.assertFalse(hasattr(row, '__dict__'))
+
+    def test_rows_equal_model_instances(self) -> None:
+        qs = rows.project(Material.objects.all(), ('id', 'name'))
+        self.assertIn(self.material, list(qs))
+        self.assertEqual(qs[0].pk, self.material.pk)
+
+    def test_projection_survives_chaining(self) -> None:
+        qs = rows.project(Material.objects.all(), ('id', 'name'))
+        row = next(qs.filter(pk=self.material.pk).iterator())
+        self.assertEqual(row, self.material)
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    """Test case for the admin paginator of large tables."""
+
+    def setUp(self) -> None:
+        materials.factories.MaterialFactory.create_batch(3)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        materials.factories.MaterialFactory()
+
+    def test_estimate_comes_from_statistics(self) -> None:
+        self.assertEqual(paginators.estimate_count(Material), 3)
+
+    def test_large_unfiltered_table_is_estimated(self) -> None:
+        paginator = paginators.EstimatedCountPaginator(
+            Material.objects.all(), 10
+        )
+        paginator.threshold = 2
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 3)
+
+    def test_small_or_filtered_table_is_counted(self) -> None:
+        paginator = paginators.EstimatedCountPaginator(
+            Material.objects.all(), 10
+        )
+        self.assertEqual(paginator.count, 4)
+        paginator = paginators.EstimatedCountPaginator(
+            Material.objects.filter(density__gte=0), 10
+        )
+        paginator.threshold = 2
+        self.assertEqual(paginator.count, 4)
+
+
+@override_settings(WRITE_QUEUE=True)
+class WriteQueueTest(TransactionTestCase):
+    """Test case for the single writer queue."""
+
+    def setUp(self) -> None:
+        self.queue = writequeue.WriteQueue(max_batch=10, max_delay=0.2)
+
+    def tearDown(self) -> None:
+        self.queue.stop(timeout=5)
+        writequeue.write_queue.stop(timeout=5)
+
+    def test_jobs_are_committed_together(self) -> None:
+        futures = [
+            self.queue.submit(Material.objects.create, name=f'Steel {i}')
+            for i in range(5)
+        ]
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(Material.objects.count(), 5)
+        self.assertEqual(self.queue.batches, 1)
+
+    def test_failing_job_is_rolled_back_alone(self) -> None:
+        first, duplicate, last = [
+            self.queue.submit(Material.objects.create, name=name)
+            for name in ('Steel', 'Steel', 'Brass')
+        ]
+        self.assertEqual(first.result(timeout=5).name, 'Steel')
+        self.assertEqual(last.result(timeout=5).name, 'Brass')
+        with self.assertRaises(IntegrityError):
+            duplicate.result(timeout=5)
+        self.assertEqual(Material.objects.count(), 2)
+
+    def test_run_waits_for_commit(self) -> None:
+        material = self.queue.run(Material.objects.create, name='Steel')
+        self.assertTrue(Material.objects.filter(pk=material.pk).exists())
+
+    @override_settings(WRITE_QUEUE=False)
+    def test_disabled_queue_runs_in_caller(self) -> None:
+        thread = self.queue.run(threading.current_thread)
+        self.assertIs(thread, threading.current_thread())
+        self.assertEqual(self.queue.batches, 0)
+
+    def test_views_write_through_queue(self) -> None:
+        batches = writequeue.write_queue.batches
+        response = Client().post(
+            reverse('materials:material_create'), {'name': 'Steel'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertTrue(Material.objects.filter(name='Steel').exists())
+        self.assertEqual(writequeue.write_queue.batches, batches + 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+class SQLiteProfileTest(TestCase):
+    """Test case for the SQLite connection profile."""
+
+    def test_pragmas_are_applied_to_connections(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64 * 1024)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_maintenance_refreshes_statistics(self) -> None:
+        materials.factories.MaterialFactory.create_batch(3)
+        out = io.StringIO()
+        call_command('sqlite_maintenance', '--full', stdout=out)
+        self.assertIn('ANALYZE', out.getvalue())
+        self.assertEqual(paginators.estimate_count(Material), 3)
+
+
+@override_settings(REPLICA_DATABASES=['replica_0', 'replica_1'])
+class ReplicaRouterTest(SimpleTestCase):
+    """Test case for the read replica router."""
+
+    def setUp(self) -> None:
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_go_to_replicas(self) -> None:
+        self.assertIn(
+            self.router.db_for_read(Material), ['replica_0', 'replica_1']
+        )
+
+    def test_writes_go_to_primary(self) -> None:
+        self.assertEqual(self.router.db_for_write(Material), 'default')
+
+    def test_pinned_reads_go_to_primary(self) -> None:
+        with routers.use_primary():
+            self.assertEqual(self.router.db_for_read(Material), 'default')
+        self.assertNotEqual(self.router.db_for_read(Material), 'default')
+
+    def test_relations_follow_their_instance(self) -> None:
+        material = Material(name='Steel')
+        material._state.db = 'default'
+        self.assertEqual(
+            self.router.db_for_read(Part, instance=material), 'default'
+        )
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_reads_go_to_primary_without_replicas(self) -> None:
+        self.assertEqual(self.router.db_for_read(Material), 'default')
+
+    def test_replicas_are_not_migrated(self) -> None:
+        self.assertFalse(self.router.allow_migrate('replica_0', 'materials'))
+        self.assertIsNone(self.router.allow_migrate('default', 'materials'))
+
+
+@override_settings(REPLICA_DATABASES=['replica_0'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingMiddlewareTest(SimpleTestCase):
+    """Test case for pinning requests to the primary."""
+
+    def setUp(self) -> None:
+        self.factory = RequestFactory()
+
+    def route(self, request):
+        databases = []
+
+        def get_response(request):
+            databases.append(routers.ReplicaRouter().db_for_read(Material))
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return databases[0], response
+
+    def test_reads_go_to_replica(self) -> None:
+        database, response = self.route(self.factory.get('/'))
+        self.assertEqual(database, 'replica_0')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_writes_pin_user_to_primary(self) -> None:
+        database, response = self.route(self.factory.post('/'))
+        self.assertEqual(database, 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+
+    def test_pinned_user_reads_from_primary(self) -> None:
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        database, response = self.route(request)
+        self.assertEqual(database, 'default')
+
+    async def test_async_writes_pin_user_to_primary(self) -> None:
+        databases = []
+
+        async def get_response(request):
+            databases.append(routers.ReplicaRouter().db_for_read(Material))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = await middleware(self.factory.post('/'))
+        self.assertEqual(databases, ['default'])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+@override_settings(REPLICA_DATABASES=['replica_0'])
+class SyncReplicasTest(TransactionTestCase):
+    """Test case for copying the database to file replicas."""
+
+    def setUp(self) -> None:
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.path = Path(tmp_dir) / 'replica.sqlite3'
+        replica = dict(connection.settings_dict, NAME=str(self.path))
+        patcher = mock.patch.dict(connections.settings, replica_0=replica)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_replica_gets_copy_of_primary(self) -> None:
+        Material.objects.create(name='Steel')
+        call_command('sync_replicas', stdout=io.StringIO())
+        replica = sqlite3.connect(self.path)
+        self.addCleanup(replica.close)
+        self.assertEqual(
+            replica.execute('SELECT name FROM materials_material')
+            .fetchall(),
+            [('Steel',)],
+        )
+
+    def test_unknown_replica_is_refused(self) -> None:
+        with self.assertRaises(CommandError):
+            call_command('sync_replicas', 'default', stdout=io.StringIO())
+
+
+@override_settings(DATABASE_PARTITIONS=['alpha'])
+class PartitionRouterTest(SimpleTestCase):
+    """Test case for routing projects to their partitions."""
+
+    def setUp(self) -> None:
+        self.router = routers.PartitionRouter()
+
+    def test_partitioned_apps_follow_the_project(self) -> None:
+        self.assertIsNone(self.router.db_for_read(Part))
+        with routers.use_partition('alpha'):
+            for model in (Material, Part, Assembly):
+                self.assertEqual(
+                    self.router.db_for_write(model), 'partition_alpha'
+                )
+            self.assertIsNone(self.router.db_for_read(User))
+
+    def test_partitions_get_only_partitioned_apps(self) -> None:
+        self.assertTrue(self.router.allow_migrate('partition_alpha', 'parts'))
+        self.assertFalse(self.router.allow_migrate('partition_alpha', 'auth'))
+        self.assertIsNone(self.router.allow_migrate('default', 'auth'))
+
+    def test_no_relations_across_partitions(self) -> None:
+        material, part = Material(), Part()
+        material._state.db, part._state.db = 'default', 'partition_alpha'
+        self.assertFalse(self.router.allow_relation(material, part))
+        material._state.db = 'partition_alpha'
+        self.assertTrue(self.router.allow_relation(material, part))
+
+    def test_cache_keys_are_kept_apart(self) -> None:
+        with routers.use_partition('alpha'):
+            cache.set('key', 'alpha')
+        self.assertIsNone(cache.get('key'))
+        with routers.use_partition('alpha'):
+            self.assertEqual(cache.get('key'), 'alpha')
+
+
+@override_settings(DATABASE_PARTITIONS=['alpha'])
+class PartitionMiddlewareTest(SimpleTestCase):
+    """Test case for picking the project of a request."""
+
+    def setUp(self) -> None:
+        self.factory = RequestFactory()
+        self.session = SessionStore()
+
+    def route(self, path):
+        request = self.factory.get(path)
+        request.session = self.session
+        partitions = []
+
+        def get_response(request):
+            partitions.append(routers.get_partition())
+            return HttpResponse()
+
+        PartitionMiddleware(get_response)(request)
+        return partitions[0]
+
+    def test_project_is_kept_in_session(self) -> None:
+        self.assertIsNone(self.route('/'))
+        self.assertEqual(self.route('/?project=alpha'), 'alpha')
+        self.assertEqual(self.route('/'), 'alpha')
+        self.assertIsNone(self.route('/?project='))
+
+    def test_unknown_project_is_not_found(self) -> None:
+        with self.assertRaises(Http404):
+            self.route('/?project=beta')
+
+    async def test_async_request_keeps_project(self) -> None:
+        request = self.factory.get('/?project=alpha')
+        request.session = self.session
+        partitions = []
+
+        async def get_response(request):
+            partitions.append(routers.get_partition())
+            return HttpResponse()
+
+        await PartitionMiddleware(get_response)(request)
+        self.assertEqual(partitions, ['alpha'])
+        self.assertEqual(self.session['partition'], 'alpha')
+
+    @override_settings(DATABASE_PARTITIONS=[])
+    def test_dropped_project_is_ignored(self) -> None:
+        self.session['partition'] = 'alpha'
+        self.assertIsNone(self.route('/'))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+@override_settings(DATABASE_PARTITIONS=['alpha'])
+class SplitPartitionTest(TransactionTestCase):
+    """Test case for moving a project into its partition."""
+
+    def setUp(self) -> None:
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        partition = dict(
+            connection.settings_dict,
+            NAME=str(Path(tmp_dir) / 'partitions' / 'alpha.sqlite3'),
+        )
+        patcher = mock.patch.dict(
+            connections.settings, partition_alpha=partition
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.close_partition)
+
+        steel, brass = materials.factories.MaterialFactory.create_batch(2)
+        self.part = factories.PartFactory(
+            designation='100.01', material=steel
+        )
+        self.other = factories.PartFactory(
+            designation='200.01', material=brass
+        )
+        self.assembly = Assembly.objects.create(
+            designation='100.00', name='Frame'
+        )
+        self.assembly.parts.add(self.part)
+
+    def close_partition(self) -> None:
+        connections['partition_alpha'].close()
+        del connections['partition_alpha']
+
+    def test_project_is_moved(self) -> None:
+        call_command(
+            'split_partition', 'alpha', prefix='100.', move=True,
+            stdout=io.StringIO(),
+        )
+        self.assertQuerysetEqual(
+            Part.objects.values_list('designation', flat=True), ['200.01']
+        )
+        self.assertFalse(Assembly.objects.exists())
+        self.assertEqual(Material.objects.count(), 1)
+        with routers.use_partition('alpha'):
+            part = Part.objects.get()
+            assembly = Assembly.objects.get()
+        self.assertEqual(
+            (part.pk, part.updated), (self.part.pk, self.part.updated)
+        )
+        self.assertEqual(assembly.pk, self.assembly.pk)
+        self.assertEqual(part._state.db, 'partition_alpha')
+
+    def test_partitions_are_listed(self) -> None:
+        call_command(
+            'split_partition', 'alpha', prefix='100.', stdout=io.StringIO()
+        )
+        stdout = io.StringIO()
+        call_command('list_partitions', stdout=stdout)
+        self.assertIn('1 materials, 1 parts, 1 assemblies', stdout.getvalue())
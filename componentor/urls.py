@@ -1,4 +1,5 @@
 from componentor import views
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 
@@ -9,6 +10,24 @@ urlpatterns = [
     # Home
     path('', views.HomePageView.as_view(), name='home'),
 
+    # Readiness of the worker, for load balancers and health checks
+    path('ready/', views.ReadinessView.as_view(), name='ready'),
+
+    # Metrics of all workers, for Prometheus
+    path('metrics', views.MetricsView.as_view(), name='metrics'),
+
+    # Drawing previews
+    path(
+        'previews/<path:name>', views.PreviewView.as_view(), name='preview'
+    ),
+
+    # Uploaded drawings and rendered previews
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}<path:path>",
+        views.MediaView.as_view(),
+        name='media',
+    ),
+
     # Apps
     path('materials/', include('materials.urls', namespace='materials')),
     path('parts/', include('parts.urls', namespace='parts')),
@@ -1,7 +1,227 @@
+import hmac
+import os
+from functools import partial, reduce
+from http import HTTPStatus
+from operator import or_
+
+from componentor import metrics, warmup
+from componentor.previews import PLACEHOLDER, PREVIEWS_DIR, pipeline
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Q
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import redirect
+from django.templatetags.static import static
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from django.utils.http import content_disposition_header
+from django.views import View
 from django.views.generic.base import TemplateView
+from django.views.static import serve
+
+
+def select_view(sync_view, async_view, **initkwargs):
+    """Return the async view with ``ASYNC_VIEWS``, else the sync one."""
+    view = async_view if settings.ASYNC_VIEWS else sync_view
+    return view.as_view(**initkwargs)
 
 
 class HomePageView(TemplateView):
     """Generic class-based view for a home page."""
 
     template_name = "index.html"
+
+
+class ReadinessView(View):
+    """Answer ``200`` when this worker can serve requests, ``503`` if not.
+
+    Every database must answer, the default one must have all migrations
+    applied, and every cache must be reachable. The body tells which check
+    failed, and the warm-up timings of the worker that answered.
+    """
+
+    # Migrations are not rolled back under a running worker.
+    migrated = False
+
+    def get_checks(self):
+        checks = {
+            f'database:{alias}': partial(self.check_database, alias)
+            for alias in connections
+        }
+        checks['migrations'] = self.check_migrations
+        checks.update({
+            f'cache:{alias}': partial(self.check_cache, alias)
+            for alias in caches
+        })
+        return checks
+
+    def check_database(self, alias):
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def check_migrations(self):
+        if ReadinessView.migrated:
+            return
+        executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if plan:
+            raise RuntimeError(f'{len(plan)} unapplied migrations')
+        ReadinessView.migrated = True
+
+    def check_cache(self, alias):
+        caches[alias].get('readiness')
+
+    def get(self, request):
+        results = {}
+        for name, check in self.get_checks().items():
+            try:
+                check()
+            except Exception as error:
+                results[name] = f'{type(error).__name__}: {error}'
+            else:
+                results[name] = 'ok'
+        ready = all(result == 'ok' for result in results.values())
+        response = JsonResponse(
+            {
+                'ready': ready,
+                'checks': results,
+                'worker': os.getpid(),
+                'timings': {
+                    step: round(seconds, 4)
+                    for step, seconds in warmup.timings.items()
+                },
+            },
+            status=HTTPStatus.OK if ready else HTTPStatus.SERVICE_UNAVAILABLE,
+        )
+        add_never_cache_headers(response)
+        return response
+
+
+class MetricsView(View):
+    """Expose the metrics of all workers to Prometheus.
+
+    With ``METRICS_TOKEN`` set, the scraper must send it as a bearer token.
+    """
+
+    def authorized(self, request):
+        if not settings.METRICS_TOKEN:
+            return True
+        return hmac.compare_digest(
+            request.headers.get('Authorization', ''),
+            f'Bearer {settings.METRICS_TOKEN}',
+        )
+
+    def get(self, request):
+        if not self.authorized(request):
+            response = HttpResponse(status=HTTPStatus.UNAUTHORIZED)
+            response['WWW-Authenticate'] = 'Bearer'
+            return response
+        content, content_type = metrics.export()
+        response = HttpResponse(content, content_type=content_type)
+        add_never_cache_headers(response)
+        return response
+
+
+class MediaView(View):
+    """Serve uploaded drawings and their previews.
+
+    Previews are named by the hash of their drawing, so they never change
+    and are cached for a year. Drawings are revalidated by their
+    modification time, and are downloaded rather than shown, so an uploaded
+    file is never rendered as a page of this site.
+    """
+
+    previews_dir = f'{PREVIEWS_DIR}/'
+    preview_max_age = 365 * 24 * 60 * 60
+
+    def get(self, request, path):
+        response = serve(request, path, document_root=settings.MEDIA_ROOT)
+        if path.startswith(self.previews_dir):
+            patch_cache_control(
+                response, public=True, immutable=True,
+                max_age=self.preview_max_age,
+            )
+        else:
+            patch_cache_control(response, no_cache=True)
+            response['Content-Disposition'] = content_disposition_header(
+                True, os.path.basename(path)
+            )
+        response['X-Content-Type-Options'] = 'nosniff'
+        return response
+
+
+class PreviewView(View):
+    """Redirect to the preview of a drawing, or to a placeholder."""
+
+    drawings_dir = 'drawings/'
+    max_age = 24 * 60 * 60
+
+    def get(self, request, name):
+        if not name.startswith(self.drawings_dir) \
+                or not default_storage.exists(name):
+            raise Http404('Drawing does not exist')
+        url = pipeline.get_url(name)
+        if url is None:
+            response = redirect(static(PLACEHOLDER))
+            add_never_cache_headers(response)
+        else:
+            response = redirect(url)
+            patch_cache_control(response, max_age=self.max_age)
+        return response
+
+
+class AutocompleteView(View):
+    """Answer a select2 search with a page of matching objects.
+
+    ``?term=`` is looked up in ``search_fields``, ``?page=`` counts from 1.
+    One row more than a page is read to tell whether another page follows.
+    """
+
+    queryset = None
+    search_fields = ()
+    paginate_by = 20
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def get_label(self, obj):
+        return str(obj)
+
+    def get_page(self):
+        try:
+            return max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            return 1
+
+    def search(self):
+        """Return the slice of matching objects to read, one row more."""
+        queryset = self.get_queryset()
+        term = self.request.GET.get('term', '').strip()
+        if term:
+            queryset = queryset.filter(reduce(or_, (
+                Q(**{f'{field}__icontains': term})
+                for field in self.search_fields
+            )))
+        start = (self.get_page() - 1) * self.paginate_by
+        return queryset[start:start + self.paginate_by + 1]
+
+    def render_results(self, objects):
+        return JsonResponse({
+            'results': [
+                {'id': obj.pk, 'text': self.get_label(obj)}
+                for obj in objects[:self.paginate_by]
+            ],
+            'pagination': {'more': len(objects) > self.paginate_by},
+        })
+
+    def get(self, request):
+        return self.render_results(list(self.search()))
+
+
+class AsyncAutocompleteMixin:
+    """``AutocompleteView`` for async views, reading with the async ORM."""
+
+    async def get(self, request):
+        return self.render_results([obj async for obj in self.search()])
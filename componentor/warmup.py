@@ -0,0 +1,157 @@
+"""Warm-up of a fresh worker before it takes requests.
+
+A cold worker pays on its first requests for compiling templates,
+populating the URL resolvers, loading model metadata and filling its local
+caches. ``warm_up()`` does all of it up front. gunicorn.conf.py runs it in
+every worker before the worker accepts connections and logs the timings,
+``manage.py warmup`` prints them.
+
+Database connections belong to the thread that opened them, so the
+request threads still open their own. The ones warming up opened are closed
+at the end, otherwise each worker would keep an idle extra connection for
+``CONN_MAX_AGE``.
+"""
+
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+
+from componentor.caching import CachedManager
+from django.apps import apps
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.template import engines
+from django.urls import NoReverseMatch, URLResolver, get_resolver, reverse
+from django.urls.converters import IntConverter
+
+# Seconds taken by each step in this process, and what each step handled.
+timings = {}
+counts = {}
+
+
+@contextmanager
+def timed(step):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[step] = time.perf_counter() - started
+
+
+def template_names():
+    """Yield the names of the templates of the project and its apps."""
+    dirs = [Path(d) for engine in settings.TEMPLATES for d in engine['DIRS']]
+    dirs += [
+        Path(app.path, 'templates') for app in apps.get_app_configs()
+        if Path(app.path).parent == settings.BASE_DIR
+    ]
+    for directory in dirs:
+        for path in sorted(directory.rglob('*.html')):
+            yield path.relative_to(directory).as_posix()
+
+
+def compile_templates():
+    engine = engines['django']
+    names = set(template_names())
+    for name in names:
+        engine.get_template(name)
+    return len(names)
+
+
+def url_names(resolver, namespace=''):
+    """Yield the name and converters of every named URL pattern."""
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = f'{namespace}{pattern.namespace}:' \
+                if pattern.namespace else namespace
+            yield from url_names(pattern, prefix)
+        elif pattern.name:
+            yield namespace + pattern.name, pattern.pattern.converters
+
+
+def reverse_urls():
+    reversed_names = set()
+    for name, converters in url_names(get_resolver()):
+        kwargs = {
+            key: 1 if isinstance(converter, IntConverter) else 'x'
+            for key, converter in converters.items()
+        }
+        try:
+            reverse(name, kwargs=kwargs)
+        except NoReverseMatch:
+            # Patterns with other arguments, their resolver is populated
+            # all the same.
+            continue
+        reversed_names.add(name)
+    return len(reversed_names)
+
+
+def prime_caches():
+    return sum(
+        manager.prime()
+        for model in apps.get_models()
+        for manager in model._meta.managers
+        if isinstance(manager, CachedManager)
+    )
+
+
+STEPS = {
+    'templates': compile_templates,
+    'urls': reverse_urls,
+    'caches': prime_caches,
+}
+
+
+def close_connections():
+    # A caller inside a transaction still needs its connection.
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def warm_up():
+    """Run all steps, timing each one."""
+    try:
+        with timed('warm-up'):
+            for step, function in STEPS.items():
+                with timed(step):
+                    counts[step] = function()
+    finally:
+        close_connections()
+
+
+def format_timings():
+    return ', '.join(
+        f'{step} {seconds * 1000:.0f} ms'
+        + (f' ({counts[step]})' if step in counts else '')
+        for step, seconds in timings.items()
+    )
+
+
+def time_first_request(report):
+    """Time the first request of this process, then call ``report()``."""
+    started = []
+    lock = Lock()
+
+    def on_started(**kwargs):
+        with lock:
+            if not started:
+                started.append(time.perf_counter())
+
+    def on_finished(**kwargs):
+        with lock:
+            if not started or 'first request' in timings:
+                return
+            timings['first request'] = time.perf_counter() - started[0]
+        request_started.disconnect(dispatch_uid='warmup.first_request')
+        request_finished.disconnect(dispatch_uid='warmup.first_request')
+        report()
+
+    request_started.connect(
+        on_started, weak=False, dispatch_uid='warmup.first_request'
+    )
+    request_finished.connect(
+        on_finished, weak=False, dispatch_uid='warmup.first_request'
+    )
@@ -0,0 +1,34 @@
+from django import forms
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """Select of a model choice field searching its options as you type.
+
+    Only the empty and the selected options are rendered, select2 loads the
+    others from the autocomplete view named ``url_name``. Pages with many
+    of these selects no longer carry the whole table in each of them.
+    """
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse(self.url_name)
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = [v for v in value if v not in field.empty_values]
+        choices = [] if field.empty_label is None \
+            else [('', field.empty_label)]
+        choices += map(self.choices.choice,
+                       self.choices.queryset.filter(pk__in=selected))
+        return [
+            (None, [self.create_option(
+                name, option_value, label, str(option_value) in value, index
+            )], index)
+            for index, (option_value, label) in enumerate(choices)
+        ]
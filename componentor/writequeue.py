@@ -0,0 +1,144 @@
+"""Single writer for SQLite.
+
+SQLite lets one connection write at a time, concurrent write transactions
+wait for each other and fail with ``database is locked`` once the busy
+timeout is over. With ``WRITE_QUEUE`` enabled, writes are handed to one
+writer thread per process instead. It takes whatever jobs are waiting, up
+to ``WRITE_QUEUE_MAX_BATCH`` of them or for at most
+``WRITE_QUEUE_MAX_DELAY`` seconds after the first, and runs them in one
+transaction, each in its own savepoint. A failing job is rolled back alone
+and its caller gets the exception, the others are committed together.
+Callers get their result only after the commit. Reads don't go through the
+queue and stay concurrent.
+
+The queue only merges the writes of its own process, writes of other
+processes still wait for the lock. gunicorn.conf.py therefore runs a single
+worker process with ``WRITE_QUEUE``.
+
+Without ``WRITE_QUEUE``, and for the writes to project partitions, which
+have a database each, jobs run right away in the calling thread, each in
+its own transaction.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from componentor.routers import get_partition_database
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class WriteQueue:
+    """Run write jobs on a single thread, many of them per commit."""
+
+    def __init__(self, using='default', max_batch=None, max_delay=None):
+        self.using = using
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self._jobs = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def is_enabled(self):
+        return settings.WRITE_QUEUE
+
+    def get_max_batch(self):
+        return self.max_batch or settings.WRITE_QUEUE_MAX_BATCH
+
+    def get_max_delay(self):
+        return self.max_delay or settings.WRITE_QUEUE_MAX_DELAY
+
+    def run(self, func, *args, **kwargs):
+        """Run ``func`` as a write job and return its result."""
+        partition = get_partition_database()
+        if partition or not self.is_enabled() or self.is_writer():
+            with transaction.atomic(using=partition or self.using):
+                return func(*args, **kwargs)
+        return self.submit(func, *args, **kwargs).result()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue ``func`` and return a future resolved after the commit."""
+        future = Future()
+        self._jobs.put((future, func, args, kwargs))
+        self.start()
+        return future
+
+    def stop(self, timeout=None):
+        """Let the writer finish queued jobs, close its connection and exit."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._jobs.put(None)
+            thread.join(timeout)
+
+    def is_writer(self):
+        return threading.current_thread() is self._thread
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._work, name='write-queue', daemon=True
+                )
+                self._thread.start()
+
+    def _work(self):
+        stopping = False
+        while not stopping:
+            batch = self._collect()
+            stopping = None in batch
+            batch = [job for job in batch if job is not None]
+            if batch:
+                self.batches += 1
+                close_old_connections()
+                self._commit(batch)
+        connections[self.using].close()
+
+    def _collect(self):
+        batch = [self._jobs.get()]
+        deadline = time.monotonic() + self.get_max_delay()
+        while len(batch) < self.get_max_batch():
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._jobs.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, batch):
+        try:
+            with transaction.atomic(using=self.using):
+                results = [
+                    (future, *self._call(func, args, kwargs))
+                    for future, func, args, kwargs in batch
+                    if future.set_running_or_notify_cancel()
+                ]
+        except Exception as error:
+            logger.exception('Write batch of %d jobs failed', len(batch))
+            results = [
+                (future, None, error) for future, *job in batch
+                if future.running()
+            ]
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def _call(self, func, args, kwargs):
+        try:
+            with transaction.atomic(using=self.using):
+                return func(*args, **kwargs), None
+        except Exception as error:
+            return None, error
+
+
+write_queue = WriteQueue()
@@ -9,8 +9,11 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 
 import os
 
+from componentor.warmup import timed
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'componentor.settings')
 
-application = get_wsgi_application()
+# Loading the apps and models, reported with the warm-up.
+with timed('import'):
+    application = get_wsgi_application()
@@ -0,0 +1,118 @@
+"""Gunicorn settings of the production server, read by plain ``gunicorn``.
+
+The application is loaded once by the master and forked into the workers.
+Threaded workers run the WSGI application, two per core plus one. With
+``ASYNC_VIEWS=1`` the workers run the ASGI application on uvicorn instead,
+one per core, and don't keep database connections; see the settings for
+when that pays off. ``WEB_CONCURRENCY`` and ``WEB_THREADS`` override the
+counts.
+
+With ``WRITE_QUEUE`` there is a single worker process, with as many threads
+as all the threaded workers would have had: the queue merges the writes of
+one process only, the writes of several would still wait for each other
+on the SQLite lock. ``WEB_CONCURRENCY`` can't be raised then.
+
+``kill -HUP <master>`` replaces the workers one by one after a change of
+these settings, without dropping requests. New code needs a new master, as
+the workers are forked from the loaded application: ``kill -USR2`` starts
+one next to the old one, ``kill -QUIT`` stops the old one once the new
+workers are ready. In a container, where the master is the main process,
+replace the container instead.
+
+Each worker warms up before it accepts connections, see
+componentor/warmup.py, so restarted workers don't serve cold. Migrations are
+not run here, see the ``migrate`` service of docker-compose.yml.
+
+The workers keep their metrics in ``PROMETHEUS_MULTIPROC_DIR``, a fresh
+temporary directory unless set, which must then be empty at the start.
+``/metrics`` adds them up, see componentor/metrics.py. The application is
+imported in the hooks only, once the directory is set.
+"""
+
+import os
+import tempfile
+
+
+def count_cores():
+    try:
+        # Only the cores the container may run on.
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+cores = count_cores()
+
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    # Kept through reloads, which read this file again.
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(
+        prefix='componentor-metrics-'
+    )
+
+bind = f"0.0.0.0:{os.getenv('PORT') or 8000}"
+preload_app = True
+
+write_queue = bool(os.getenv('WRITE_QUEUE'))
+
+if (os.getenv('ASYNC_VIEWS') or '0') != '0':
+    wsgi_app = 'componentor.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.getenv('WEB_CONCURRENCY') or cores)
+else:
+    wsgi_app = 'componentor.wsgi:application'
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY') or cores * 2 + 1)
+    threads = int(os.getenv('WEB_THREADS') or 4)
+
+if write_queue:
+    if int(os.getenv('WEB_CONCURRENCY') or 1) != 1:
+        raise RuntimeError(
+            'WRITE_QUEUE needs a single worker process, unset '
+            'WEB_CONCURRENCY or set it to 1.'
+        )
+    if worker_class == 'gthread' and not os.getenv('WEB_THREADS'):
+        threads *= workers
+    workers = 1
+
+# Requests get this long to finish on a reload or shutdown.
+graceful_timeout = 30
+timeout = 60
+keepalive = 5
+
+# Recycle workers now and then, at different times, so a slow leak can't
+# build up.
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    from django.db import connections
+
+    # A connection opened by the master while loading can't be shared.
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    from componentor import warmup
+
+    # The worker accepts connections once this returns.
+    try:
+        warmup.warm_up()
+    except Exception:
+        worker.log.exception('Warm-up failed, serving cold')
+    worker.log.info('Warmed up: %s', warmup.format_timings())
+    warmup.time_first_request(
+        lambda: worker.log.info(
+            'First request after %.0f ms',
+            warmup.timings['first request'] * 1000,
+        )
+    )
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drops the requests in flight of the worker, its totals stay.
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,3 +1,4 @@
+from componentor.paginators import EstimatedCountPaginator
 from django.contrib import admin
 from materials import models
 
@@ -5,4 +6,6 @@ from materials import models
 @admin.register(models.Material)
 class MaterialAdmin(admin.ModelAdmin):
     list_display = ('name', 'created', 'updated')
-    search_fields = ('name', 'created')
+    search_fields = ('name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
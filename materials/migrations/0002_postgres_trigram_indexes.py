@@ -0,0 +1,16 @@
+from componentor.postgres import trigram_index
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently, outside of a transaction.
+    atomic = False
+
+    dependencies = [
+        ('materials', '0001_initial'),
+    ]
+
+    operations = [
+        trigram_index('materials_material', 'name'),
+    ]
@@ -1,3 +1,4 @@
+from componentor.caching import CachedManager
 from django.db import models
 
 
@@ -9,6 +10,9 @@ class Material(models.Model):
     created = models.DateTimeField('Creation date', auto_now_add=True)
     updated = models.DateTimeField('Date of change', auto_now=True)
 
+    objects = models.Manager()
+    cached = CachedManager('name')
+
     class Meta:
         ordering = ('name',)
         verbose_name = 'Material'
@@ -0,0 +1,9 @@
+from componentor.fragments import delete_fragment
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from materials.models import Material
+
+
+@receiver(post_delete, sender=Material)
+def delete_material_row(sender, instance, **kwargs):
+    delete_fragment('material_row', instance.pk, instance.updated)
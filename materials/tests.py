@@ -1,6 +1,8 @@
 from http import HTTPStatus
+from unittest import mock
 
 import parts.factories
+from componentor.testing import QueryBudgetTestMixin
 from django.core.exceptions import ObjectDoesNotExist
 from django.test import Client, TestCase
 from django.urls import reverse
@@ -8,7 +10,7 @@ from materials import factories
 from materials.models import Material
 
 
-class MaterialListViewTest(TestCase):
+class MaterialListViewTest(QueryBudgetTestMixin, TestCase):
     """Test case for the MaterialListView."""
 
     def setUp(self) -> None:
@@ -44,8 +46,61 @@ class MaterialListViewTest(TestCase):
         self.assertNotIn(self.material1, material_list)
         self.assertNotIn(self.material3, material_list)
 
+    def test_stream_all_materials(self) -> None:
+        response = self.client.get(
+            reverse('materials:material_list'), {'stream': 1}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.streaming)
 
-class MaterialDetailViewTest(TestCase):
+        content = b''.join(response.streaming_content).decode()
+        for material in (self.material1, self.material2, self.material3):
+            self.assertIn(material.name, content)
+
+    def test_partial_request_renders_rows_only(self) -> None:
+        response = self.client.get(
+            reverse('materials:material_list'),
+            {'name': 'Al_2'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateUsed(response, 'materials/material_list_rows.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertContains(response, self.material2.name)
+        self.assertNotContains(response, self.material1.name)
+
+    def test_not_modified_when_list_did_not_change(self) -> None:
+        url = reverse('materials:material_list')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        factories.MaterialFactory()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_render_pending_messages_despite_etag(self) -> None:
+        url = reverse('materials:material_list')
+        etag = self.client.get(url)['ETag']
+        parts.factories.PartFactory(material=self.material1)
+        self.client.post(
+            reverse('materials:material_delete', args=[self.material1.pk])
+        )
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'delete material because')
+
+    def test_pages_within_query_budget(self) -> None:
+        factories.MaterialFactory.create_batch(60)
+        url = reverse('materials:material_list')
+        self.assertWithinQueryBudget(url)
+        self.assertWithinQueryBudget(f'{url}?page=2')
+        self.assertWithinQueryBudget(f'{url}?name=material')
+
+
+class MaterialDetailViewTest(QueryBudgetTestMixin, TestCase):
     """Test case for the MaterialDetailView."""
 
     def setUp(self) -> None:
@@ -53,25 +108,25 @@ class MaterialDetailViewTest(TestCase):
         self.material = factories.MaterialFactory(name='material_1')
 
     def test_view_url_exists_at_desired_location(self) -> None:
-        response = self.client.get('/materials/1/')
+        response = self.client.get(f'/materials/{self.material.pk}/')
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_url_accessible_by_name(self) -> None:
         response = self.client.get(reverse(
-            'materials:material_detail', args=[1])
+            'materials:material_detail', args=[self.material.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_uses_correct_template(self) -> None:
         response = self.client.get(reverse(
-            'materials:material_detail', args=[1])
+            'materials:material_detail', args=[self.material.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTemplateUsed(response, 'materials/material_detail.html')
 
     def test_view_has_all_data(self) -> None:
         response = self.client.get(reverse(
-            'materials:material_detail', args=[1])
+            'materials:material_detail', args=[self.material.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertContains(response, self.material.name)
@@ -85,14 +140,44 @@ class MaterialDetailViewTest(TestCase):
 
     def test_view_has_links_to_update_and_delete(self) -> None:
         response = self.client.get(reverse(
-            'materials:material_detail', args=[1])
+            'materials:material_detail', args=[self.material.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertContains(
-            response, reverse('materials:material_update', args=[1])
+            response, reverse(
+                'materials:material_update', args=[self.material.pk]
+            )
         )
         self.assertContains(
-            response, reverse('materials:material_delete', args=[1])
+            response, reverse(
+                'materials:material_delete', args=[self.material.pk]
+            )
+        )
+
+    def test_not_modified_since_last_change(self) -> None:
+        url = reverse('materials:material_detail', args=[self.material.pk])
+        response = self.client.get(url)
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertFalse(response.templates)
+
+    def test_modified_after_update(self) -> None:
+        url = reverse('materials:material_detail', args=[self.material.pk])
+        etag = self.client.get(url)['ETag']
+        self.material.density = 7850
+        self.material.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 7850)
+
+    def test_view_within_query_budget(self) -> None:
+        parts.factories.PartFactory.create_batch(30, material=self.material)
+        self.assertWithinQueryBudget(
+            reverse('materials:material_detail', args=[self.material.pk])
         )
 
 
@@ -127,7 +212,7 @@ class MaterialCreateViewTest(TestCase):
         )
         self.assertRedirects(response, reverse('materials:material_list'))
 
-        material = Material.objects.get(pk=1)
+        material = Material.objects.get()
         self.assertEqual(material.name, self.valid_data['name'])
         self.assertEqual(material.density, self.valid_data['density'])
 
@@ -146,7 +231,7 @@ class MaterialCreateViewTest(TestCase):
         )
         self.assertRedirects(response, reverse('materials:material_list'))
 
-        material = Material.objects.get(pk=1)
+        material = Material.objects.get()
         self.assertEqual(material.name, self.valid_data['name'])
         self.assertEqual(material.density, None)
 
@@ -197,33 +282,35 @@ class MaterialUpdateViewTest(TestCase):
         }
 
     def test_view_url_exists_at_desired_location(self) -> None:
-        response = self.client.get('/materials/1/update/')
+        response = self.client.get(f'/materials/{self.material.pk}/update/')
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_url_accessible_by_name(self) -> None:
         response = self.client.get(
-            reverse('materials:material_update', args=[1])
+            reverse('materials:material_update', args=[self.material.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_uses_correct_template(self) -> None:
         response = self.client.get(
-            reverse('materials:material_update', args=[1])
+            reverse('materials:material_update', args=[self.material.pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTemplateUsed(response, 'materials/material_form.html')
 
     def test_update_material_with_valid_data(self) -> None:
         response = self.client.post(
-            reverse('materials:material_update', args=[1]),
+            reverse('materials:material_update', args=[self.material.pk]),
             self.valid_data,
             follow=True
         )
         self.assertRedirects(
-            response, reverse('materials:material_detail', args=[1])
+            response, reverse(
+                'materials:material_detail', args=[self.material.pk]
+            )
         )
 
-        material = Material.objects.get(pk=1)
+        material = Material.objects.get(pk=self.material.pk)
         self.assertEqual(material.name, self.valid_data['name'])
         self.assertEqual(material.density, self.valid_data['density'])
 
@@ -236,15 +323,17 @@ class MaterialUpdateViewTest(TestCase):
         del valid_data['density']
 
         response = self.client.post(
-            reverse('materials:material_update', args=[1]),
+            reverse('materials:material_update', args=[self.material.pk]),
             self.valid_data,
             follow=True
         )
         self.assertRedirects(
-            response, reverse('materials:material_detail', args=[1])
+            response, reverse(
+                'materials:material_detail', args=[self.material.pk]
+            )
         )
 
-        material = Material.objects.get(pk=1)
+        material = Material.objects.get(pk=self.material.pk)
         self.assertEqual(material.name, self.valid_data['name'])
         self.assertEqual(material.density, None)
 
@@ -258,13 +347,13 @@ class MaterialUpdateViewTest(TestCase):
         invalid_data['name'] = ''
 
         response = self.client.post(
-            reverse('materials:material_update', args=[1]),
+            reverse('materials:material_update', args=[self.material.pk]),
             self.valid_data,
             follow=True
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
-        material_after = Material.objects.get(pk=1)
+        material_after = Material.objects.get(pk=self.material.pk)
         self.assertEqual(material_before, material_after)
 
     def test_do_not_update_material_with_invalid_name(self) -> None:
@@ -284,7 +373,7 @@ class MaterialUpdateViewTest(TestCase):
             )
             self.assertEqual(response.status_code, HTTPStatus.OK)
 
-            material_after = Material.objects.get(pk=1)
+            material_after = Material.objects.get(pk=self.material.pk)
             self.assertEqual(material_before, material_after)
 
 
@@ -298,18 +387,20 @@ class MaterialDeleteViewTest(TestCase):
         self.part = parts.factories.PartFactory(material=self.material)
 
     def test_view_url_exists_at_desired_location(self) -> None:
-        response = self.client.get('/materials/1/delete/')
+        response = self.client.get(
+            f'/materials/{self.material_set[0].pk}/delete/'
+        )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_url_accessible_by_name(self) -> None:
         response = self.client.get(
-            reverse('materials:material_delete', args=[1])
+            reverse('materials:material_delete', args=[self.material_set[0].pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_uses_correct_template(self) -> None:
         response = self.client.get(
-            reverse('materials:material_delete', args=[1])
+            reverse('materials:material_delete', args=[self.material_set[0].pk])
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTemplateUsed(response, 'materials/material_delete.html')
@@ -318,7 +409,9 @@ class MaterialDeleteViewTest(TestCase):
         length_of_material_list_before = len(Material.objects.all())
 
         response = self.client.post(
-            reverse('materials:material_delete', args=[1]),
+            reverse(
+                'materials:material_delete', args=[self.material_set[0].pk]
+            ),
             follow=True
         )
         self.assertRedirects(response, reverse('materials:material_list'))
@@ -328,23 +421,23 @@ class MaterialDeleteViewTest(TestCase):
             length_of_material_list_after == length_of_material_list_before - 1
         )
         with self.assertRaises(ObjectDoesNotExist):
-            Material.objects.get(pk=1)
+            Material.objects.get(pk=self.material_set[0].pk)
 
         message = list(response.context.get('messages'))[0]
         self.assertEqual(message.message, 'The material successfully deleted')
         self.assertEqual(message.tags, 'success')
 
     def test_do_not_delete_material_linked_to_part(self) -> None:
-        material_before = Material.objects.get(pk=3)
+        material_before = Material.objects.get(pk=self.material.pk)
 
         response = self.client.post(
-            reverse('materials:material_delete', args=[3]),
+            reverse('materials:material_delete', args=[self.material.pk]),
             follow=True
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertRedirects(response, reverse('materials:material_list'))
 
-        material_after = Material.objects.get(pk=3)
+        material_after = Material.objects.get(pk=self.material.pk)
         self.assertEqual(material_before, material_after)
 
         message = list(response.context.get('messages'))[0]
@@ -353,3 +446,22 @@ class MaterialDeleteViewTest(TestCase):
             "Can't delete material because it's in use"
         )
         self.assertEqual(message.tags, 'error')
+
+    def test_confirmation_shows_references_blocking_delete(self) -> None:
+        parts.factories.PartFactory.create_batch(2, material=self.material)
+        response = self.client.get(
+            reverse('materials:material_delete', args=[self.material.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.context['protected_references'], [('Parts', 3)]
+        )
+        self.assertContains(response, 'parts: 3')
+        self.assertNotContains(response, 'Yes, delete')
+
+    def test_blocked_delete_is_not_attempted(self) -> None:
+        with mock.patch.object(Material, 'delete') as delete:
+            self.client.post(
+                reverse('materials:material_delete', args=[self.material.pk])
+            )
+        delete.assert_not_called()
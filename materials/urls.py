@@ -1,14 +1,21 @@
+from componentor.views import select_view
 from django.urls import path
 from materials import views
 
 app_name = 'materials'
 
 urlpatterns = [
-    path('', views.MaterialListView.as_view(), name='material_list'),
+    path(
+        '',
+        select_view(views.MaterialListView, views.AsyncMaterialListView),
+        name='material_list'
+    ),
     path('create/', views.MaterialCreateView.as_view(), name='material_create'),
     path(
         '<int:pk>/',
-        views.MaterialDetailView.as_view(),
+        select_view(
+            views.MaterialDetailView, views.AsyncMaterialDetailView
+        ),
         name='material_detail'
     ),
     path(
@@ -1,4 +1,5 @@
 import componentor.mixins
+from componentor.rows import project
 from django.contrib.messages.views import SuccessMessageMixin
 from django.urls import reverse_lazy
 from django.views import generic
@@ -6,16 +7,23 @@ from materials.forms import MaterialCreateAndUpdateForm, MaterialSearchForm
 from materials.models import Material
 
 
-class MaterialListView(generic.ListView):
+class MaterialListView(componentor.mixins.ConditionalListMixin,
+                       componentor.mixins.StreamingListMixin,
+                       componentor.mixins.PartialListMixin,
+                       generic.ListView):
     """Generic class-based view for a list of materials."""
 
     model = Material
     template_name = 'materials/material_list.html'
+    rows_template_name = 'materials/material_list_rows.html'
+    paginate_by = 50
     context_object_name = 'materials'
+    query_budget = 5
+    row_fields = ('id', 'name', 'density', 'created', 'updated')
 
     def get_queryset(self):
         name = self.request.GET.get('name')
-        qs = Material.objects.all()
+        qs = project(Material.objects.all(), self.row_fields)
         if name:
             return qs.filter(name__icontains=name)
         return qs
@@ -26,14 +34,37 @@ class MaterialListView(generic.ListView):
         return context
 
 
-class MaterialDetailView(generic.DetailView):
+class MaterialDetailView(componentor.mixins.ConditionalGetMixin,
+                         generic.DetailView):
     """Generic class-based view for detail displaying a material."""
 
     model = Material
     template_name = 'materials/material_detail.html'
+    send_last_modified = True
+    query_budget = 4
 
+    def get_validators(self):
+        return Material.objects.filter(pk=self.kwargs['pk'])\
+            .values_list('updated')\
+            .first()
 
-class MaterialCreateView(SuccessMessageMixin, generic.CreateView):
+
+class AsyncMaterialListView(componentor.mixins.AsyncConditionalListMixin,
+                            componentor.mixins.AsyncStreamingListMixin,
+                            componentor.mixins.AsyncListMixin,
+                            MaterialListView):
+    """Async view for a list of materials, served with ``ASYNC_VIEWS``."""
+
+
+class AsyncMaterialDetailView(componentor.mixins.AsyncConditionalGetMixin,
+                              componentor.mixins.AsyncDetailMixin,
+                              MaterialDetailView):
+    """Async view for detail displaying a material, see ``ASYNC_VIEWS``."""
+
+
+class MaterialCreateView(componentor.mixins.QueuedWriteMixin,
+                         SuccessMessageMixin,
+                         generic.CreateView):
     """Generic class-based view for creating material."""
 
     model = Material
@@ -48,7 +79,9 @@ class MaterialCreateView(SuccessMessageMixin, generic.CreateView):
     }
 
 
-class MaterialUpdateView(SuccessMessageMixin, generic.UpdateView):
+class MaterialUpdateView(componentor.mixins.QueuedWriteMixin,
+                         SuccessMessageMixin,
+                         generic.UpdateView):
     """Generic class-based view for updating material."""
 
     model = Material
@@ -68,7 +101,8 @@ class MaterialUpdateView(SuccessMessageMixin, generic.UpdateView):
         )
 
 
-class MaterialDeleteView(componentor.mixins.DeletionProtectionMixin,
+class MaterialDeleteView(componentor.mixins.QueuedWriteMixin,
+                         componentor.mixins.DeletionProtectionMixin,
                          generic.DeleteView):
     """Generic class-based view for deleting material."""
 
@@ -1,3 +1,4 @@
+from componentor.paginators import EstimatedCountPaginator
 from django.contrib import admin
 from parts.models import Part
 
@@ -5,5 +6,8 @@ from parts.models import Part
 @admin.register(Part)
 class PartAdmin(admin.ModelAdmin):
     list_display = ('designation', 'name', 'material', 'created', 'updated')
+    list_select_related = ('material',)
     search_fields = ('designation', 'name')
     autocomplete_fields = ('material',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -1,9 +1,26 @@
 import re
 
 from django import forms
+from django.db.models import Q, Value
+from django.db.models.functions import Replace
+from materials.models import Material
 from parts.models import Part
 
 
+def validate_designation(designation):
+    msg_err = 'Invalid symbols! Part designation can only contain ' \
+              'numbers, hyphens and dots.'
+    if re.search(r'[^\d\-.]', designation):
+        raise forms.ValidationError(msg_err)
+
+
+def validate_name(name):
+    msg_err = 'Invalid symbols! Part name can only contain letters, ' \
+              'numbers and spaces.'
+    if re.search(r'[^\d\sa-zA-Z]', name):
+        raise forms.ValidationError(msg_err)
+
+
 class PartSearchForm(forms.Form):
     search_query = forms.CharField(
         label='Search by part designation or name',
@@ -24,21 +41,142 @@ class PartCreateAndUpdateForm(forms.ModelForm):
     )
 
     def clean_designation(self):
-        msg_err = 'Invalid symbols! Part designation can only contain ' \
-                  'numbers, hyphens and dots.'
         designation = self.cleaned_data['designation']
-        if re.search(r'[^\d\-.]', designation):
-            raise forms.ValidationError(msg_err)
+        validate_designation(designation)
         return designation
 
     def clean_name(self):
-        msg_err = 'Invalid symbols! Part name can only contain letters, ' \
-                  'numbers and spaces.'
         name = self.cleaned_data['name']
-        if re.search(r'[^\d\sa-zA-Z]', name):
-            raise forms.ValidationError(msg_err)
+        validate_name(name)
         return name
 
     class Meta:
         model = Part
         fields = '__all__'
+
+
+class PartBulkEditForm(forms.Form):
+    """Change the material or rewrite designations or names of many parts.
+
+    The parts are the checked ones, or all found by ``search_query`` when
+    none is checked. Every new designation and name is validated like in
+    ``PartCreateAndUpdateForm`` before anything is written.
+    """
+
+    FIELD_CHOICES = (('designation', 'Designation'), ('name', 'Name'))
+    VALIDATORS = {'designation': validate_designation, 'name': validate_name}
+    max_errors = 5
+
+    search_query = forms.CharField(
+        label='Search by part designation or name',
+        required=False,
+    )
+    parts = forms.ModelMultipleChoiceField(
+        queryset=Part.objects.all(),
+        required=False,
+    )
+    material = forms.ModelChoiceField(
+        label='New material',
+        queryset=Material.objects.all(),
+        required=False,
+    )
+    field = forms.ChoiceField(
+        label='Rewrite',
+        choices=FIELD_CHOICES,
+        initial='designation',
+    )
+    find = forms.CharField(label='Find', required=False, strip=False)
+    replace = forms.CharField(label='Replace with', required=False,
+                              strip=False)
+
+    def get_queryset(self):
+        if self.cleaned_data.get('parts'):
+            return Part.objects.filter(
+                pk__in=[part.pk for part in self.cleaned_data['parts']]
+            )
+        search_query = self.cleaned_data.get('search_query')
+        qs = Part.objects.all()
+        if search_query:
+            qs = qs.filter(
+                Q(designation__icontains=search_query)
+                | Q(name__icontains=search_query)
+            )
+        return qs
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.errors:
+            return cleaned_data
+        if not cleaned_data['material'] and not cleaned_data['find']:
+            raise forms.ValidationError(
+                'Choose a new material or text to find.'
+            )
+        field = cleaned_data['field']
+        self.changes = [
+            (pk, old, self.rewrite(old))
+            for pk, old in self.get_queryset().values_list('pk', field)
+        ]
+        if not self.changes:
+            raise forms.ValidationError('No parts match the selection.')
+        self.validate_rewrite(field)
+        return cleaned_data
+
+    def rewrite(self, value):
+        find = self.cleaned_data['find']
+        if not find:
+            return value
+        return value.replace(find, self.cleaned_data['replace'])
+
+    def validate_rewrite(self, field):
+        errors = self.find_invalid(field)
+        if field == 'designation':
+            errors.extend(self.find_duplicates())
+        if errors:
+            raise forms.ValidationError(errors[:self.max_errors])
+
+    def find_invalid(self, field):
+        errors = []
+        # The model field rejects empty and too long values.
+        model_field = Part._meta.get_field(field)
+        validator = self.VALIDATORS[field]
+        for new in dict.fromkeys(
+                new for pk, old, new in self.changes if new != old):
+            try:
+                model_field.clean(new, None)
+                validator(new)
+            except forms.ValidationError as error:
+                errors.append(f'{new!r}: {error.messages[0]}')
+                if len(errors) >= self.max_errors:
+                    break
+        return errors
+
+    def find_duplicates(self):
+        new_designations = [new for pk, old, new in self.changes]
+        seen, duplicates = set(), set()
+        for designation in new_designations:
+            if designation in seen:
+                duplicates.add(designation)
+            seen.add(designation)
+        duplicates.update(
+            Part.objects.filter(designation__in=new_designations)
+            .exclude(pk__in=[pk for pk, old, new in self.changes])
+            .values_list('designation', flat=True)
+        )
+        return [
+            f'{designation!r}: Part with this Designation already exists.'
+            for designation in sorted(duplicates)
+        ]
+
+    def get_updates(self):
+        """Return the ``update()`` arguments that apply the edit."""
+        updates = {}
+        if self.cleaned_data['material']:
+            updates['material'] = self.cleaned_data['material']
+        if self.cleaned_data['find']:
+            field = self.cleaned_data['field']
+            updates[field] = Replace(
+                field,
+                Value(self.cleaned_data['find']),
+                Value(self.cleaned_data['replace']),
+            )
+        return updates
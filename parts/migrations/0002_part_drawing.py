@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-19 03:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='drawing',
+            field=models.FileField(blank=True, upload_to='drawings/%Y/%m/', verbose_name='Drawing'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from componentor.postgres import trigram_index
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently, outside of a transaction.
+    atomic = False
+
+    dependencies = [
+        ('parts', '0003_part_version'),
+    ]
+
+    operations = [
+        trigram_index('parts_part', 'designation'),
+        trigram_index('parts_part', 'name'),
+    ]
@@ -1,8 +1,16 @@
+from componentor.caching import CachedManager
+from componentor.fields import DrawingField
+from componentor.models import VersionedModel
 from django.db import models
+from django.dispatch import Signal
 from materials.models import Material
 
+# Sent with ``pks`` and ``using`` after those parts were changed by a single
+# ``UPDATE``, no ``post_save`` is sent for them.
+parts_bulk_updated = Signal()
 
-class Part(models.Model):
+
+class Part(VersionedModel):
     """Model representing a part."""
 
     designation = models.CharField('Designation', max_length=50, unique=True)
@@ -13,8 +21,19 @@ class Part(models.Model):
         related_name='parts',
         verbose_name='Material'
     )
+    drawing = DrawingField(
+        'Drawing',
+        upload_to='drawings/%Y/%m/',
+        blank=True,
+    )
     created = models.DateTimeField('Creation date', auto_now_add=True)
     updated = models.DateTimeField('Date of change', auto_now=True)
+    version = models.PositiveIntegerField(
+        'Version', default=1, editable=False
+    )
+
+    objects = models.Manager()
+    cached = CachedManager('designation')
 
     class Meta:
         ordering = ('designation',)
@@ -0,0 +1,14 @@
+from componentor.fragments import delete_fragment
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from parts.models import Part, parts_bulk_updated
+
+
+@receiver(post_delete, sender=Part)
+def delete_part_row(sender, instance, **kwargs):
+    delete_fragment('part_row', instance.pk, instance.updated)
+
+
+@receiver(parts_bulk_updated, sender=Part)
+def invalidate_cached_parts(sender, pks, **kwargs):
+    Part.cached.invalidate(pks)
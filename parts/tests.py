@@ -1,14 +1,28 @@
+import json
 from http import HTTPStatus
+from unittest import mock
 
 import materials.factories
+from componentor.models import VersionConflict
+from componentor.testing import QueryBudgetTestMixin
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.test import Client, TestCase
-from django.urls import reverse
+from django.db import transaction
+from django.http import Http404
+from django.test import AsyncRequestFactory, Client, RequestFactory, TestCase
+from django.urls import resolve, reverse
+from django.utils import timezone
+from materials.models import Material
 from parts import factories
 from parts.models import Part
+from parts.views import (
+    AsyncPartAutocompleteView, AsyncPartDetailView, AsyncPartListView,
+    PartAutocompleteView, PartListView,
+)
 
 
-class PartListViewTest(TestCase):
+class PartListViewTest(QueryBudgetTestMixin, TestCase):
     """Test case for the PartListView."""
 
     def setUp(self) -> None:
@@ -54,8 +68,108 @@ class PartListViewTest(TestCase):
         self.assertNotIn(self.part1, part_list)
         self.assertNotIn(self.part3, part_list)
 
+    def test_stream_all_parts(self) -> None:
+        response = self.client.get(reverse('parts:part_list'), {'stream': 1})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.streaming)
+
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('<title>', content)
+        self.assertTrue(content.rstrip().endswith('</html>'))
+        for part in Part.objects.all():
+            self.assertIn(part.designation, content)
+
+    def test_stream_rows_in_chunks(self) -> None:
+        with mock.patch.object(PartListView, 'stream_chunk_size', 4):
+            response = self.client.get(
+                reverse('parts:part_list'), {'stream': 1}
+            )
+            chunks = list(response.streaming_content)
+        # page head, two chunks of rows and page tail
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[1].count(b'<tr>'), 4)
+        self.assertEqual(chunks[2].count(b'<tr>'), 2)
+
+    def test_stream_search_results(self) -> None:
+        response = self.client.get(
+            reverse('parts:part_list'), {'stream': 1, 'search_query': '02.'}
+        )
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn(self.part2.designation, content)
+        self.assertNotIn(self.part1.designation, content)
+
+    async def test_stream_rows_asynchronously_under_asgi(self) -> None:
+        request = AsyncRequestFactory().get(
+            reverse('parts:part_list'), {'stream': 1}
+        )
+        response = await AsyncPartListView.as_view()(request)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        content = b''.join(chunks).decode()
+        self.assertIn(self.part1.designation, content)
+        self.assertTrue(content.rstrip().endswith('</html>'))
+
+    def test_sync_view_lists_parts(self) -> None:
+        request = RequestFactory().get(reverse('parts:part_list'))
+        response = PartListView.as_view()(request)
+        self.assertContains(response, self.part1.designation)
+        self.assertContains(response, self.part3.designation)
+
+    def test_partial_request_renders_rows_only(self) -> None:
+        response = self.client.get(
+            reverse('parts:part_list'),
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateUsed(response, 'parts/part_list_rows.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertContains(response, self.part1.designation)
+        self.assertIn('X-Requested-With', response['Vary'])
+
+    def test_partial_request_loads_more_pages(self) -> None:
+        with mock.patch.object(PartListView, 'paginate_by', 4):
+            response = self.client.get(
+                reverse('parts:part_list'),
+                {'search_query': 'part'},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+            self.assertContains(response, '<tr>', count=4)
+            self.assertContains(response, '?search_query=part&page=2')
+
+            response = self.client.get(
+                reverse('parts:part_list'),
+                {'search_query': 'part', 'page': 2},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+            self.assertContains(response, '<tr>', count=2)
+            self.assertNotContains(response, 'load-more')
+
+    def test_not_modified_when_list_did_not_change(self) -> None:
+        url = reverse('parts:part_list')
+        etag = self.client.get(url)['ETag']
 
-class PartDetailViewTest(TestCase):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        response = self.client.get(
+            url, {'search_query': '01'}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        self.part1.name = 'renamed'
+        self.part1.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_pages_within_query_budget(self) -> None:
+        factories.PartFactory.create_batch(60)
+        url = reverse('parts:part_list')
+        self.assertWithinQueryBudget(url)
+        self.assertWithinQueryBudget(f'{url}?page=2')
+        self.assertWithinQueryBudget(f'{url}?search_query=part')
+
+
+class PartDetailViewTest(QueryBudgetTestMixin, TestCase):
     """Test case for the PartDetailView."""
 
     def setUp(self) -> None:
@@ -64,20 +178,26 @@ class PartDetailViewTest(TestCase):
         self.part = factories.PartFactory(material=self.material)
 
     def test_view_url_exists_at_desired_location(self) -> None:
-        response = self.client.get('/parts/1/')
+        response = self.client.get(f'/parts/{self.part.pk}/')
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_url_accessible_by_name(self) -> None:
-        response = self.client.get(reverse('parts:part_detail', args=[1]))
+        response = self.client.get(
+            reverse('parts:part_detail', args=[self.part.pk])
+        )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_uses_correct_template(self) -> None:
-        response = self.client.get(reverse('parts:part_detail', args=[1]))
+        response = self.client.get(
+            reverse('parts:part_detail', args=[self.part.pk])
+        )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTemplateUsed(response, 'parts/part_detail.html')
 
     def test_view_has_all_data(self) -> None:
-        response = self.client.get(reverse('parts:part_detail', args=[1]))
+        response = self.client.get(
+            reverse('parts:part_detail', args=[self.part.pk])
+        )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertContains(response, self.part.designation)
         self.assertContains(response, self.part.name)
@@ -90,10 +210,112 @@ class PartDetailViewTest(TestCase):
         )
 
     def test_view_has_links_to_update_and_delete(self) -> None:
-        response = self.client.get(reverse('parts:part_detail', args=[1]))
+        response = self.client.get(
+            reverse('parts:part_detail', args=[self.part.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(
+            response, reverse('parts:part_update', args=[self.part.pk])
+        )
+        self.assertContains(
+            response, reverse('parts:part_delete', args=[self.part.pk])
+        )
+
+    def test_not_modified_when_part_did_not_change(self) -> None:
+        url = reverse('parts:part_detail', args=[self.part.pk])
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertFalse(response.templates)
+
+    async def test_async_view_under_asgi(self) -> None:
+        view = AsyncPartDetailView.as_view()
+        request = AsyncRequestFactory().get('/')
+        response = await view(request, pk=self.part.pk)
+        self.assertContains(response, self.part.designation)
+        self.assertContains(response, self.material.name)
+
+        with self.assertRaises(Http404):
+            await view(request, pk=self.part.pk + 1)
+
+    def test_modified_after_material_rename(self) -> None:
+        url = reverse('parts:part_detail', args=[self.part.pk])
+        etag = self.client.get(url)['ETag']
+        self.material.name = 'Renamed'
+        self.material.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Renamed')
+
+    def test_validators_describe_the_cached_part(self) -> None:
+        url = reverse('parts:part_detail', args=[self.part.pk])
+        etag = self.client.get(url)['ETag']
+        # Not seen by the cache yet, as in a worker whose copy is stale.
+        Part.objects.filter(pk=self.part.pk)\
+            .update(name='Renamed', updated=timezone.now())
+
+        response = self.client.get(url)
+        self.assertNotContains(response, 'Renamed')
+        self.assertEqual(response['ETag'], etag)
+
+        Part.cached.invalidate([self.part.pk])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
         self.assertEqual(response.status_code, HTTPStatus.OK)
-        self.assertContains(response, reverse('parts:part_update', args=[1]))
-        self.assertContains(response, reverse('parts:part_delete', args=[1]))
+        self.assertContains(response, 'Renamed')
+
+    def test_view_within_query_budget_with_cold_caches(self) -> None:
+        cache.clear()
+        Part.cached.local.clear()
+        Material.cached.local.clear()
+        self.assertWithinQueryBudget(
+            reverse('parts:part_detail', args=[self.part.pk])
+        )
+
+
+class PartAutocompleteViewTest(QueryBudgetTestMixin, TestCase):
+    """Test case for the PartAutocompleteView."""
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.url = reverse('parts:part_autocomplete')
+        self.part = factories.PartFactory(designation='01.00', name='hex bolt')
+        factories.PartFactory.create_batch(3)
+
+    def test_search_by_designation_or_name(self) -> None:
+        for term in ('01.00', 'HEX BOLT'):
+            response = self.client.get(self.url, {'term': term})
+            self.assertEqual(response.json(), {
+                'results': [{'id': self.part.pk, 'text': '01.00 - hex bolt'}],
+                'pagination': {'more': False},
+            })
+
+    def test_results_are_paginated(self) -> None:
+        with mock.patch.object(PartAutocompleteView, 'paginate_by', 3):
+            first = self.client.get(self.url).json()
+            last = self.client.get(self.url, {'page': 2}).json()
+        self.assertEqual(len(first['results']), 3)
+        self.assertTrue(first['pagination']['more'])
+        self.assertEqual(len(last['results']), 1)
+        self.assertFalse(last['pagination']['more'])
+
+    def test_view_within_query_budget(self) -> None:
+        factories.PartFactory.create_batch(60)
+        self.assertWithinQueryBudget(f'{self.url}?term=0&page=2')
+
+    def test_view_is_sync_by_default(self) -> None:
+        view = resolve(self.url).func.view_class
+        self.assertIs(view, PartAutocompleteView)
+        self.assertFalse(view.view_is_async)
+
+    async def test_async_view_answers_the_same(self) -> None:
+        request = AsyncRequestFactory().get(self.url, {'term': 'hex'})
+        response = await AsyncPartAutocompleteView.as_view()(request)
+        self.assertEqual(json.loads(response.content), {
+            'results': [{'id': self.part.pk, 'text': '01.00 - hex bolt'}],
+            'pagination': {'more': False},
+        })
 
 
 class PartCreateViewTest(TestCase):
@@ -129,7 +351,7 @@ class PartCreateViewTest(TestCase):
         )
         self.assertRedirects(response, reverse('parts:part_list'))
 
-        part = Part.objects.get(pk=1)
+        part = Part.objects.get()
         self.assertEqual(part.designation, self.valid_data['designation'])
         self.assertEqual(part.name, self.valid_data['name'])
         self.assertEqual(part.material, self.material)
@@ -222,30 +444,37 @@ class PartUpdateViewTest(TestCase):
             'designation': '01.000',
             'name': 'Part',
             'material': self.material.id,
+            'version': self.part.version,
         }
 
     def test_view_url_exists_at_desired_location(self) -> None:
-        response = self.client.get('/parts/1/update/')
+        response = self.client.get(f'/parts/{self.part.pk}/update/')
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_url_accessible_by_name(self) -> None:
-        response = self.client.get(reverse('parts:part_update', args=[1]))
+        response = self.client.get(
+            reverse('parts:part_update', args=[self.part.pk])
+        )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_uses_correct_template(self) -> None:
-        response = self.client.get(reverse('parts:part_update', args=[1]))
+        response = self.client.get(
+            reverse('parts:part_update', args=[self.part.pk])
+        )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTemplateUsed(response, 'parts/part_form.html')
 
     def test_update_part_with_valid_data(self) -> None:
         response = self.client.post(
-            reverse('parts:part_update', args=[1]),
+            reverse('parts:part_update', args=[self.part.pk]),
             self.valid_data,
             follow=True
         )
-        self.assertRedirects(response, reverse('parts:part_detail', args=[1]))
+        self.assertRedirects(
+            response, reverse('parts:part_detail', args=[self.part.pk])
+        )
 
-        part = Part.objects.get(pk=1)
+        part = Part.objects.get(pk=self.part.pk)
         self.assertEqual(part.designation, self.valid_data['designation'])
         self.assertEqual(part.name, self.valid_data['name'])
         self.assertEqual(part.material, self.material)
@@ -254,19 +483,77 @@ class PartUpdateViewTest(TestCase):
         self.assertEqual(message.message, 'The part successfully updated')
         self.assertEqual(message.tags, 'success')
 
+    def test_update_bumps_version(self) -> None:
+        self.client.post(
+            reverse('parts:part_update', args=[self.part.pk]), self.valid_data
+        )
+        self.assertEqual(Part.objects.get(pk=self.part.pk).version, 2)
+
+    def test_do_not_update_part_changed_by_someone_else(self) -> None:
+        self.client.post(
+            reverse('parts:part_update', args=[self.part.pk]), self.valid_data
+        )
+        stale_data = {**self.valid_data, 'name': 'Stale'}
+        response = self.client.post(
+            reverse('parts:part_update', args=[self.part.pk]), stale_data
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertEqual(
+            response.context['conflicts'], [('Name', 'Stale', 'Part')]
+        )
+        self.assertContains(
+            response, 'Someone else changed this object',
+            status_code=HTTPStatus.CONFLICT,
+        )
+        self.assertEqual(Part.objects.get(pk=self.part.pk).name, 'Part')
+
+        # Submitting the form again overwrites the other change.
+        response = self.client.post(
+            reverse('parts:part_update', args=[self.part.pk]),
+            {**stale_data, 'version': 2},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(Part.objects.get(pk=self.part.pk).name, 'Stale')
+
+    def test_admin_change_conflicts_with_open_form(self) -> None:
+        admin = Client()
+        admin.force_login(User.objects.create_superuser('admin'))
+        response = admin.post(
+            reverse('admin:parts_part_change', args=[self.part.pk]),
+            {'designation': self.part.designation, 'name': 'Admin',
+             'material': self.part.material.pk},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(Part.objects.get(pk=self.part.pk).version, 2)
+
+        response = self.client.post(
+            reverse('parts:part_update', args=[self.part.pk]), self.valid_data
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertEqual(Part.objects.get(pk=self.part.pk).name, 'Admin')
+
+    def test_stale_object_is_not_saved(self) -> None:
+        stale = Part.objects.get(pk=self.part.pk)
+        self.part.name = 'First'
+        self.part.save()
+        stale.name = 'Second'
+        with self.assertRaises(VersionConflict), transaction.atomic():
+            stale.save()
+        self.assertEqual(Part.objects.get(pk=self.part.pk).name, 'First')
+
     def test_do_not_update_part_without_designation(self) -> None:
         part_before = self.part
         invalid_data = self.valid_data
         invalid_data['designation'] = ''
 
         response = self.client.post(
-            reverse('parts:part_update', args=[1]),
+            reverse('parts:part_update', args=[self.part.pk]),
             self.valid_data,
             follow=True
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
-        part_after = Part.objects.get(pk=1)
+        part_after = Part.objects.get(pk=self.part.pk)
         self.assertEqual(part_before, part_after)
 
     def test_do_not_update_part_without_name(self) -> None:
@@ -275,13 +562,13 @@ class PartUpdateViewTest(TestCase):
         invalid_data['name'] = ''
 
         response = self.client.post(
-            reverse('parts:part_update', args=[1]),
+            reverse('parts:part_update', args=[self.part.pk]),
             self.valid_data,
             follow=True
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
-        part_after = Part.objects.get(pk=1)
+        part_after = Part.objects.get(pk=self.part.pk)
         self.assertEqual(part_before, part_after)
 
     def test_do_not_update_part_with_invalid_designation(self) -> None:
@@ -302,7 +589,7 @@ class PartUpdateViewTest(TestCase):
             )
             self.assertEqual(response.status_code, HTTPStatus.OK)
 
-            part_after = Part.objects.get(pk=1)
+            part_after = Part.objects.get(pk=self.part.pk)
             self.assertEqual(part_before, part_after)
 
     def test_do_not_update_part_with_invalid_name(self) -> None:
@@ -323,7 +610,7 @@ class PartUpdateViewTest(TestCase):
             )
             self.assertEqual(response.status_code, HTTPStatus.OK)
 
-            part_after = Part.objects.get(pk=1)
+            part_after = Part.objects.get(pk=self.part.pk)
             self.assertEqual(part_before, part_after)
 
 
@@ -336,15 +623,19 @@ class PartDeleteViewTest(TestCase):
         self.part = factories.PartFactory()
 
     def test_view_url_exists_at_desired_location(self) -> None:
-        response = self.client.get('/parts/1/delete/')
+        response = self.client.get(f'/parts/{self.part_set[0].pk}/delete/')
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_url_accessible_by_name(self) -> None:
-        response = self.client.get(reverse('parts:part_delete', args=[1]))
+        response = self.client.get(
+            reverse('parts:part_delete', args=[self.part_set[0].pk])
+        )
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_view_uses_correct_template(self) -> None:
-        response = self.client.get(reverse('parts:part_delete', args=[1]))
+        response = self.client.get(
+            reverse('parts:part_delete', args=[self.part_set[0].pk])
+        )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTemplateUsed(response, 'parts/part_delete.html')
 
@@ -352,7 +643,7 @@ class PartDeleteViewTest(TestCase):
         length_of_part_list_before = len(Part.objects.all())
 
         response = self.client.post(
-            reverse('parts:part_delete', args=[1]),
+            reverse('parts:part_delete', args=[self.part_set[0].pk]),
             follow=True
         )
         self.assertRedirects(response, reverse('parts:part_list'))
@@ -362,8 +653,132 @@ class PartDeleteViewTest(TestCase):
             length_of_part_list_after == length_of_part_list_before - 1
         )
         with self.assertRaises(ObjectDoesNotExist):
-            Part.objects.get(pk=1)
+            Part.objects.get(pk=self.part_set[0].pk)
 
         message = list(response.context.get('messages'))[0]
         self.assertEqual(message.message, 'The part successfully deleted')
         self.assertEqual(message.tags, 'success')
+
+
+class PartBulkEditViewTest(TestCase):
+    """Test case for PartBulkEditView."""
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.url = reverse('parts:part_bulk_edit')
+        self.steel = materials.factories.MaterialFactory(name='Steel')
+        self.brass = materials.factories.MaterialFactory(name='Brass')
+        self.part1 = factories.PartFactory(
+            designation='100.01', name='Bolt', material=self.steel
+        )
+        self.part2 = factories.PartFactory(
+            designation='100.02', name='Nut', material=self.steel
+        )
+        self.part3 = factories.PartFactory(
+            designation='200.01', name='Washer', material=self.steel
+        )
+
+    def test_view_lists_parts_matching_search(self) -> None:
+        response = self.client.get(self.url, {'search_query': '100.'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateUsed(response, 'parts/part_bulk_edit.html')
+        self.assertEqual(
+            list(response.context['selection']), [self.part1, self.part2]
+        )
+
+    def test_preview_does_not_change_parts(self) -> None:
+        response = self.client.post(self.url, {
+            'search_query': '100.', 'field': 'designation',
+            'find': '100.', 'replace': '101.',
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context['change_count'], 2)
+        self.assertContains(response, '101.02')
+        self.part1.refresh_from_db()
+        self.assertEqual(self.part1.designation, '100.01')
+
+    def test_apply_reassigns_material_of_checked_parts(self) -> None:
+        Part.cached.get(pk=self.part1.pk)
+        response = self.client.post(self.url, {
+            'parts': [self.part1.pk, self.part3.pk], 'field': 'designation',
+            'material': self.brass.pk, 'apply': '',
+        }, follow=True)
+        self.assertRedirects(response, reverse('parts:part_list'))
+        self.assertEqual(
+            list(Part.objects.filter(material=self.brass)),
+            [self.part1, self.part3],
+        )
+        self.assertEqual(
+            Part.cached.get(pk=self.part1.pk).material_id, self.brass.pk
+        )
+        message = list(response.context.get('messages'))[0]
+        self.assertEqual(message.message, '2 parts successfully updated')
+
+    def test_apply_renames_by_search(self) -> None:
+        self.client.post(self.url, {
+            'search_query': 'Nut', 'field': 'name',
+            'find': 'Nut', 'replace': 'Hex nut', 'apply': '',
+        })
+        self.part2.refresh_from_db()
+        self.assertEqual(self.part2.name, 'Hex nut')
+        self.assertGreater(self.part2.updated, self.part1.updated)
+
+    def test_rewrite_follows_part_form_rules(self) -> None:
+        response = self.client.post(self.url, {
+            'field': 'name', 'find': 'Bolt', 'replace': 'Bolt!', 'apply': '',
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Invalid symbols!')
+        self.part1.refresh_from_db()
+        self.assertEqual(self.part1.name, 'Bolt')
+
+    def test_rewrite_rejects_empty_values(self) -> None:
+        response = self.client.post(self.url, {
+            'parts': [self.part1.pk], 'field': 'designation',
+            'find': '100.01', 'replace': '', 'apply': '',
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'This field cannot be blank.')
+        self.part1.refresh_from_db()
+        self.assertEqual(self.part1.designation, '100.01')
+
+    def test_rewrite_rejects_too_long_values(self) -> None:
+        response = self.client.post(self.url, {
+            'parts': [self.part1.pk], 'field': 'name',
+            'find': 'Bolt', 'replace': 'Bolt' * 20, 'apply': '',
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'at most 50 characters')
+        self.part1.refresh_from_db()
+        self.assertEqual(self.part1.name, 'Bolt')
+
+    def test_rewrite_rejects_duplicate_designations(self) -> None:
+        response = self.client.post(self.url, {
+            'parts': [self.part1.pk], 'field': 'designation',
+            'find': '100', 'replace': '200', 'apply': '',
+        })
+        self.assertContains(response, 'already exists')
+        self.part1.refresh_from_db()
+        self.assertEqual(self.part1.designation, '100.01')
+
+    def test_nothing_to_change(self) -> None:
+        response = self.client.post(self.url, {'field': 'designation'})
+        self.assertContains(response, 'Choose a new material or text')
+
+
+class PartAdminTest(TestCase):
+    """Test case for the changelist of parts."""
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(User.objects.create_superuser('admin'))
+        self.url = reverse('admin:parts_part_changelist')
+        self.part = factories.PartFactory(designation='01.00', name='hex bolt')
+        factories.PartFactory(designation='02.00', name='washer')
+
+    def test_search_by_designation_or_name(self) -> None:
+        for term in ('1.0', 'X BOL'):
+            response = self.client.get(self.url, {'q': term})
+            self.assertEqual(
+                list(response.context['cl'].result_list), [self.part]
+            )
@@ -1,12 +1,29 @@
+from componentor.views import select_view
 from django.urls import path
 from parts import views
 
 app_name = 'parts'
 
 urlpatterns = [
-    path('', views.PartListView.as_view(), name='part_list'),
+    path(
+        '',
+        select_view(views.PartListView, views.AsyncPartListView),
+        name='part_list'
+    ),
     path('create/', views.PartCreateView.as_view(), name='part_create'),
-    path('<int:pk>/', views.PartDetailView.as_view(), name='part_detail'),
+    path(
+        'autocomplete/',
+        select_view(
+            views.PartAutocompleteView, views.AsyncPartAutocompleteView
+        ),
+        name='part_autocomplete'
+    ),
+    path('edit/', views.PartBulkEditView.as_view(), name='part_bulk_edit'),
+    path(
+        '<int:pk>/',
+        select_view(views.PartDetailView, views.AsyncPartDetailView),
+        name='part_detail'
+    ),
     path(
         '<int:pk>/update/', views.PartUpdateView.as_view(), name='part_update'
     ),
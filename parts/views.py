@@ -1,24 +1,46 @@
 import componentor.mixins
+import componentor.views
+from componentor.rows import project
+from componentor.writequeue import write_queue
+from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
+from django.db import router
+from django.db.models import F, Q
+from django.http import Http404
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.views import generic
-from parts.forms import PartCreateAndUpdateForm, PartSearchForm
-from parts.models import Part
+from materials.models import Material
+from parts.forms import (
+    PartBulkEditForm, PartCreateAndUpdateForm, PartSearchForm,
+)
+from parts.models import Part, parts_bulk_updated
 
 
-class PartListView(generic.ListView):
+class PartListView(componentor.mixins.ConditionalListMixin,
+                   componentor.mixins.StreamingListMixin,
+                   componentor.mixins.PartialListMixin,
+                   generic.ListView):
     """Generic class-based view for a list of parts."""
 
     model = Part
     template_name = 'parts/part_list.html'
+    rows_template_name = 'parts/part_list_rows.html'
+    paginate_by = 50
     context_object_name = 'parts'
+    query_budget = 5
+    row_fields = (
+        'id', 'designation', 'name', 'drawing', 'created', 'updated',
+    )
 
     def get_queryset(self):
         search_query = self.request.GET.get('search_query')
-        qs = Part.objects.all()
+        qs = project(Part.objects.all(), self.row_fields)
         if search_query:
-            return qs.filter(designation__icontains=search_query) \
-                or qs.filter(name__icontains=search_query)
+            return qs.filter(
+                Q(designation__icontains=search_query)
+                | Q(name__icontains=search_query)
+            )
         return qs
 
     def get_context_data(self, **kwargs):
@@ -27,14 +49,83 @@ class PartListView(generic.ListView):
         return context
 
 
-class PartDetailView(generic.DetailView):
+class PartDetailView(componentor.mixins.ConditionalGetMixin,
+                     generic.DetailView):
     """Generic class-based view for detail displaying a part."""
 
     model = Part
     template_name = 'parts/part_detail.html'
+    send_last_modified = True
+    query_budget = 5
+    part = None
+
+    def get_validators(self):
+        # The cached part may lag behind the database for a few seconds,
+        # the validators must describe the part that is shown.
+        part = self.get_object()
+        return part.updated, part.material.updated
+
+    def get_object(self, queryset=None):
+        if self.part is None:
+            try:
+                self.part = Part.cached.get(pk=self.kwargs['pk'])
+            except Part.DoesNotExist:
+                raise Http404('No part found matching the query')
+            self.part.material = Material.cached.get(
+                pk=self.part.material_id
+            )
+        return self.part
+
+
+class AsyncPartListView(componentor.mixins.AsyncConditionalListMixin,
+                        componentor.mixins.AsyncStreamingListMixin,
+                        componentor.mixins.AsyncListMixin,
+                        PartListView):
+    """Async view for a list of parts, served with ``ASYNC_VIEWS``."""
+
+
+class AsyncPartDetailView(componentor.mixins.AsyncConditionalGetMixin,
+                          componentor.mixins.AsyncDetailMixin,
+                          PartDetailView):
+    """Async view for detail displaying a part, see ``ASYNC_VIEWS``."""
+
+    async def aget_validators(self):
+        part = await self.aget_object()
+        return part.updated, part.material.updated
+
+    async def aget_object(self):
+        if self.part is None:
+            try:
+                self.part = await Part.cached.aget(pk=self.kwargs['pk'])
+            except Part.DoesNotExist:
+                raise Http404('No part found matching the query')
+            self.part.material = await Material.cached.aget(
+                pk=self.part.material_id
+            )
+        return self.part
+
+
+class PartAutocompleteView(componentor.views.AutocompleteView):
+    """Search parts by designation or name for a part select."""
+
+    search_fields = ('designation', 'name')
+    query_budget = 3
+
+    def get_queryset(self):
+        return project(Part.objects.all(), ('id', 'designation', 'name'))
+
+    def get_label(self, part):
+        return f'{part.designation} - {part.name}'
+
+
+class AsyncPartAutocompleteView(componentor.views.AsyncAutocompleteMixin,
+                                PartAutocompleteView):
+    """Async view searching parts for a part select, see ``ASYNC_VIEWS``."""
 
 
-class PartCreateView(SuccessMessageMixin, generic.CreateView):
+class PartCreateView(componentor.mixins.QueuedWriteMixin,
+                     SuccessMessageMixin,
+                     generic.CreateView):
     """Generic class-based view for creating part."""
 
     model = Part
@@ -49,7 +140,10 @@ class PartCreateView(SuccessMessageMixin, generic.CreateView):
     }
 
 
-class PartUpdateView(SuccessMessageMixin, generic.UpdateView):
+class PartUpdateView(componentor.mixins.QueuedWriteMixin,
+                     componentor.mixins.OptimisticLockMixin,
+                     SuccessMessageMixin,
+                     generic.UpdateView):
     """Generic class-based view for updating part."""
 
     model = Part
@@ -69,7 +163,69 @@ class PartUpdateView(SuccessMessageMixin, generic.UpdateView):
         )
 
 
-class PartDeleteView(componentor.mixins.DeletionProtectionMixin,
+class PartBulkEditView(generic.FormView):
+    """Generic class-based view for editing many parts at once.
+
+    A valid form is shown again with a preview of the changes, it is only
+    applied when submitted with ``apply``. All parts are updated with one
+    ``UPDATE`` per request, through the write queue.
+    """
+
+    template_name = 'parts/part_bulk_edit.html'
+    form_class = PartBulkEditForm
+    success_url = reverse_lazy('parts:part_list')
+    selection_limit = 100
+    preview_limit = 50
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        if self.request.method == 'GET':
+            kwargs['initial'] = {
+                'search_query': self.request.GET.get('search_query', ''),
+            }
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = context['form']
+        search_query = form['search_query'].value()
+        qs = project(Part.objects.all(), ('id', 'designation', 'name'))
+        if search_query:
+            qs = qs.filter(
+                Q(designation__icontains=search_query)
+                | Q(name__icontains=search_query)
+            )
+        context['selection'] = qs[:self.selection_limit]
+        context['selected'] = [
+            str(pk) for pk in form['parts'].value() or []
+        ]
+        return context
+
+    def form_valid(self, form):
+        if 'apply' not in self.request.POST:
+            return self.render_to_response(self.get_context_data(
+                form=form,
+                changes=form.changes[:self.preview_limit],
+                change_count=len(form.changes),
+            ))
+        count = write_queue.run(self.apply, form)
+        messages.success(self.request, f'{count} parts successfully updated')
+        return super().form_valid(form)
+
+    def apply(self, form):
+        pks = [pk for pk, old, new in form.changes]
+        using = router.db_for_write(Part)
+        count = Part.objects.using(using).filter(pk__in=pks).update(
+            updated=timezone.now(),
+            version=F('version') + 1,
+            **form.get_updates(),
+        )
+        parts_bulk_updated.send(sender=Part, pks=pks, using=using)
+        return count
+
+
+class PartDeleteView(componentor.mixins.QueuedWriteMixin,
+                     componentor.mixins.DeletionProtectionMixin,
                      generic.DeleteView):
     """Generic class-based view for deleting part."""
 
@@ -0,0 +1,62 @@
+// Live search and "load more" paging for list pages.
+// The server answers requests sent with X-Requested-With by rendering only
+// the table rows, which are swapped into the page.
+(function() {
+  var DEBOUNCE_MS = 300;
+
+  function fetchRows(url, signal) {
+    return fetch(url, {
+      headers: {'X-Requested-With': 'XMLHttpRequest'},
+      signal: signal
+    }).then(function(response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    });
+  }
+
+  function bindSearch(form) {
+    var rows = document.querySelector(form.dataset.liveSearch);
+    var timer = null;
+    var controller = null;
+
+    function search() {
+      var query = new URLSearchParams(new FormData(form)).toString();
+      var url = window.location.pathname + (query ? '?' + query : '');
+      if (controller) {
+        controller.abort();
+      }
+      controller = new AbortController();
+      fetchRows(url, controller.signal).then(function(html) {
+        rows.innerHTML = html;
+        window.history.replaceState(null, '', url);
+      }).catch(function() {});
+    }
+
+    form.addEventListener('input', function() {
+      clearTimeout(timer);
+      timer = setTimeout(search, DEBOUNCE_MS);
+    });
+    form.addEventListener('submit', function(event) {
+      event.preventDefault();
+      clearTimeout(timer);
+      search();
+    });
+    rows.addEventListener('click', function(event) {
+      var link = event.target.closest('.load-more a');
+      if (!link) {
+        return;
+      }
+      event.preventDefault();
+      link.classList.add('disabled');
+      fetchRows(link.href).then(function(html) {
+        link.closest('tr').outerHTML = html;
+      }).catch(function() {
+        link.classList.remove('disabled');
+      });
+    });
+  }
+
+  document.querySelectorAll('form[data-live-search]').forEach(bindSearch);
+})();